@@ -0,0 +1,91 @@
+"""Construction time of COCO objects with the incremental index layer.
+
+Compares `CocoIndex.build` to the previous `model_dump()` based bookkeeping
+on synthetic datasets.
+
+    python -m benchmarks.bench_coco_init --sizes 100000 1000000 5000000
+"""
+
+import argparse
+import time
+from collections import defaultdict
+
+from cocomltools.models.base import Image, Annotation, Category
+from cocomltools.models.coco import COCO
+from cocomltools.utils import get_max_id_from_seq
+
+ANNS_PER_IMAGE = 10
+NUM_CATEGORIES = 80
+
+
+def make_dataset(num_anns: int):
+    num_images = max(num_anns // ANNS_PER_IMAGE, 1)
+    images = [
+        Image.model_construct(id=i + 1, file_name=f"{i}.jpg", width=640, height=480)
+        for i in range(num_images)
+    ]
+    annotations = [
+        Annotation.model_construct(
+            id=i + 1,
+            image_id=i % num_images + 1,
+            category_id=i % NUM_CATEGORIES + 1,
+            score=1.0,
+            bbox=[0.0, 0.0, 10.0, 10.0],
+            segmentation=[],
+            area=100.0,
+            iscrowd=0,
+        )
+        for i in range(num_anns)
+    ]
+    categories = [
+        Category.model_construct(id=i + 1, name=f"cat{i}")
+        for i in range(NUM_CATEGORIES)
+    ]
+    return images, annotations, categories
+
+
+def legacy_index(images, annotations, categories):
+    get_max_id_from_seq([elem.model_dump() for elem in images])
+    get_max_id_from_seq([elem.model_dump() for elem in annotations])
+    get_max_id_from_seq([elem.model_dump() for elem in categories])
+    {elem.file_name: elem.id for elem in images}
+    {elem.id: elem.file_name for elem in images}
+    {elem.name: elem.id for elem in categories}
+    {elem.id: elem.name for elem in categories}
+    image_ids_to_anns = defaultdict(list)
+    image_ids_to_ann_count = defaultdict(int)
+    for ann in annotations:
+        image_ids_to_anns[ann.image_id].append(ann)
+        image_ids_to_ann_count[ann.image_id] += 1
+
+
+def timed(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 5_000_000]
+    )
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    print(f"{'annotations':>12} {'legacy (s)':>12} {'COCO() (s)':>12} {'speedup':>8}")
+    for size in args.sizes:
+        images, annotations, categories = make_dataset(size)
+        new_time = timed(COCO, images, annotations, categories)
+        if args.skip_legacy:
+            print(f"{size:>12} {'-':>12} {new_time:>12.3f} {'-':>8}")
+            continue
+        legacy_time = timed(legacy_index, images, annotations, categories)
+        print(
+            f"{size:>12} {legacy_time:>12.3f} {new_time:>12.3f} "
+            f"{legacy_time / new_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
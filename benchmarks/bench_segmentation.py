@@ -0,0 +1,128 @@
+"""Runtime of the NumPy mask pipeline on polygon-heavy datasets.
+
+Rasterizes synthetic star-shaped polygons (many vertices, some annotations
+made of several polygons) into compressed RLE, areas and bboxes with
+`MaskRuns`, and compares it to drawing each polygon with PIL then encoding
+the mask, and to pycocotools when it is installed. Both references are only
+run up to `--max-reference-size` annotations. Quality is the mean relative
+difference between mask areas and the exact polygon areas (shoelace).
+
+    python -m benchmarks.bench_segmentation --sizes 10000 100000 --vertices 64
+"""
+
+import argparse
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from cocomltools.segmentation import MaskRuns, mask_to_rle
+
+HEIGHT, WIDTH = 480, 640
+MAX_POLYGONS_PER_ANN = 3
+
+
+def make_polygons(num_anns: int, num_vertices: int, seed: int = 0):
+    """Star-shaped polygons, their annotation row and their exact area."""
+    rng = np.random.default_rng(seed)
+    polygons_per_ann = rng.integers(1, MAX_POLYGONS_PER_ANN + 1, num_anns)
+    num_polygons = int(polygons_per_ann.sum())
+    angles = np.sort(rng.random((num_polygons, num_vertices)) * 2 * np.pi, axis=1)
+    radii = rng.uniform(5, 60, (num_polygons, 1)) * rng.uniform(
+        0.5, 1.0, (num_polygons, num_vertices)
+    )
+    centers = rng.uniform((60, 60), (WIDTH - 60, HEIGHT - 60), (num_polygons, 2))
+    xs = centers[:, :1] + radii * np.cos(angles)
+    ys = centers[:, 1:] + radii * np.sin(angles)
+    areas = 0.5 * np.abs(
+        np.sum(xs * np.roll(ys, -1, axis=1) - np.roll(xs, -1, axis=1) * ys, axis=1)
+    )
+    polygons = np.stack([xs, ys], axis=2).reshape(num_polygons, -1)
+    offsets = np.concatenate([[0], np.cumsum(polygons_per_ann)])
+    segmentations = [
+        polygons[start:end].tolist() for start, end in zip(offsets, offsets[1:])
+    ]
+    return segmentations, areas, offsets
+
+
+def native_masks(segmentations):
+    runs = MaskRuns.from_segmentations(
+        segmentations, [HEIGHT] * len(segmentations), [WIDTH] * len(segmentations)
+    )
+    return runs.to_rles(), runs.areas(), runs.bboxes()
+
+
+def pil_masks(segmentations):
+    rles, areas = [], []
+    for polygons in segmentations:
+        image = Image.new("L", (WIDTH, HEIGHT))
+        draw = ImageDraw.Draw(image)
+        for polygon in polygons:
+            draw.polygon(polygon, fill=1)
+        mask = np.asarray(image)
+        rles.append(mask_to_rle(mask))
+        areas.append(mask.sum())
+    return rles, np.asarray(areas, dtype=np.float64), None
+
+
+def pycocotools_masks(segmentations):
+    from pycocotools import mask as mask_utils
+
+    rles = [
+        mask_utils.merge(mask_utils.frPyObjects(polygons, HEIGHT, WIDTH))
+        for polygons in segmentations
+    ]
+    return rles, mask_utils.area(rles).astype(np.float64), mask_utils.toBbox(rles)
+
+
+def available_references():
+    references = [("pil", pil_masks)]
+    try:
+        import pycocotools.mask  # noqa: F401
+
+        references.append(("pycocotools", pycocotools_masks))
+    except ImportError:
+        pass
+    return references
+
+
+def single_polygon_error(areas, polygon_areas, offsets) -> float:
+    """Mean relative area error over annotations made of a single polygon."""
+    single = np.diff(offsets) == 1
+    exact = polygon_areas[offsets[:-1][single]]
+    return float(np.mean(np.abs(areas[single] - exact) / exact))
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--vertices", type=int, default=64)
+    parser.add_argument("--max-reference-size", type=int, default=10_000)
+    args = parser.parse_args()
+
+    print(
+        f"{'anns':>10} {'method':>12} {'time (s)':>10} "
+        f"{'anns/s':>10} {'area err':>10}"
+    )
+    for size in args.sizes:
+        segmentations, polygon_areas, offsets = make_polygons(size, args.vertices)
+        methods = [("native", native_masks)]
+        if size <= args.max_reference_size:
+            methods.extend(available_references())
+        for name, method in methods:
+            (_, areas, _), elapsed = timed(method, segmentations)
+            error = single_polygon_error(areas, polygon_areas, offsets)
+            print(
+                f"{size:>10} {name:>12} {elapsed:>10.3f} "
+                f"{size / elapsed:>10.0f} {error:>10.2e}"
+            )
+
+
+if __name__ == "__main__":
+    main()
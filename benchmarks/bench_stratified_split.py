@@ -0,0 +1,116 @@
+"""Runtime and quality of the native iterative stratification.
+
+Compares `iterative_stratification` to skmultilearn's
+`iterative_train_test_split` on synthetic multi-label datasets with a long
+tailed category distribution. Quality is the KL divergence between the label
+distribution of each split and the one of the full dataset (lower is better).
+skmultilearn (`poetry install --with benchmark`) is only run, when installed,
+up to `--max-reference-size` images.
+
+    python -m benchmarks.bench_stratified_split --sizes 10000 100000 1000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from cocomltools.stratify import iterative_stratification, label_matrix
+
+NUM_CATEGORIES = 600
+MAX_LABELS_PER_IMAGE = 8
+TEST_RATIO = 0.2
+
+
+def make_labels(num_images: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    labels_per_image = rng.integers(1, MAX_LABELS_PER_IMAGE + 1, num_images)
+    sample_rows = np.repeat(np.arange(num_images), labels_per_image)
+    # Zipf-like category frequencies, as in real detection datasets.
+    weights = 1.0 / np.arange(1, NUM_CATEGORIES + 1)
+    labels = rng.choice(NUM_CATEGORIES, len(sample_rows), p=weights / weights.sum())
+    return sample_rows, labels
+
+
+def label_kl(label_counts: np.ndarray, split_counts: np.ndarray) -> float:
+    p = label_counts / label_counts.sum()
+    q = (split_counts + 1e-12) / (split_counts.sum() + 1e-12 * len(split_counts))
+    mask = p > 0
+    return float(np.sum(p[mask] * np.log(p[mask] / q[mask])))
+
+
+def split_quality(indptr, indices, folds) -> tuple:
+    sample_of_entry = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    label_counts = np.bincount(indices)
+    return tuple(
+        label_kl(
+            label_counts,
+            np.bincount(
+                indices[folds[sample_of_entry] == fold], minlength=len(label_counts)
+            ),
+        )
+        for fold in (0, 1)
+    )
+
+
+def native_split(indptr, indices):
+    return iterative_stratification(indptr, indices, [1 - TEST_RATIO, TEST_RATIO], 0)
+
+
+def reference_split(indptr, indices):
+    from skmultilearn.model_selection import iterative_train_test_split
+
+    num_images = len(indptr) - 1
+    label_dense = np.zeros((num_images, indices.max() + 1), dtype=np.int8)
+    label_dense[np.repeat(np.arange(num_images), np.diff(indptr)), indices] = 1
+    image_rows = np.arange(num_images).reshape(-1, 1)
+    _, _, test_rows, _ = iterative_train_test_split(
+        image_rows, label_dense, test_size=TEST_RATIO
+    )
+    folds = np.zeros(num_images, dtype=np.int64)
+    folds[test_rows.ravel()] = 1
+    return folds
+
+
+def has_reference() -> bool:
+    try:
+        import skmultilearn  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--max-reference-size", type=int, default=20_000)
+    args = parser.parse_args()
+
+    print(
+        f"{'images':>10} {'method':>12} {'time (s)':>10} "
+        f"{'KL train':>10} {'KL test':>10}"
+    )
+    for size in args.sizes:
+        indptr, indices, _ = label_matrix(*make_labels(size), size)
+        methods = [("native", native_split)]
+        if size <= args.max_reference_size and has_reference():
+            methods.append(("skmultilearn", reference_split))
+        for name, split in methods:
+            folds, elapsed = timed(split, indptr, indices)
+            kl_train, kl_test = split_quality(indptr, indices, folds)
+            print(
+                f"{size:>10} {name:>12} {elapsed:>10.3f} "
+                f"{kl_train:>10.2e} {kl_test:>10.2e}"
+            )
+
+
+if __name__ == "__main__":
+    main()
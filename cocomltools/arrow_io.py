@@ -0,0 +1,218 @@
+import json
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Union
+
+import numpy as np
+
+from cocomltools.json_io import COCO_SECTIONS
+from cocomltools.models.columnar import (
+    ANNOTATION_FIELDS,
+    CATEGORY_FIELDS,
+    IMAGE_FIELDS,
+    ColumnarCOCO,
+    RaggedSegmentation,
+    _object_array,
+)
+
+# Table column -> store attribute, in table order.
+IMAGE_COLUMNS = {
+    "id": "image_ids",
+    "file_name": "file_names",
+    "width": "widths",
+    "height": "heights",
+}
+ANNOTATION_COLUMNS = {
+    "id": "ann_ids",
+    "image_id": "ann_image_ids",
+    "category_id": "ann_category_ids",
+    "score": "scores",
+    "area": "areas",
+    "iscrowd": "iscrowd",
+}
+CATEGORY_COLUMNS = {"id": "cat_ids", "name": "cat_names"}
+_SEGMENTATION_FIELDS = ("segmentation_nested", "segmentation_rle")
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Arrow / Parquet support requires `pip install pyarrow`")
+    return pyarrow
+
+
+def to_arrow_tables(store: ColumnarCOCO) -> Dict[str, "pyarrow.Table"]:
+    """images / annotations / categories Arrow tables of a columnar store.
+
+    Numeric columns wrap the store arrays without copies; bbox is a
+    fixed-size list of 4 doubles and segmentation a list of polygons, with
+    `segmentation_nested` telling flat polygons apart for a lossless round
+    trip. RLE segmentations go to a nullable `segmentation_rle` column of
+    JSON strings. Extra record fields become extra, nullable columns.
+    """
+    pa = _import_pyarrow()
+    images = {
+        column: pa.array(getattr(store, name)) for column, name in IMAGE_COLUMNS.items()
+    }
+    _add_extra_columns(pa, images, store.image_extras)
+
+    seg = store.segmentations
+    polygons = pa.LargeListArray.from_arrays(
+        pa.array(seg.poly_offsets, pa.int64()), pa.array(seg.values, pa.float64())
+    )
+    annotations = {
+        column: pa.array(getattr(store, name))
+        for column, name in ANNOTATION_COLUMNS.items()
+    }
+    annotations["bbox"] = pa.FixedSizeListArray.from_arrays(
+        pa.array(np.ascontiguousarray(store.bboxes, np.float64).reshape(-1)), 4
+    )
+    annotations["segmentation"] = pa.LargeListArray.from_arrays(
+        pa.array(seg.ann_offsets, pa.int64()), polygons
+    )
+    annotations["segmentation_nested"] = pa.array(seg.nested, pa.bool_())
+    if seg.rles is not None:
+        annotations["segmentation_rle"] = pa.array(
+            [None if rle is None else json.dumps(rle) for rle in seg.rles.tolist()],
+            pa.string(),
+        )
+    _add_extra_columns(pa, annotations, store.ann_extras)
+    categories = {
+        column: pa.array(getattr(store, name))
+        for column, name in CATEGORY_COLUMNS.items()
+    }
+    _add_extra_columns(pa, categories, store.cat_extras)
+    return {
+        "images": pa.table(images),
+        "annotations": pa.table(annotations),
+        "categories": pa.table(categories),
+    }
+
+
+def _add_extra_columns(pa, columns: Dict, extras: Optional[np.ndarray]):
+    if extras is None:
+        return
+    extras = [extra or {} for extra in extras.tolist()]
+    for key in dict.fromkeys(key for extra in extras for key in extra):
+        columns[key] = pa.array([extra.get(key) for extra in extras])
+
+
+def _extras_from_table(table, fields) -> Optional[np.ndarray]:
+    extra_columns = [name for name in table.column_names if name not in fields]
+    if not extra_columns:
+        return None
+    extras = [
+        {key: value for key, value in record.items() if value is not None}
+        for record in table.select(extra_columns).to_pylist()
+    ]
+    return _object_array([extra or None for extra in extras])
+
+
+def _list_parts(array) -> tuple:
+    """(offsets starting at 0, flattened values) of a possibly sliced list array."""
+    offsets = array.offsets.to_numpy()
+    return offsets - offsets[0], array.flatten()
+
+
+def store_from_tables(tables: Dict[str, "pyarrow.Table"]) -> ColumnarCOCO:
+    """Columnar store from the tables written by `to_arrow_tables`.
+
+    Columns missing from projected tables get their default value: 0, a
+    score of 1.0, empty names and empty segmentations.
+    """
+    _import_pyarrow()
+    images, annotations, categories = (tables[section] for section in COCO_SECTIONS)
+
+    def column(table, name: str, dtype, default=0) -> np.ndarray:
+        if name not in table.column_names:
+            return np.full(table.num_rows, default, dtype=dtype)
+        return table.column(name).to_numpy().astype(dtype)
+
+    def strings(table, name: str) -> np.ndarray:
+        if name not in table.column_names:
+            return _object_array([""] * table.num_rows)
+        return _object_array(table.column(name).to_pylist())
+
+    num_anns = annotations.num_rows
+    if "bbox" in annotations.column_names:
+        bbox = annotations.column("bbox").combine_chunks().flatten().to_numpy()
+        bboxes = bbox.astype(np.float64).reshape(-1, 4)
+    else:
+        bboxes = np.zeros((num_anns, 4), dtype=np.float64)
+    if "segmentation" in annotations.column_names:
+        ann_offsets, polygons = _list_parts(
+            annotations.column("segmentation").combine_chunks()
+        )
+        poly_offsets, values = _list_parts(polygons)
+        values = values.to_numpy().astype(np.float64)
+    else:
+        ann_offsets = np.zeros(num_anns + 1, dtype=np.int64)
+        poly_offsets = np.zeros(1, dtype=np.int64)
+        values = np.zeros(0, dtype=np.float64)
+    rles = None
+    if "segmentation_rle" in annotations.column_names:
+        rles = _object_array(
+            [
+                None if rle is None else json.loads(rle)
+                for rle in annotations.column("segmentation_rle").to_pylist()
+            ]
+        )
+    return ColumnarCOCO(
+        image_ids=column(images, "id", np.int64),
+        file_names=strings(images, "file_name"),
+        widths=column(images, "width", np.int64),
+        heights=column(images, "height", np.int64),
+        ann_ids=column(annotations, "id", np.int64),
+        ann_image_ids=column(annotations, "image_id", np.int64),
+        ann_category_ids=column(annotations, "category_id", np.int64),
+        scores=column(annotations, "score", np.float64, default=1.0),
+        areas=column(annotations, "area", np.float64),
+        iscrowd=column(annotations, "iscrowd", np.int64),
+        bboxes=bboxes,
+        segmentations=RaggedSegmentation(
+            ann_offsets,
+            poly_offsets,
+            values,
+            column(annotations, "segmentation_nested", bool, default=False),
+            rles,
+        ),
+        cat_ids=column(categories, "id", np.int64),
+        cat_names=strings(categories, "name"),
+        image_extras=_extras_from_table(images, IMAGE_FIELDS),
+        ann_extras=_extras_from_table(
+            annotations, ANNOTATION_FIELDS.union(_SEGMENTATION_FIELDS)
+        ),
+        cat_extras=_extras_from_table(categories, CATEGORY_FIELDS),
+    )
+
+
+def write_parquet(store: ColumnarCOCO, directory: Union[str, Path]):
+    """Write `images.parquet`, `annotations.parquet` and `categories.parquet`."""
+    pa = _import_pyarrow()
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for section, table in to_arrow_tables(store).items():
+        pa.parquet.write_table(table, str(directory / f"{section}.parquet"))
+
+
+def read_parquet_tables(
+    directory: Union[str, Path],
+    columns: Optional[Dict[str, Sequence[str]]] = None,
+) -> Dict[str, "pyarrow.Table"]:
+    """Memory-mapped tables of a parquet directory.
+
+    `columns` maps a section to the columns to read, e.g.
+    `{"annotations": ["category_id", "bbox"]}`; sections missing from it are
+    read whole. Only the projected column chunks are read from disk.
+    """
+    pa = _import_pyarrow()
+    columns = columns or {}
+    return {
+        section: pa.parquet.read_table(
+            str(Path(directory) / f"{section}.parquet"),
+            columns=None if section not in columns else list(columns[section]),
+            memory_map=True,
+        )
+        for section in COCO_SECTIONS
+    }
@@ -0,0 +1,288 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from cocomltools.logger import logger
+from cocomltools.models.coco import VALIDATE_MODES, check_validate_mode
+from cocomltools.models.columnar import ColumnarCOCO, RaggedSegmentation
+
+CACHE_DIR_ENV = "COCOML_CACHE_DIR"
+CACHE_MAX_BYTES_ENV = "COCOML_CACHE_MAX_BYTES"
+DEFAULT_MAX_BYTES = 4 * 1024**3
+# Bump when the on-disk layout changes, older entries are then ignored.
+CACHE_FORMAT_VERSION = 2
+
+_NUMERIC_COLUMNS = (
+    "image_ids",
+    "widths",
+    "heights",
+    "ann_ids",
+    "ann_image_ids",
+    "ann_category_ids",
+    "scores",
+    "areas",
+    "iscrowd",
+    "bboxes",
+    "cat_ids",
+)
+_SEGMENTATION_COLUMNS = ("ann_offsets", "poly_offsets", "values", "nested")
+_STRING_COLUMNS = ("file_names", "cat_names")
+_EXTRAS_COLUMNS = ("image_extras", "ann_extras", "cat_extras")
+META_FILE = "meta.json"
+
+
+def default_cache_dir() -> Path:
+    if os.environ.get(CACHE_DIR_ENV):
+        return Path(os.environ[CACHE_DIR_ENV])
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "cocomltools"
+
+
+def default_max_bytes() -> int:
+    return int(os.environ.get(CACHE_MAX_BYTES_ENV, DEFAULT_MAX_BYTES))
+
+
+def _save_strings(directory: Path, name: str, values: np.ndarray):
+    """Strings as one utf-8 buffer plus offsets, both plain `.npy` arrays."""
+    encoded = [value.encode() for value in values.tolist()]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    np.save(directory / f"{name}.offsets.npy", offsets)
+    np.save(directory / f"{name}.data.npy", np.frombuffer(b"".join(encoded), np.uint8))
+
+
+def _load_strings(directory: Path, name: str) -> np.ndarray:
+    offsets = np.load(directory / f"{name}.offsets.npy").tolist()
+    data = np.load(directory / f"{name}.data.npy").tobytes()
+    values = np.empty(len(offsets) - 1, dtype=object)
+    values[:] = [data[start:end].decode() for start, end in zip(offsets, offsets[1:])]
+    return values
+
+
+def save_store(store: ColumnarCOCO, directory: Path):
+    """Write every column of `store` to `directory` as `.npy` files."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for name in _NUMERIC_COLUMNS:
+        np.save(directory / f"{name}.npy", np.ascontiguousarray(getattr(store, name)))
+    for name in _SEGMENTATION_COLUMNS:
+        np.save(directory / f"seg_{name}.npy", getattr(store.segmentations, name))
+    for name in _STRING_COLUMNS:
+        _save_strings(directory, name, getattr(store, name))
+    for name in _EXTRAS_COLUMNS:
+        if getattr(store, name) is not None:
+            with open(directory / f"{name}.json", "w") as f:
+                json.dump(getattr(store, name).tolist(), f)
+    if store.segmentations.rles is not None:
+        with open(directory / "seg_rles.json", "w") as f:
+            json.dump(store.segmentations.rles.tolist(), f)
+
+
+def load_store(directory: Path, mmap: bool = True) -> ColumnarCOCO:
+    """Read a store written by `save_store`, numeric columns memory-mapped."""
+    directory = Path(directory)
+    mmap_mode = "r" if mmap else None
+
+    def load(name: str) -> np.ndarray:
+        return np.load(directory / f"{name}.npy", mmap_mode=mmap_mode)
+
+    def load_objects(name: str) -> Optional[np.ndarray]:
+        if not (directory / f"{name}.json").is_file():
+            return None
+        with open(directory / f"{name}.json") as f:
+            values = json.load(f)
+        objects = np.empty(len(values), dtype=object)
+        objects[:] = values
+        return objects
+
+    return ColumnarCOCO(
+        segmentations=RaggedSegmentation(
+            *(load(f"seg_{name}") for name in _SEGMENTATION_COLUMNS),
+            rles=load_objects("seg_rles"),
+        ),
+        **{name: load_objects(name) for name in _EXTRAS_COLUMNS},
+        **{name: load(name) for name in _NUMERIC_COLUMNS},
+        **{name: _load_strings(directory, name) for name in _STRING_COLUMNS},
+    )
+
+
+def file_digest(path: Union[str, Path], chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _validated(meta: Dict, validate: str) -> bool:
+    """Whether an entry was validated at least as strictly as `validate`."""
+    validated = meta.get("validate", "none")
+    return VALIDATE_MODES.index(validated) <= VALIDATE_MODES.index(validate)
+
+
+def _dir_bytes(directory: Path) -> int:
+    return sum(path.stat().st_size for path in directory.iterdir() if path.is_file())
+
+
+class DatasetCache:
+    """Persistent cache of parsed coco files as memory-mappable column files.
+
+    Entries live in `<cache_dir>/entries/<content hash>`. A small key file,
+    named after the source path, mtime and size, points to the entry, so a
+    hit only costs a `stat`; on a key miss the content hash still finds the
+    entry of a moved / touched file with the same bytes. Entries are evicted
+    least recently used first once the cache grows above `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Union[str, Path]] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.max_bytes = default_max_bytes() if max_bytes is None else max_bytes
+        self.entries_dir = self.cache_dir / "entries"
+        self.keys_dir = self.cache_dir / "keys"
+
+    @staticmethod
+    def source_key(json_file: Union[str, Path]) -> str:
+        path = Path(json_file).resolve()
+        stat = path.stat()
+        key = f"{CACHE_FORMAT_VERSION}|{path}|{stat.st_mtime_ns}|{stat.st_size}"
+        return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+    def _entry_dir(self, digest: str) -> Path:
+        return self.entries_dir / f"v{CACHE_FORMAT_VERSION}-{digest}"
+
+    def _lookup(self, digest: str, validate: str = "none") -> Optional[ColumnarCOCO]:
+        entry_dir = self._entry_dir(digest)
+        if not (entry_dir / META_FILE).is_file():
+            return None
+        meta = json.loads((entry_dir / META_FILE).read_text())
+        if not _validated(meta, validate):
+            return None
+        # The entry directory mtime is the last access time used by the LRU.
+        os.utime(entry_dir)
+        return load_store(entry_dir)
+
+    def load(self, json_file: Union[str, Path], validate: str = "full") -> ColumnarCOCO:
+        """Cached store of `json_file`, parsed and added to the cache on a miss.
+
+        A miss validates the records like `COCO.from_json_file(validate=...)`
+        before storing them. Entries remember how they were validated, an
+        entry validated less strictly than `validate` counts as a miss.
+        """
+        check_validate_mode(validate)
+        start_time = time.time()
+        key_file = self.keys_dir / self.source_key(json_file)
+        store = None
+        if key_file.is_file():
+            store = self._lookup(key_file.read_text().strip(), validate)
+        if store is None:
+            digest = file_digest(json_file)
+            store = self._lookup(digest, validate)
+            if store is None:
+                store = ColumnarCOCO.from_json_file(str(json_file), validate=validate)
+                self.put(store, digest, source=json_file, validate=validate)
+                return store
+            self._write_key(key_file, digest)
+        logger.info(f"Loaded {json_file} from cache in {time.time() - start_time:.3f}s")
+        return store
+
+    def load_bytes(self, data: bytes, validate: str = "full") -> ColumnarCOCO:
+        """Cached store of an in-memory coco file, e.g. an uploaded one."""
+        check_validate_mode(validate)
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        store = self._lookup(digest, validate)
+        if store is None:
+            store = ColumnarCOCO.from_dict(json.loads(data), validate=validate)
+            self.put(store, digest, validate=validate)
+        return store
+
+    def put(
+        self,
+        store: ColumnarCOCO,
+        digest: str,
+        source: Optional[Union[str, Path]] = None,
+        validate: str = "none",
+    ):
+        """Store `store` under `digest`, `validate` telling how it was validated."""
+        entry_dir = self._entry_dir(digest)
+        if entry_dir.is_dir():
+            meta = json.loads((entry_dir / META_FILE).read_text())
+            if not _validated(meta, validate):
+                meta["validate"] = validate
+                tmp_file = entry_dir / f"{META_FILE}.tmp{os.getpid()}"
+                tmp_file.write_text(json.dumps(meta))
+                tmp_file.replace(entry_dir / META_FILE)
+        else:
+            # Written aside then renamed, readers never see a partial entry.
+            tmp_dir = self.entries_dir / f".tmp-{digest}-{os.getpid()}"
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            save_store(store, tmp_dir)
+            meta = {
+                "digest": digest,
+                "source": str(Path(source).resolve()) if source else None,
+                "num_images": store.num_images,
+                "num_annotations": store.num_annotations,
+                "validate": validate,
+                "created": time.time(),
+            }
+            (tmp_dir / META_FILE).write_text(json.dumps(meta))
+            try:
+                tmp_dir.rename(entry_dir)
+            except OSError:
+                # Another process stored the same entry first.
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        if source is not None:
+            self._write_key(self.keys_dir / self.source_key(source), digest)
+        self.evict(keep=digest)
+
+    def _write_key(self, key_file: Path, digest: str):
+        key_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = key_file.with_suffix(f".tmp{os.getpid()}")
+        tmp_file.write_text(digest)
+        tmp_file.replace(key_file)
+
+    def entries(self) -> List[Dict]:
+        """Cache entries, most recently used first."""
+        if not self.entries_dir.is_dir():
+            return []
+        entries = []
+        for entry_dir in self.entries_dir.iterdir():
+            if not (entry_dir / META_FILE).is_file():
+                continue
+            meta = json.loads((entry_dir / META_FILE).read_text())
+            meta["path"] = str(entry_dir)
+            meta["num_bytes"] = _dir_bytes(entry_dir)
+            meta["last_access"] = entry_dir.stat().st_mtime
+            entries.append(meta)
+        return sorted(entries, key=lambda entry: entry["last_access"], reverse=True)
+
+    def total_bytes(self) -> int:
+        return sum(entry["num_bytes"] for entry in self.entries())
+
+    def evict(self, keep: Optional[str] = None) -> List[Dict]:
+        """Remove least recently used entries until the cache fits `max_bytes`."""
+        entries = self.entries()
+        total = sum(entry["num_bytes"] for entry in entries)
+        evicted = []
+        for entry in reversed(entries):
+            if total <= self.max_bytes:
+                break
+            if entry["digest"] == keep:
+                continue
+            shutil.rmtree(entry["path"], ignore_errors=True)
+            total -= entry["num_bytes"]
+            evicted.append(entry)
+        return evicted
+
+    def clear(self):
+        shutil.rmtree(self.entries_dir, ignore_errors=True)
+        shutil.rmtree(self.keys_dir, ignore_errors=True)
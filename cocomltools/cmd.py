@@ -1,6 +1,15 @@
 from pathlib import Path
+import json
+import time
+from cocomltools.logger import logger
 from cocomltools.coco_ops import CocoOps
+from cocomltools.cache import DatasetCache
+from cocomltools.crop import CropOptions
 from cocomltools.utils import check_is_json
+from cocomltools.query import parse_query_expression
+
+COMPRESSION_SUFFIXES = {None: "", "gzip": ".gz", "zstd": ".zst"}
+SPLIT_NAMES = {2: ["train", "test"], 3: ["train", "val", "test"]}
 
 
 class Cmd:
@@ -13,6 +22,12 @@ class Cmd:
             self.crop_cmd(args)
         elif args.cmd == "filter":
             self.filter_cmd(args)
+        elif args.cmd == "stats":
+            self.stats_cmd(args)
+        elif args.cmd == "masks":
+            self.masks_cmd(args)
+        elif args.cmd == "cache":
+            self.cache_cmd(args)
 
     def split_cmd(self, args):
 
@@ -20,45 +35,176 @@ class Cmd:
         if not check_is_json(coco_path):
             raise ValueError("Missing / Incorrect file format, provide JSON as input")
 
-        coco_ops = CocoOps.from_json_file(coco_path)
-        coco_1, coco_2 = coco_ops.split(ratio=args.ratio, mode=args.mode)
+        coco_ops = self.load_coco_ops(coco_path, args)
+        if args.hash_split and args.mode != "random":
+            raise ValueError("--hash-split replaces the random mode, drop --mode")
+        mode = "hash" if args.hash_split else args.mode
+        groups = dict(group_regex=args.group_regex, group_field=args.group_field)
         if args.output_dir and Path(args.output_dir).is_dir():
             output_dir = Path(args.output_dir)
         else:
             output_dir = Path(args.coco_path).parent
 
-        coco_1.save_coco_dict(output_dir / "coco_train.json")
-        coco_2.save_coco_dict(output_dir / "coco_test.json")
+        if args.kfold:
+            folds = coco_ops.kfold(args.kfold, mode=mode, seed=args.seed, **groups)
+            for index, (coco_train, coco_val) in enumerate(folds):
+                self.save_coco(
+                    coco_train, output_dir / f"coco_fold{index}_train.json", args
+                )
+                self.save_coco(
+                    coco_val, output_dir / f"coco_fold{index}_val.json", args
+                )
+            return
+
+        if args.ratios:
+            ratios = [float(ratio) for ratio in args.ratios.split(",")]
+        else:
+            ratios = [1 - args.ratio, args.ratio]
+        if args.names:
+            names = args.names.split(",")
+        else:
+            names = SPLIT_NAMES.get(
+                len(ratios), [f"split{index}" for index in range(len(ratios))]
+            )
+        if len(names) != len(ratios):
+            raise ValueError("--names needs one name per split ratio")
+        splits = coco_ops.split_many(ratios, mode=mode, seed=args.seed, **groups)
+        for name, coco_split in zip(names, splits):
+            self.save_coco(coco_split, output_dir / f"coco_{name}.json", args)
 
     def merge_cmd(self, args):
         input_files = args.coco_paths.split(",")
 
-        coco_merged = CocoOps.merge(input_files)
-
         if args.output_dir and Path(args.output_dir).is_dir():
             output_dir = Path(args.output_dir)
         else:
             output_dir = Path(input_files[0]).parent
 
-        coco_merged.save_coco_dict(output_dir / "coco_merged.json")
+        if args.streaming:
+            suffix = COMPRESSION_SUFFIXES[args.compression]
+            CocoOps.merge_streaming(
+                input_files,
+                f"{output_dir / 'coco_merged.json'}{suffix}",
+                compact=args.compact,
+                compression=args.compression,
+            )
+            return
+
+        coco_merged = CocoOps.merge(
+            input_files,
+            max_workers=args.num_workers,
+            columnar=True,
+            validate=args.validate,
+        )
+
+        start_time = time.time()
+        self.save_coco(coco_merged, output_dir / "coco_merged.json", args)
+        logger.info(f"Saved merged coco in {time.time() - start_time:.2f} seconds")
 
     def crop_cmd(self, args):
 
         coco_file = args.coco_path
-        coco_ops = CocoOps.from_json_file(coco_file)
+        coco_ops = self.load_coco_ops(coco_file, args)
         images_dir = Path(args.images_dir)
         output_dir = (
             Path(args.output_dir) if args.output_dir else images_dir.parent / "cropped"
         )
         output_dir.mkdir(exist_ok=True, parents=True)
-        coco_ops.crop(images_dir, output_dir, max_workers=args.num_workers)
+        options = CropOptions(
+            backend=args.backend,
+            max_side=args.max_side,
+            output_size=(
+                tuple(int(size) for size in args.output_size.lower().split("x"))
+                if args.output_size
+                else None
+            ),
+            output_format=args.format,
+            quality=args.quality,
+            padding_pct=args.padding_pct,
+            square=args.square,
+            clamp=args.clamp,
+            output_mode=args.output_mode,
+            shard_size=args.shard_size,
+            resume=not args.no_resume,
+            mask=args.mask,
+        )
+        coco_ops.crop(
+            images_dir,
+            output_dir,
+            max_workers=args.num_workers,
+            options=options,
+        )
 
     def filter_cmd(self, args):
         coco_file = args.coco_path
-        coco_ops = CocoOps.from_json_file(coco_file)
+        coco_ops = self.load_coco_ops(coco_file, args)
+        if args.output_dir and Path(args.output_dir).is_dir():
+            output_dir = Path(args.output_dir)
+        else:
+            output_dir = Path(coco_file).parent
+        coco_output = coco_ops.filter(
+            category_names=args.categories.split(",") if args.categories else None,
+            where=parse_query_expression(args.where) if args.where else None,
+        )
+        self.save_coco(coco_output, output_dir / "coco_filtered.json", args)
+
+    def masks_cmd(self, args):
+        coco_file = args.coco_path
+        coco_ops = self.load_coco_ops(coco_file, args)
         if args.output_dir and Path(args.output_dir).is_dir():
             output_dir = Path(args.output_dir)
         else:
             output_dir = Path(coco_file).parent
-        coco_output = coco_ops.filter(args.categories.split(","))
-        coco_output.save_coco_dict(output_dir / "coco_filtered.json")
+        coco_output = coco_ops.encode_segmentations(
+            to_rle=not args.keep_polygons, recompute_bbox=args.recompute_bbox
+        )
+        self.save_coco(coco_output, output_dir / "coco_masks.json", args)
+
+    def stats_cmd(self, args):
+        stats = CocoOps.stream_stats(
+            args.coco_path, histogram_bins=args.bins, max_workers=args.num_workers
+        )
+        stats_json = json.dumps(stats, indent=2)
+        if args.output:
+            Path(args.output).write_text(stats_json)
+        else:
+            print(stats_json)
+
+    def cache_cmd(self, args):
+        cache = DatasetCache(args.cache_dir, max_bytes=args.max_bytes)
+        if args.action == "clear":
+            cache.clear()
+            logger.info(f"Cleared cache {cache.cache_dir}")
+        elif args.action == "prune":
+            evicted = cache.evict()
+            logger.info(f"Evicted {len(evicted)} cache entries")
+        else:
+            entries = cache.entries()
+            for entry in entries:
+                print(
+                    f"{entry['digest']}  {entry['num_bytes'] / 1024**2:9.1f} MB  "
+                    f"{entry['num_images']:>9} images  "
+                    f"{entry['num_annotations']:>10} anns  {entry['source']}"
+                )
+            print(
+                f"{len(entries)} entries, "
+                f"{sum(entry['num_bytes'] for entry in entries) / 1024**2:.1f} MB "
+                f"in {cache.cache_dir} (max {cache.max_bytes / 1024**2:.0f} MB)"
+            )
+
+    @staticmethod
+    def load_coco_ops(coco_file, args) -> CocoOps:
+        if args.cache:
+            # Cached datasets load as columnar stores, which every command supports.
+            cache = DatasetCache(args.cache_dir)
+            return CocoOps.from_json_file(coco_file, columnar=True, cache=cache)
+        return CocoOps.from_json_file(coco_file)
+
+    @staticmethod
+    def save_coco(coco, output_file: Path, args):
+        suffix = COMPRESSION_SUFFIXES[args.compression]
+        coco.save_coco_dict(
+            f"{output_file}{suffix}",
+            compact=args.compact,
+            compression=args.compression,
+        )
@@ -1,219 +1,640 @@
-from cocomltools.models.coco import COCO
+from cocomltools.models.coco import COCO, check_validate_mode
+from cocomltools.models.columnar import (
+    ColumnarCOCO,
+    RaggedSegmentation,
+    _object_array,
+)
+from cocomltools.cache import DatasetCache
 from cocomltools.models.base import Annotation
-from cocomltools.utils import random_split, mlt_stratified_split
+from cocomltools.utils import (
+    annotation_image_rows,
+    hash_folds,
+    random_folds,
+    random_group_folds,
+    regex_groups,
+)
+from cocomltools.stratify import iterative_stratification, label_matrix
 from cocomltools.logger import logger
-from collections import defaultdict
-from PIL import Image
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import compress
 import time
-from typing import List
+from typing import List, Optional, Sequence, Tuple, Union
 from cocomltools.utils import check_is_json
+from cocomltools.stream_merge import StreamingMerge
+from cocomltools.crop import CropEngine, CropOptions, CropTask
+from cocomltools.stats import coco_stats, list_coco_files, stream_stats
+from cocomltools.quality import quality_stats
+from cocomltools.segmentation import MaskRuns
+import numpy as np
 
 
 class CocoOps:
-    def __init__(self, coco: COCO):
+    def __init__(self, coco: Union[COCO, ColumnarCOCO]):
         self.coco = coco
 
-    def split(self, ratio: float = 0.2, mode: str = "random"):
+    @property
+    def is_columnar(self) -> bool:
+        return isinstance(self.coco, ColumnarCOCO)
+
+    def split(
+        self,
+        ratio: float = 0.2,
+        mode: str = "random",
+        seed: Optional[int] = None,
+        group_regex: Optional[str] = None,
+        group_field: Optional[str] = None,
+    ):
         if ratio > 0:
-            return self._split(ratio=ratio, mode=mode)
+            return self._split(
+                ratio=ratio,
+                mode=mode,
+                seed=seed,
+                group_regex=group_regex,
+                group_field=group_field,
+            )
+        elif self.is_columnar:
+            return (self.coco, ColumnarCOCO.from_dict({}))
         else:
             return (self.coco, COCO())
 
-    def filter(self, category_names: List[str] = None, image_names: List[str] = None):
-        if category_names:
-            for category_name in category_names:
-                self.coco.remove_category_from_coco(category_name)
-        if image_names:
-            for image_name in image_names:
-                self.coco.remove_image_from_coco(image_name)
+    def split_many(
+        self,
+        ratios: Sequence[float],
+        mode: str = "random",
+        seed: Optional[int] = None,
+        group_regex: Optional[str] = None,
+        group_field: Optional[str] = None,
+    ) -> tuple:
+        """Split images into `len(ratios)` datasets in a single pass.
+
+        With `group_regex` (matched on file names) or `group_field` (an image
+        field), images sharing a group key always land in the same split.
+        """
+        folds = self._image_folds(ratios, mode, seed, group_regex, group_field)
+        return self._split_by_image_folds(folds, num_folds=len(ratios))
+
+    def kfold(
+        self,
+        k: int,
+        mode: str = "strat",
+        seed: Optional[int] = None,
+        group_regex: Optional[str] = None,
+        group_field: Optional[str] = None,
+    ) -> List[tuple]:
+        """(train, val) pairs of a k-fold split, folds assigned in a single pass."""
+        folds = self._image_folds([1 / k] * k, mode, seed, group_regex, group_field)
+        return [
+            self._split_by_image_folds((folds == fold).astype(np.int64))
+            for fold in range(k)
+        ]
+
+    def filter(
+        self,
+        category_names: List[str] = None,
+        image_names: List[str] = None,
+        min_score: Optional[float] = None,
+        area_range: Optional[Tuple[float, float]] = None,
+        remove_crowd: bool = False,
+        where: Optional[dict] = None,
+    ):
+        filters = dict(
+            category_names=category_names,
+            image_names=image_names,
+            min_score=min_score,
+            area_range=area_range,
+            remove_crowd=remove_crowd,
+            where=where,
+        )
+        if self.is_columnar:
+            self.coco = self.coco.remove(**filters)
+            return self.coco
 
+        self.coco.remove(**filters)
         return COCO(
             images=self.coco.images,
             annotations=self.coco.annotations,
             categories=self.coco.categories,
         )
 
+    def query(self, **query) -> List[Annotation]:
+        return self.coco.query(**query)
+
+    def query_images(
+        self, anns_gt: Optional[int] = None, anns_lt: Optional[int] = None
+    ):
+        return self.coco.query_images(anns_gt=anns_gt, anns_lt=anns_lt)
+
     def crop(
         self,
         images_dir: Path,
         output_dir: Path,
         max_workers: int = 1,
-    ):
-        if isinstance(images_dir, str):
-            images_dir = Path(images_dir)
+        backend: Optional[str] = None,
+        options: Optional[CropOptions] = None,
+    ) -> CropEngine:
+        """Crop every annotation; an explicit `backend` overrides `options.backend`."""
+        options = options or CropOptions()
+        if backend is not None:
+            options = options.model_copy(update={"backend": backend})
+        engine = CropEngine(images_dir, output_dir, options)
+        tasks = self._crop_tasks(with_segmentations=options.mask is not None)
+        engine.run(tasks, max_workers=max_workers)
+        return engine
 
-        if isinstance(output_dir, str):
-            output_dir = Path(output_dir)
+    def _crop_tasks(self, with_segmentations: bool = False) -> List[CropTask]:
+        cat_ids_to_names = self.coco.cat_ids_to_names
+        tasks = []
+        if self.is_columnar:
+            coco = self.coco
+            for image_id, file_name in zip(
+                coco.image_ids.tolist(), coco.file_names.tolist()
+            ):
+                rows = coco.annotation_rows_by_image_id(image_id)
+                if len(rows) == 0:  # if no annotations, skip
+                    continue
+                anns = [
+                    (ann_id, cat_id, cat_ids_to_names[cat_id], tuple(bbox))
+                    for ann_id, cat_id, bbox in zip(
+                        coco.ann_ids[rows].tolist(),
+                        coco.ann_category_ids[rows].tolist(),
+                        coco.bboxes[rows].tolist(),
+                    )
+                ]
+                tasks.append(
+                    CropTask.model_construct(
+                        image_id=image_id,
+                        file_name=file_name,
+                        anns=anns,
+                        segmentations=(
+                            [coco.segmentations[row] for row in rows.tolist()]
+                            if with_segmentations
+                            else None
+                        ),
+                    )
+                )
+            return tasks
 
-        output_dir.mkdir(parents=True, exist_ok=True)
+        for elem in self.coco.images:
+            annotations = self.coco.get_annotation_by_image_id(elem.id)
+            if len(annotations) == 0:  # if no annotations, skip
+                continue
+            anns = [
+                (
+                    ann.id,
+                    ann.category_id,
+                    cat_ids_to_names[ann.category_id],
+                    tuple(ann.bbox),
+                )
+                for ann in annotations
+            ]
+            tasks.append(
+                CropTask.model_construct(
+                    image_id=elem.id,
+                    file_name=elem.file_name,
+                    anns=anns,
+                    segmentations=(
+                        [ann.segmentation for ann in annotations]
+                        if with_segmentations
+                        else None
+                    ),
+                )
+            )
+        return tasks
+
+    def encode_segmentations(
+        self,
+        to_rle: bool = True,
+        recompute_area: bool = True,
+        recompute_bbox: bool = False,
+    ):
+        """Rasterize every segmentation once, in bulk, and update annotations.
 
+        `to_rle` converts polygons and uncompressed RLEs to compressed RLE;
+        `recompute_area` / `recompute_bbox` replace area and bbox by the pixel
+        count and pixel extent of the mask. Annotations without segmentation
+        are left as is.
+        """
         start_time = time.time()
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        coco = self.coco
+        runs = self._mask_runs()
+        has_mask = runs.has_mask
+        areas = runs.areas() if recompute_area else None
+        bboxes = runs.bboxes() if recompute_bbox else None
+        rles = runs.to_rles() if to_rle else None
 
-            futures = [
-                executor.submit(self._crop_one_image, elem, images_dir, output_dir)
-                for elem in self.coco.images
-            ]
-            for future in as_completed(futures):
-                try:
-                    future.result()
-                except Exception as e:
-                    print(f"Error processing annotation: {e}")
-        elapsed_time = time.time() - start_time
-        logger.info(f"Completed cropping dataset in {elapsed_time:.2f} seconds")
-
-    def calculate_coco_stats(self) -> dict:
-
-        stats = {}
-        count_objs_per_image = defaultdict(int)
-        count_objs_per_categ = defaultdict(int)
-        scores_per_categ = defaultdict(float)
-
-        ann_width_heights = []
-        img_width_heights_dict = {}
-        for elem in self.coco.images:
-            img_width_heights_dict[elem.id] = [elem.width, elem.height]
-
-        for elem in self.coco.annotations:
-            count_objs_per_image[elem.image_id] += 1
-            count_objs_per_categ[elem.category_id] += 1
-            scores_per_categ[elem.category_id] += elem.score
-            ann_width_heights.append(
-                [
-                    elem.bbox[2] / img_width_heights_dict[elem.image_id][0],
-                    elem.bbox[3] / img_width_heights_dict[elem.image_id][1],
-                    elem.category_id,
-                ]
+        if self.is_columnar:
+            columns = {}
+            if recompute_area:
+                columns["areas"] = np.where(has_mask, areas, coco.areas)
+            if recompute_bbox:
+                columns["bboxes"] = np.where(has_mask[:, None], bboxes, coco.bboxes)
+            if to_rle:
+                # Annotations without mask have no polygon either.
+                num_anns = coco.num_annotations
+                columns["segmentations"] = RaggedSegmentation(
+                    np.zeros(num_anns + 1, dtype=np.int64),
+                    np.zeros(1, dtype=np.int64),
+                    np.zeros(0, dtype=np.float64),
+                    np.zeros(num_anns, dtype=bool),
+                    _object_array(rles) if has_mask.any() else None,
+                )
+            self.coco = coco.with_columns(**columns)
+        else:
+            for row in np.flatnonzero(has_mask).tolist():
+                ann = coco.annotations[row]
+                if recompute_area:
+                    ann.area = float(areas[row])
+                if recompute_bbox:
+                    ann.bbox = bboxes[row].tolist()
+                if to_rle:
+                    ann.segmentation = rles[row]
+            coco.annotations_changed()
+        logger.info(
+            f"Encoded {int(has_mask.sum())} masks in "
+            f"{time.time() - start_time:.2f} seconds"
+        )
+        return self.coco
+
+    def _mask_runs(self) -> MaskRuns:
+        coco = self.coco
+        _, ann_image_rows = self._ann_image_rows()
+        if np.any(ann_image_rows < 0):
+            raise ValueError("Masks need the size of the image of every annotation")
+        if self.is_columnar:
+            heights, widths = coco.heights, coco.widths
+            segmentations = coco.segmentations
+        else:
+            num_images = len(coco.images)
+            heights = np.fromiter(
+                (img.height for img in coco.images), np.int64, num_images
+            )
+            widths = np.fromiter(
+                (img.width for img in coco.images), np.int64, num_images
             )
+            segmentations = [ann.segmentation for ann in coco.annotations]
+        return MaskRuns.from_segmentations(
+            segmentations, heights[ann_image_rows], widths[ann_image_rows]
+        )
 
-        stats["avg_obj_per_image"] = (
-            int(sum(count_objs_per_image.values()) / len(count_objs_per_image.values()))
-            if len(count_objs_per_image.values()) > 0
-            else 0
+    def calculate_coco_stats(
+        self,
+        histogram_bins: Optional[int] = None,
+        quality: bool = False,
+        max_workers: int = 1,
+    ) -> dict:
+        columns = self._stats_columns()
+        stats = coco_stats(
+            columns["image_ids"],
+            columns["widths"],
+            columns["heights"],
+            columns["ann_image_ids"],
+            columns["ann_category_ids"],
+            columns["scores"],
+            columns["bboxes"],
+            self.coco.cat_ids_to_names,
+            histogram_bins=histogram_bins,
         )
-        stats["min_obj_per_image"] = (
-            min(count_objs_per_image.values()) if count_objs_per_image else 0
+        if quality:
+            stats["quality"] = self.calculate_quality_stats(max_workers=max_workers)
+        return stats
+
+    def calculate_quality_stats(
+        self,
+        iou_threshold: float = 0.5,
+        duplicate_iou: float = 0.95,
+        max_workers: int = 1,
+    ) -> dict:
+        columns = self._stats_columns()
+        return quality_stats(
+            columns["ann_ids"],
+            columns["image_ids"],
+            columns["widths"],
+            columns["heights"],
+            columns["ann_image_ids"],
+            columns["ann_category_ids"],
+            columns["bboxes"],
+            self.coco.cat_ids_to_names,
+            iou_threshold=iou_threshold,
+            duplicate_iou=duplicate_iou,
+            max_workers=max_workers,
         )
-        stats["max_obj_per_image"] = (
-            max(count_objs_per_image.values()) if count_objs_per_image else 0
+
+    def _stats_columns(self) -> dict:
+        coco = self.coco
+        if self.is_columnar:
+            return {
+                "ann_ids": coco.ann_ids,
+                "image_ids": coco.image_ids,
+                "widths": coco.widths,
+                "heights": coco.heights,
+                "ann_image_ids": coco.ann_image_ids,
+                "ann_category_ids": coco.ann_category_ids,
+                "scores": coco.scores,
+                "bboxes": coco.bboxes,
+            }
+        num_images, num_anns = len(coco.images), len(coco.annotations)
+        return {
+            "ann_ids": np.fromiter(
+                (ann.id for ann in coco.annotations), np.int64, num_anns
+            ),
+            "image_ids": np.fromiter(
+                (img.id for img in coco.images), np.int64, num_images
+            ),
+            "widths": np.fromiter(
+                (img.width for img in coco.images), np.float64, num_images
+            ),
+            "heights": np.fromiter(
+                (img.height for img in coco.images), np.float64, num_images
+            ),
+            "ann_image_ids": np.fromiter(
+                (ann.image_id for ann in coco.annotations), np.int64, num_anns
+            ),
+            "ann_category_ids": np.fromiter(
+                (ann.category_id for ann in coco.annotations), np.int64, num_anns
+            ),
+            "scores": np.fromiter(
+                (ann.score for ann in coco.annotations), np.float64, num_anns
+            ),
+            "bboxes": np.fromiter(
+                (ann.bbox[:4] for ann in coco.annotations),
+                np.dtype((np.float64, 4)),
+                num_anns,
+            ).reshape(num_anns, 4),
+        }
+
+    def _split(
+        self,
+        ratio: float = 0.2,
+        mode: str = "random",
+        seed: Optional[int] = None,
+        group_regex: Optional[str] = None,
+        group_field: Optional[str] = None,
+    ):
+        return self.split_many(
+            [1 - ratio, ratio],
+            mode=mode,
+            seed=seed,
+            group_regex=group_regex,
+            group_field=group_field,
         )
 
-        stats["class_scores"] = {
-            cat_id: (
-                scores_per_categ[cat_id] / count_objs_per_categ[cat_id]
-                if count_objs_per_categ[cat_id] > 0
-                else 0
+    def _image_folds(
+        self,
+        ratios: Sequence[float],
+        mode: str = "random",
+        seed: Optional[int] = None,
+        group_regex: Optional[str] = None,
+        group_field: Optional[str] = None,
+    ) -> np.ndarray:
+        """Fold of every image row, fold i holding about ratios[i] of the images.
+
+        `random` and `hash` folds have exact / expected sizes; `strat` balances
+        the categories of each fold with iterative stratification. Grouped
+        splits assign folds to groups, then give each image its group's fold.
+        """
+        if min(ratios) < 0 or abs(sum(ratios) - 1) > 1e-6:
+            raise ValueError(f"Split ratios must be positive and sum to 1: {ratios}")
+        if group_regex is not None and group_field is not None:
+            raise ValueError("Use either group_regex or group_field, not both")
+        if group_regex is None and group_field is None:
+            return self._sample_folds(ratios, mode, seed)
+
+        group_keys, image_groups = np.unique(
+            self._image_group_keys(group_regex, group_field), return_inverse=True
+        )
+        group_folds = self._sample_folds(
+            ratios, mode, seed, group_keys=group_keys, image_groups=image_groups
+        )
+        return group_folds[image_groups]
+
+    def _image_group_keys(
+        self, group_regex: Optional[str], group_field: Optional[str]
+    ) -> np.ndarray:
+        """Group key of every image row, images without a key are their own group."""
+        coco = self.coco
+        file_names = (
+            coco.file_names.tolist()
+            if self.is_columnar
+            else [image.file_name for image in coco.images]
+        )
+        if group_regex is not None:
+            keys = regex_groups(file_names, group_regex)
+        else:
+            values = (
+                [record.get(group_field) for record in coco.iter_records("images")]
+                if self.is_columnar
+                else [getattr(image, group_field, None) for image in coco.images]
             )
-            for cat_id in scores_per_categ
-        }
-        stats["count_objs_per_categ"] = count_objs_per_categ
-        stats["categories"] = [
-            self.coco.cat_ids_to_names[cat_id] for cat_id in count_objs_per_categ.keys()
-        ]
-        stats["ann_width_heights"] = ann_width_heights
-        stats["img_width_heights"] = img_width_heights_dict
-        return stats
+            keys = [
+                name if value is None else str(value)
+                for name, value in zip(file_names, values)
+            ]
+        return np.asarray(keys, dtype=object)
 
-    def _split(self, ratio: float = 0.2, mode: str = "random"):
+    def _sample_folds(
+        self,
+        ratios: Sequence[float],
+        mode: str,
+        seed: Optional[int],
+        group_keys: Optional[np.ndarray] = None,
+        image_groups: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Fold of every image row, or of every group when groups are given."""
+        coco = self.coco
         if mode == "random":
-            return self._random_split(ratio=ratio)
+            if image_groups is not None:
+                group_sizes = np.bincount(image_groups, minlength=len(group_keys))
+                return random_group_folds(group_sizes, ratios, seed)
+            num_images = coco.num_images if self.is_columnar else len(coco.images)
+            return random_folds(num_images, ratios, seed)
+        elif mode == "hash":
+            # Adding images never moves the others between folds.
+            if group_keys is not None:
+                return hash_folds(group_keys.tolist(), ratios, seed)
+            file_names = (
+                coco.file_names
+                if self.is_columnar
+                else [image.file_name for image in coco.images]
+            )
+            return hash_folds(file_names, ratios, seed)
         elif mode == "strat":
-            return self._stratified_split(ratio=ratio)
+            ann_category_ids = (
+                coco.ann_category_ids
+                if self.is_columnar
+                else np.fromiter(
+                    (ann.category_id for ann in coco.annotations),
+                    np.int64,
+                    len(coco.annotations),
+                )
+            )
+            image_ids, ann_image_rows = self._ann_image_rows()
+            matched = ann_image_rows >= 0
+            ann_image_rows = ann_image_rows[matched]
+            ann_category_ids = ann_category_ids[matched]
+            sample_rows, num_samples = ann_image_rows, len(image_ids)
+            if image_groups is not None:
+                # Stratify groups on the union of the labels of their images.
+                sample_rows, num_samples = image_groups[ann_image_rows], len(group_keys)
+            indptr, indices, _ = label_matrix(
+                sample_rows, ann_category_ids, num_samples
+            )
+            return iterative_stratification(indptr, indices, ratios, seed)
         else:
             raise NotImplementedError
 
-    def _random_split(self, ratio: float = 0.2):
-        images_A, images_B = random_split(self.coco.images, split_ratio=ratio)
-        images_A_ids = {elem.id for elem in images_A}
-        images_B_ids = {elem.id for elem in images_B}
-
-        # Separate annotations based on image ids
-        annotations_A, annotations_B = [], []
-        for elem in self.coco.annotations:
-            if elem.image_id in images_A_ids:
-                annotations_A.append(elem)
-            elif elem.image_id in images_B_ids:
-                annotations_B.append(elem)
-        return (
-            COCO(
-                images=images_A,
-                annotations=annotations_A,
-                categories=self.coco.categories,
-            ),
+    def _ann_image_rows(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Image ids and the image row of every annotation, -1 for orphans."""
+        coco = self.coco
+        if self.is_columnar:
+            image_ids, ann_image_ids = coco.image_ids, coco.ann_image_ids
+        else:
+            image_ids = np.fromiter(
+                (img.id for img in coco.images), np.int64, len(coco.images)
+            )
+            ann_image_ids = np.fromiter(
+                (ann.image_id for ann in coco.annotations),
+                np.int64,
+                len(coco.annotations),
+            )
+        return image_ids, annotation_image_rows(image_ids, ann_image_ids)
+
+    def _split_by_image_folds(self, folds: np.ndarray, num_folds: int = 2):
+        """One dataset per fold, `folds` holding the fold of every image row."""
+        coco = self.coco
+        if self.is_columnar:
+            return tuple(
+                coco.select_images(np.flatnonzero(folds == fold))
+                for fold in range(num_folds)
+            )
+
+        _, ann_image_rows = self._ann_image_rows()
+        # Orphan annotations get no fold and are dropped, like the columnar path.
+        ann_folds = np.where(ann_image_rows >= 0, folds[ann_image_rows], -1)
+        return tuple(
             COCO(
-                images=images_B,
-                annotations=annotations_B,
-                categories=self.coco.categories,
-            ),
+                images=list(compress(coco.images, (folds == fold).tolist())),
+                annotations=list(
+                    compress(coco.annotations, (ann_folds == fold).tolist())
+                ),
+                categories=coco.categories,
+            )
+            for fold in range(num_folds)
         )
 
-    def _stratified_split(self, ratio):
-        images_to_categories = defaultdict(list)
-        for ann in self.coco.annotations:
-            images_to_categories[ann.image_id].append(ann.category_id)
-        train_ids, test_ids = mlt_stratified_split(images_to_categories, ratio=ratio)
-        annotations_A = []
-        annotations_B = []
-        for ann in self.coco.annotations:
-            if ann.image_id in train_ids:
-                annotations_A.append(ann)
-            else:
-                annotations_B.append(ann)
-        images_A = [elem for elem in self.coco.images if elem.id in train_ids]
-        images_B = [elem for elem in self.coco.images if elem.id in test_ids]
-        return (
-            COCO(
-                images=images_A,
-                annotations=annotations_A,
-                categories=self.coco.categories,
-            ),
-            COCO(
-                images=images_B,
-                annotations=annotations_B,
-                categories=self.coco.categories,
-            ),
+    @staticmethod
+    def merge(
+        input_files: List[str],
+        max_workers: int = 1,
+        columnar: bool = True,
+        validate: str = "full",
+    ) -> Union[COCO, ColumnarCOCO]:
+        """Merge coco files, each validated like `COCO.from_json_file`.
+
+        The merged dataset stays columnar, `columnar=False` builds `COCO` models.
+        """
+        if any(not check_is_json(file) for file in input_files):
+            raise ValueError("One or more inputs have incorrect format")
+        check_validate_mode(validate)
+
+        start_time = time.time()
+        load = partial(ColumnarCOCO.from_json_file, validate=validate)
+        if max_workers > 1 and len(input_files) > 1:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                stores = list(executor.map(load, input_files))
+        else:
+            stores = list(map(load, input_files))
+        parse_time = time.time()
+        logger.info(
+            f"Parsed {len(input_files)} coco files in {parse_time - start_time:.2f} seconds"
         )
 
-    def _crop_and_save_one_ann(
-        self, image: Image.Image, ann: Annotation, output_dir: Path
-    ):
+        coco_merged = ColumnarCOCO.concat(stores)
+        remap_time = time.time()
+        logger.info(
+            f"Merged {coco_merged.num_images} images and "
+            f"{coco_merged.num_annotations} annotations in "
+            f"{remap_time - parse_time:.2f} seconds"
+        )
+        if columnar:
+            return coco_merged
 
-        x1, y1, w, h = ann.bbox
-        x2, y2 = x1 + w, y1 + h
-        category_name = self.coco.cat_ids_to_names[ann.category_id]
-        category_dir = Path(output_dir) / category_name
-        category_dir.mkdir(exist_ok=True, parents=True)
-        crop_out_file = category_dir / f"{ann.id}.jpg"
-        crop = image.crop((x1, y1, x2, y2))
-        crop.save(crop_out_file)
-
-    def _crop_one_image(self, elem: Image, images_dir: Path, output_dir: Path):
-        file_image = Path(images_dir) / elem.file_name
-        annotations = self.coco.get_annotation_by_image_id(elem.id)
-        if len(annotations) == 0:  # if no annotations, skip
-            return
-        image = Image.open(file_image).convert("RGB")
-        for ann in annotations:
-            self._crop_and_save_one_ann(image, ann, output_dir)
+        coco_merged = coco_merged.to_coco()
+        logger.info(f"Built COCO models in {time.time() - remap_time:.2f} seconds")
+        return coco_merged
 
     @staticmethod
-    def merge(input_files: List[str]) -> COCO:
+    def merge_streaming(
+        input_files: List[str],
+        output_file: str,
+        compact: bool = False,
+        compression: Optional[str] = None,
+    ) -> StreamingMerge:
+        """Merge shards straight into `output_file` with bounded memory."""
         if any(not check_is_json(file) for file in input_files):
             raise ValueError("One or more inputs have incorrect format")
-        coco_base = COCO.from_json_file(input_files[0])
-        for coco_file in input_files[1:]:
-            coco = COCO.from_json_file(coco_file)
-            coco_base.extend(coco)
-        return coco_base
+        start_time = time.time()
+        merger = StreamingMerge(input_files)
+        merger.write(output_file, compact=compact, compression=compression)
+        logger.info(
+            f"Streamed {merger.num_images} images and {merger.num_annotations} "
+            f"annotations from {len(input_files)} files in "
+            f"{time.time() - start_time:.2f} seconds"
+        )
+        return merger
+
+    @staticmethod
+    def stream_stats(
+        input_path: Union[str, Path],
+        histogram_bins: int = 50,
+        max_workers: int = 1,
+    ) -> dict:
+        """Stats of a coco file or a directory of shards, without loading them."""
+        input_files = list_coco_files(input_path)
+        if not input_files or any(not file.is_file() for file in input_files):
+            raise ValueError(f"No coco file found at {input_path}")
+        start_time = time.time()
+        stats = stream_stats(
+            input_files, histogram_bins=histogram_bins, max_workers=max_workers
+        )
+        logger.info(
+            f"Computed stats of {len(input_files)} files in "
+            f"{time.time() - start_time:.2f} seconds"
+        )
+        return stats
 
     @classmethod
-    def from_dict(cls, coco_dict: dict) -> "CocoOps":
-        coco = COCO.from_dict(coco_dict)
-        return CocoOps(coco)
+    def from_dict(
+        cls,
+        coco_dict: dict,
+        columnar: bool = False,
+        validate: str = "full",
+        slots: bool = False,
+    ) -> "CocoOps":
+        if columnar:
+            return CocoOps(ColumnarCOCO.from_dict(coco_dict))
+        return CocoOps(COCO.from_dict(coco_dict, validate=validate, slots=slots))
 
     @classmethod
-    def from_json_file(cls, file: str) -> "CocoOps":
-        coco = COCO.from_json_file(file)
-        return CocoOps(coco)
+    def from_json_file(
+        cls,
+        file: str,
+        columnar: bool = False,
+        cache: Union[bool, DatasetCache] = False,
+        validate: str = "full",
+        slots: bool = False,
+    ) -> "CocoOps":
+        """Load a coco file as `COCO`, or as a `ColumnarCOCO` store.
+
+        `validate` applies to every path. With `cache`, a miss validates the
+        file before storing it, and an entry validated less strictly than
+        requested is validated again, see `DatasetCache.load`.
+        """
+        if cache:
+            cache = cache if isinstance(cache, DatasetCache) else DatasetCache()
+            coco = cache.load(file, validate=validate)
+            return CocoOps(coco if columnar else coco.to_coco(slots=slots))
+        if columnar:
+            return CocoOps(ColumnarCOCO.from_json_file(file, validate=validate))
+        return CocoOps(COCO.from_json_file(file, validate=validate, slots=slots))
@@ -0,0 +1,663 @@
+import io
+import json
+import math
+import tarfile
+import time
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+)
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import numpy as np
+from PIL import Image
+from pydantic import BaseModel, Field
+
+from cocomltools.logger import logger
+from cocomltools.segmentation import rle_to_mask, segmentation_to_mask
+
+CROP_BACKENDS = ("thread", "process")
+# output_format -> (PIL format, file extension)
+OUTPUT_FORMATS = {
+    "jpeg": ("JPEG", ".jpg"),
+    "png": ("PNG", ".png"),
+    "webp": ("WEBP", ".webp"),
+}
+
+OUTPUT_MODES = ("files", "tar", "array")
+MASK_MODES = ("zero", "alpha")
+MANIFEST_FILE = "crop_manifest.jsonl"
+ARRAY_FILES = ("crops.npy", "labels.npy", "ann_ids.npy")
+
+Box = Tuple[float, float, float, float]
+# (ann_id, category_id, category_name, bbox)
+CropAnn = Tuple[int, int, str, Box]
+# (ann_id, category_id, category_name, encoded crop or raw uint8 HxWx3 pixels)
+EncodedCrop = Tuple[int, int, str, bytes]
+
+
+class CropTask(BaseModel):
+    image_id: int
+    file_name: str
+    anns: List[CropAnn]
+    # Segmentation of each ann, only sent for masked crops.
+    segmentations: Optional[List[Any]] = None
+
+
+class CropResult(BaseModel):
+    image_id: int
+    file_name: str = ""
+    ann_ids: List[int] = Field(default_factory=list)
+    num_crops: int = 0
+    num_bytes: int = 0
+    error: Optional[str] = None
+    error_type: Optional[str] = None
+    # Only filled for packed outputs, which are written by the parent process.
+    crops: List[EncodedCrop] = Field(default_factory=list)
+
+
+class CropOptions(BaseModel):
+    backend: str = Field(default="thread")
+    chunk_size: int = Field(default=16)
+    progress_interval: float = Field(default=10.0)
+    # Crops are downscaled to fit max_side, or resized to output_size (w, h).
+    max_side: Optional[int] = Field(default=None)
+    output_size: Optional[Tuple[int, int]] = Field(default=None)
+    output_format: str = Field(default="jpeg")
+    quality: int = Field(default=75)
+    # Context padding on each side, in percent of the bbox width / height.
+    padding_pct: float = Field(default=0.0)
+    square: bool = Field(default=False)
+    clamp: bool = Field(default=False)
+    # "files" writes one file per crop, "tar" packs crops in WebDataset shards,
+    # "array" fills uint8 memmaps, which needs a fixed output_size.
+    output_mode: str = Field(default="files")
+    shard_size: int = Field(default=10000)
+    shard_max_bytes: Optional[int] = Field(default=None)
+    # Skip the images a previous run recorded as done in the crop manifest.
+    resume: bool = Field(default=True)
+    # "zero" blacks out the pixels outside the instance mask, "alpha" writes
+    # the mask as alpha channel (png / webp). Anns without mask are unmasked.
+    mask: Optional[str] = Field(default=None)
+
+    @property
+    def extension(self) -> str:
+        return OUTPUT_FORMATS[self.output_format][1]
+
+
+def _crop_box(bbox: Box, image_size: Tuple[int, int], options: CropOptions) -> Box:
+    """Turn a coco bbox into the (x1, y1, x2, y2) region to crop."""
+    x, y, w, h = bbox
+    pad_w = w * options.padding_pct / 100
+    pad_h = h * options.padding_pct / 100
+    x1, y1, x2, y2 = x - pad_w, y - pad_h, x + w + pad_w, y + h + pad_h
+    if options.square:
+        half_side = max(x2 - x1, y2 - y1) / 2
+        center_x, center_y = (x1 + x2) / 2, (y1 + y2) / 2
+        x1, x2 = center_x - half_side, center_x + half_side
+        y1, y2 = center_y - half_side, center_y + half_side
+    if options.clamp:
+        width, height = image_size
+        x1, y1, x2, y2 = max(x1, 0), max(y1, 0), min(x2, width), min(y2, height)
+    return x1, y1, x2, y2
+
+
+def _draft_reduction(boxes: List[Box], options: CropOptions) -> float:
+    """Largest downscale of the source that keeps every crop above its target."""
+    reduction = float("inf")
+    for x1, y1, x2, y2 in boxes:
+        w, h = x2 - x1, y2 - y1
+        if options.output_size is not None:
+            target_w, target_h = options.output_size
+            reduction = min(reduction, w / target_w, h / target_h)
+        else:
+            reduction = min(reduction, max(w, h) / options.max_side)
+    return reduction
+
+
+def _open_for_crop(file_image: Path, anns: List[CropAnn], options: CropOptions):
+    """Open an image, letting JPEG decode at reduced DCT scale when possible.
+
+    Returns the image, the crop boxes in coco coordinates and the scale to
+    apply to them.
+    """
+    image = Image.open(file_image)
+    boxes = [_crop_box(bbox, image.size, options) for _, _, _, bbox in anns]
+    if image.format != "JPEG" or (
+        options.max_side is None and options.output_size is None
+    ):
+        return image, boxes, 1.0
+    reduction = _draft_reduction(boxes, options)
+    if reduction < 2:
+        return image, boxes, 1.0
+    width, height = image.size
+    image.draft("RGB", (math.ceil(width / reduction), math.ceil(height / reduction)))
+    return image, boxes, image.size[0] / width
+
+
+def _crop_mask(
+    segmentation, box: Box, scale: float, size: Tuple[int, int]
+) -> Image.Image:
+    """8-bit mask of `segmentation` over a crop of `size` taken at `box * scale`."""
+    if isinstance(segmentation, dict):
+        mask = Image.fromarray(rle_to_mask(segmentation) * 255)
+        return mask.crop(box).resize(size, Image.Resampling.NEAREST)
+    # Polygons are rasterized straight in crop pixels; PIL rounds crop boxes.
+    left, top = round(box[0] * scale), round(box[1] * scale)
+    polygons = segmentation if isinstance(segmentation[0], list) else [segmentation]
+    polygons = [
+        (np.asarray(polygon, dtype=np.float64).reshape(-1, 2) * scale - (left, top))
+        .ravel()
+        .tolist()
+        for polygon in polygons
+    ]
+    width, height = size
+    return Image.fromarray(segmentation_to_mask(polygons, height, width) * 255)
+
+
+def _apply_mask(crop: Image.Image, mask: Image.Image, options: CropOptions):
+    crop = crop.convert("RGB")
+    if options.mask == "alpha":
+        crop.putalpha(mask)
+        return crop
+    return Image.composite(crop, Image.new("RGB", crop.size), mask)
+
+
+def _resize_crop(crop: Image.Image, options: CropOptions) -> Image.Image:
+    if options.output_size is not None:
+        return crop.resize(options.output_size, Image.Resampling.BILINEAR)
+    if options.max_side is not None and max(crop.size) > options.max_side:
+        crop = crop.copy()
+        crop.thumbnail((options.max_side, options.max_side), Image.Resampling.BILINEAR)
+    return crop
+
+
+def _encode_crop(crop: Image.Image, options: CropOptions) -> bytes:
+    mode = "RGBA" if options.mask == "alpha" else "RGB"
+    if crop.mode != mode:
+        crop = crop.convert(mode)
+    if options.output_mode == "array":
+        return np.asarray(crop, dtype=np.uint8).tobytes()
+    buffer = io.BytesIO()
+    pil_format = OUTPUT_FORMATS[options.output_format][0]
+    if pil_format == "PNG":
+        crop.save(buffer, format=pil_format)
+    else:
+        crop.save(buffer, format=pil_format, quality=options.quality)
+    return buffer.getvalue()
+
+
+def _crop_image(
+    task: CropTask, images_dir: Path, output_dir: Path, options: CropOptions
+) -> CropResult:
+    result = CropResult(
+        image_id=task.image_id,
+        file_name=task.file_name,
+        ann_ids=[ann_id for ann_id, _, _, _ in task.anns],
+    )
+    try:
+        image, boxes, scale = _open_for_crop(
+            images_dir / task.file_name, task.anns, options
+        )
+        segmentations = task.segmentations if options.mask else None
+        with image:
+            for index, ((ann_id, category_id, category_name, _), box) in enumerate(
+                zip(task.anns, boxes)
+            ):
+                crop = image.crop(tuple(coord * scale for coord in box))
+                if segmentations is not None and segmentations[index]:
+                    mask = _crop_mask(segmentations[index], box, scale, crop.size)
+                    crop = _apply_mask(crop, mask, options)
+                # Only the crop is converted, never the full source image.
+                data = _encode_crop(_resize_crop(crop, options), options)
+                if options.output_mode == "files":
+                    crop_out_file = (
+                        output_dir / category_name / f"{ann_id}{options.extension}"
+                    )
+                    crop_out_file.write_bytes(data)
+                else:
+                    result.crops.append((ann_id, category_id, category_name, data))
+                result.num_crops += 1
+                result.num_bytes += len(data)
+    except Exception as e:
+        result.error = str(e)
+        result.error_type = type(e).__name__
+    return result
+
+
+def _crop_chunk(
+    tasks: List[CropTask], images_dir: Path, output_dir: Path, options: CropOptions
+) -> List[CropResult]:
+    return [_crop_image(task, images_dir, output_dir, options) for task in tasks]
+
+
+def _chunked(tasks: Iterable[CropTask], size: int) -> Iterable[List[CropTask]]:
+    chunk = []
+    for task in tasks:
+        chunk.append(task)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class CropManifest:
+    """Append-only JSONL record of crop results, keyed by image id.
+
+    Each line holds the status of one image (`done` or `failed`, with the
+    error type and message). When an image appears several times the last
+    line wins, so a rerun can skip finished images and retry failed ones.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.entries: Dict[int, dict] = {}
+        if self.path.exists():
+            with open(self.path, "r") as f:
+                for line in f:
+                    # A run killed mid-write can leave a truncated last line.
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self.entries[entry["image_id"]] = entry
+
+    @property
+    def done_image_ids(self) -> Set[int]:
+        return {
+            image_id
+            for image_id, entry in self.entries.items()
+            if entry["status"] == "done"
+        }
+
+    def pending_tasks(self, tasks: List[CropTask]) -> List[CropTask]:
+        """Tasks of the images not done yet.
+
+        A done image is only skipped when its file name and annotation ids
+        match the task, a mismatch means the output dir holds another dataset.
+        """
+        pending = []
+        for task in tasks:
+            entry = self.entries.get(task.image_id)
+            if entry is None or entry["status"] != "done":
+                pending.append(task)
+                continue
+            ann_ids = [ann_id for ann_id, _, _, _ in task.anns]
+            if entry["file_name"] != task.file_name or (
+                entry.get("ann_ids", ann_ids) != ann_ids
+            ):
+                raise ValueError(
+                    f"{self.path} records image {task.image_id} of another dataset "
+                    f"({entry['file_name']}), crop into another directory or "
+                    "without resuming"
+                )
+        return pending
+
+    @property
+    def errors(self) -> List[dict]:
+        return [entry for entry in self.entries.values() if entry["status"] == "failed"]
+
+    def reset(self):
+        self.entries = {}
+        self.path.write_text("")
+
+    def record(self, results: List[CropResult], shard: Optional[str] = None):
+        if not results:
+            return
+        lines = []
+        for result in results:
+            entry = {
+                "image_id": result.image_id,
+                "file_name": result.file_name,
+                "ann_ids": result.ann_ids,
+                "status": "failed" if result.error else "done",
+                "num_crops": result.num_crops,
+            }
+            if result.error:
+                entry["error_type"] = result.error_type
+                entry["error"] = result.error
+            elif shard is not None:
+                entry["shard"] = shard
+            self.entries[result.image_id] = entry
+            lines.append(json.dumps(entry) + "\n")
+        with open(self.path, "a") as f:
+            f.writelines(lines)
+
+
+class TarShardWriter:
+    """Writes samples into sequentially numbered WebDataset style tar shards.
+
+    A sample is a set of `{key}.{ext}` members stored contiguously. Shards are
+    rolled over between groups of samples (the crops of one image) once they
+    hold `shard_size` samples or `shard_max_bytes` bytes. A shard is written
+    under a temporary name and renamed when closed, and numbering continues
+    after the shards already in `output_dir`, so resumed runs append, as
+    long as the `ann_ids` of the dataset match the ones the shards were
+    written for. Without `resume` the existing shards are removed.
+    """
+
+    def __init__(
+        self,
+        output_dir: Path,
+        shard_size: int = 10000,
+        shard_max_bytes: Optional[int] = None,
+        prefix: str = "crops",
+        resume: bool = True,
+        ann_ids: Optional[List[int]] = None,
+    ):
+        self.output_dir = Path(output_dir)
+        self.shard_size = shard_size
+        self.shard_max_bytes = shard_max_bytes
+        self.prefix = prefix
+        for partial_file in self.output_dir.glob(f"{prefix}-*.tar.tmp"):
+            partial_file.unlink()
+        if not resume:
+            for shard_file in self.output_dir.glob(f"{prefix}-*.tar"):
+                shard_file.unlink()
+        self.shard_index = max(
+            (
+                int(shard_file.name[len(prefix) + 1 : -len(".tar")])
+                for shard_file in self.output_dir.glob(f"{prefix}-*.tar")
+            ),
+            default=-1,
+        )
+        if ann_ids is not None:
+            ann_ids_file = self.output_dir / ARRAY_FILES[2]
+            if self.shard_index >= 0 and ann_ids_file.exists():
+                if np.load(ann_ids_file).tolist() != ann_ids:
+                    raise ValueError(
+                        f"Crop shards in {output_dir} do not match this dataset, "
+                        "crop again without resuming"
+                    )
+            else:
+                np.save(ann_ids_file, np.asarray(ann_ids, dtype=np.int64))
+        self.tar: Optional[tarfile.TarFile] = None
+        self.shard_samples = 0
+        self.shard_bytes = 0
+
+    @property
+    def shard_name(self) -> str:
+        return f"{self.prefix}-{self.shard_index:06d}.tar"
+
+    def _is_full(self) -> bool:
+        return self.shard_samples >= self.shard_size or (
+            self.shard_max_bytes is not None
+            and self.shard_bytes >= self.shard_max_bytes
+        )
+
+    def write(self, samples: List[Tuple[str, Dict[str, bytes]]]) -> Optional[str]:
+        """Write a group of samples, returning the name of a shard it completed."""
+        closed_shard = None
+        if self.tar is not None and self._is_full():
+            closed_shard = self.close()
+        if self.tar is None:
+            self.shard_index += 1
+            self.tar = tarfile.open(self.output_dir / f"{self.shard_name}.tmp", "w")
+            self.shard_samples = 0
+            self.shard_bytes = 0
+        for key, members in samples:
+            for extension, data in members.items():
+                info = tarfile.TarInfo(f"{key}.{extension}")
+                info.size = len(data)
+                self.tar.addfile(info, io.BytesIO(data))
+                self.shard_bytes += len(data)
+            self.shard_samples += 1
+        return closed_shard
+
+    def close(self) -> Optional[str]:
+        if self.tar is None:
+            return None
+        self.tar.close()
+        self.tar = None
+        shard_file = self.output_dir / self.shard_name
+        Path(f"{shard_file}.tmp").rename(shard_file)
+        return self.shard_name
+
+
+class ArrayWriter:
+    """Writes fixed size crops into uint8 memmaps.
+
+    `crops.npy` holds an N x H x W x 3 array with one row per annotation in
+    task order, next to `ann_ids.npy` and `labels.npy` (category ids, -1 for
+    rows not cropped yet). Rows are fixed per annotation so a resumed run
+    fills the missing ones. The memmaps are flushed every `flush_size` crops.
+    """
+
+    def __init__(
+        self,
+        output_dir: Path,
+        ann_ids: List[int],
+        output_size: Tuple[int, int],
+        flush_size: int = 10000,
+        resume: bool = True,
+    ):
+        crops_file, labels_file, ann_ids_file = (
+            Path(output_dir) / file_name for file_name in ARRAY_FILES
+        )
+        width, height = output_size
+        shape = (len(ann_ids), height, width, 3)
+        if resume and crops_file.exists():
+            self.crops = np.load(crops_file, mmap_mode="r+")
+            self.labels = np.load(labels_file, mmap_mode="r+")
+            if self.crops.shape != shape or np.load(ann_ids_file).tolist() != ann_ids:
+                raise ValueError(
+                    f"Crop arrays in {output_dir} do not match this dataset, "
+                    "crop again without resuming"
+                )
+        else:
+            self.crops = np.lib.format.open_memmap(
+                crops_file, mode="w+", dtype=np.uint8, shape=shape
+            )
+            self.labels = np.lib.format.open_memmap(
+                labels_file, mode="w+", dtype=np.int64, shape=(len(ann_ids),)
+            )
+            self.labels[:] = -1
+            np.save(ann_ids_file, np.asarray(ann_ids, dtype=np.int64))
+        self.rows = {ann_id: row for row, ann_id in enumerate(ann_ids)}
+        self.flush_size = flush_size
+        self.num_unflushed = 0
+
+    def write(self, crops: List[EncodedCrop]) -> Optional[str]:
+        """Write the crops of one image, returning the file name if it flushed."""
+        flushed = None
+        if self.num_unflushed >= self.flush_size:
+            flushed = self.close()
+        for ann_id, category_id, _, data in crops:
+            row = self.rows[ann_id]
+            self.crops[row] = np.frombuffer(data, dtype=np.uint8).reshape(
+                self.crops.shape[1:]
+            )
+            self.labels[row] = category_id
+        self.num_unflushed += len(crops)
+        return flushed
+
+    def close(self) -> Optional[str]:
+        self.crops.flush()
+        self.labels.flush()
+        self.num_unflushed = 0
+        return ARRAY_FILES[0]
+
+
+class CropEngine:
+    """Crops annotations out of their source images, one task per image.
+
+    Each image is decoded once and all its crops are written from it. Tasks
+    are sent to workers in chunks of images; the process backend sidesteps
+    the GIL for decode/encode heavy workloads. Workers only receive plain
+    task data, so any multiprocessing start method works.
+
+    Results are appended to a crop manifest in `output_dir`. An image is only
+    recorded as done once its crops are on disk (for tar and array outputs,
+    once its shard is closed or the memmaps are flushed), and a rerun skips
+    done images and retries failed ones.
+    """
+
+    def __init__(self, images_dir: Path, output_dir: Path, options: CropOptions):
+        if options.backend not in CROP_BACKENDS:
+            raise ValueError(
+                f"Unknown crop backend '{options.backend}', use one of {CROP_BACKENDS}"
+            )
+        if options.output_mode not in OUTPUT_MODES:
+            raise ValueError(
+                f"Unknown output mode '{options.output_mode}', use one of {OUTPUT_MODES}"
+            )
+        if options.output_format not in OUTPUT_FORMATS:
+            raise ValueError(
+                f"Unknown output format '{options.output_format}', "
+                f"use one of {list(OUTPUT_FORMATS)}"
+            )
+        if options.output_mode == "array" and options.output_size is None:
+            raise ValueError("Array output needs a fixed output_size")
+        if options.mask is not None and options.mask not in MASK_MODES:
+            raise ValueError(
+                f"Unknown mask mode '{options.mask}', use one of {MASK_MODES}"
+            )
+        if options.mask == "alpha" and (
+            options.output_format == "jpeg" or options.output_mode == "array"
+        ):
+            raise ValueError("Alpha masks need png / webp files or tar output")
+        self.images_dir = Path(images_dir)
+        self.output_dir = Path(output_dir)
+        self.options = options
+        self.num_images = 0
+        self.num_crops = 0
+        self.num_bytes = 0
+        self.num_skipped = 0
+        self.errors: List[CropResult] = []
+        self.writer: Optional[Union[TarShardWriter, ArrayWriter]] = None
+        self.manifest: Optional[CropManifest] = None
+        # Done packed results wait here until their crops are flushed.
+        self.pending: List[CropResult] = []
+
+    def _executor(self, max_workers: int) -> Executor:
+        if self.options.backend == "process":
+            return ProcessPoolExecutor(max_workers=max_workers)
+        return ThreadPoolExecutor(max_workers=max_workers)
+
+    def prepare_output(self, tasks: List[CropTask]):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest = CropManifest(self.output_dir / MANIFEST_FILE)
+        if not self.options.resume:
+            self.manifest.reset()
+        categories = {
+            category_id: category_name
+            for task in tasks
+            for _, category_id, category_name, _ in task.anns
+        }
+        if self.options.output_mode == "files":
+            for category_name in set(categories.values()):
+                (self.output_dir / category_name).mkdir(parents=True, exist_ok=True)
+        else:
+            (self.output_dir / "categories.json").write_text(
+                json.dumps({str(cat_id): name for cat_id, name in categories.items()})
+            )
+        ann_ids = [ann_id for task in tasks for ann_id, _, _, _ in task.anns]
+        if self.options.output_mode == "tar":
+            self.writer = TarShardWriter(
+                self.output_dir,
+                shard_size=self.options.shard_size,
+                shard_max_bytes=self.options.shard_max_bytes,
+                resume=self.options.resume,
+                ann_ids=ann_ids,
+            )
+        elif self.options.output_mode == "array":
+            self.writer = ArrayWriter(
+                self.output_dir,
+                ann_ids,
+                self.options.output_size,
+                flush_size=self.options.shard_size,
+                resume=self.options.resume,
+            )
+
+    def run(self, tasks: List[CropTask], max_workers: int = 1):
+        self.prepare_output(tasks)
+        num_tasks = len(tasks)
+        tasks = self.manifest.pending_tasks(tasks)
+        self.num_skipped = num_tasks - len(tasks)
+        if self.num_skipped:
+            logger.info(f"Skipping {self.num_skipped} images already cropped")
+        start_time = time.time()
+        last_report = start_time
+        with self._executor(max_workers) as executor:
+            futures = [
+                executor.submit(
+                    _crop_chunk,
+                    chunk,
+                    self.images_dir,
+                    self.output_dir,
+                    self.options,
+                )
+                for chunk in _chunked(tasks, self.options.chunk_size)
+            ]
+            for future in as_completed(futures):
+                for result in future.result():
+                    self._record(result)
+                if time.time() - last_report >= self.options.progress_interval:
+                    last_report = time.time()
+                    self._log_progress(start_time, len(tasks))
+        if self.writer is not None:
+            self.manifest.record(self.pending, self.writer.close())
+            self.pending = []
+        self._log_progress(start_time, len(tasks))
+        logger.info(
+            f"Completed cropping dataset in {time.time() - start_time:.2f} seconds"
+        )
+
+    def _record(self, result: CropResult):
+        self.num_images += 1
+        self.num_crops += result.num_crops
+        self.num_bytes += result.num_bytes
+        if result.error:
+            self.errors.append(result)
+            self.manifest.record([result])
+            logger.error(
+                f"Error cropping image {result.image_id}: "
+                f"{result.error_type}: {result.error}"
+            )
+        elif self.writer is None:
+            self.manifest.record([result])
+        else:
+            self._write_samples(result)
+
+    def _write_samples(self, result: CropResult):
+        if self.options.output_mode == "array":
+            self._flushed(result, self.writer.write(result.crops))
+            return
+        samples = [
+            (
+                str(ann_id),
+                {
+                    self.options.extension.lstrip("."): data,
+                    "cls": str(category_id).encode(),
+                    "json": json.dumps(
+                        {
+                            "ann_id": ann_id,
+                            "image_id": result.image_id,
+                            "category_id": category_id,
+                            "category": category_name,
+                        }
+                    ).encode(),
+                },
+            )
+            for ann_id, category_id, category_name, data in result.crops
+        ]
+        self._flushed(result, self.writer.write(samples))
+
+    def _flushed(self, result: CropResult, flushed_shard: Optional[str]):
+        if flushed_shard is not None:
+            self.manifest.record(self.pending, flushed_shard)
+            self.pending = []
+        # The crops are on their way to disk, no need to keep them.
+        self.pending.append(result.model_copy(update={"crops": []}))
+
+    def _log_progress(self, start_time: float, num_images: int):
+        elapsed = max(time.time() - start_time, 1e-9)
+        logger.info(
+            f"{self.num_images}/{num_images} images | {self.num_crops} crops | "
+            f"{self.num_crops / elapsed:.1f} crops/s | "
+            f"{self.num_bytes / elapsed / 1e6:.2f} MB/s"
+        )
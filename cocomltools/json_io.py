@@ -0,0 +1,302 @@
+import gzip
+import io
+import json
+import re
+from pathlib import Path
+from typing import (
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+    Union,
+)
+
+COCO_SECTIONS = ("images", "annotations", "categories")
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_STRUCTURAL = re.compile(r'["\[\]{}]')
+_STRING_TAIL = re.compile(r'(?:[^"\\]|\\.)*"', re.DOTALL)
+_DEFAULT_CHUNK_SIZE = 1 << 20
+_WRITE_BATCH_SIZE = 1024
+
+
+class JsonRecordStream:
+    """Incremental reader for a JSON object whose top-level values are arrays.
+
+    Records of the top-level arrays are decoded one at a time from a sliding
+    text buffer, so memory stays bounded by the chunk size plus the largest
+    record instead of the whole document. Arrays whose key is not in
+    `sections` are skipped by matching brackets, without decoding them.
+    """
+
+    def __init__(
+        self,
+        fp: TextIO,
+        chunk_size: int = _DEFAULT_CHUNK_SIZE,
+        sections: Optional[Sequence[str]] = None,
+    ):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.sections = None if sections is None else set(sections)
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.fp.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def _peek(self) -> str:
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, char: str):
+        found = self._peek()
+        if found != char:
+            raise ValueError(
+                f"Invalid COCO json: expected '{char}' but found '{found or 'EOF'}'"
+            )
+        self.pos += 1
+
+    def _decode_value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number ending exactly at the buffer boundary may be truncated.
+            if end == len(self.buffer) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def _skip_value(self):
+        if self._peek() not in "[{":
+            self._decode_value()
+            return
+        depth = 0
+        while True:
+            match = _STRUCTURAL.search(self.buffer, self.pos)
+            if match is None:
+                self.pos = len(self.buffer)
+                if not self._fill():
+                    raise ValueError("Invalid COCO json: unexpected EOF")
+                continue
+            char = match.group()
+            if char == '"':
+                tail = _STRING_TAIL.match(self.buffer, match.end())
+                if tail is None:
+                    # The string goes on in the next chunk.
+                    self.pos = match.start()
+                    if not self._fill():
+                        raise ValueError("Invalid COCO json: unterminated string")
+                    continue
+                self.pos = tail.end()
+                continue
+            depth += 1 if char in "[{" else -1
+            self.pos = match.end()
+            if depth == 0:
+                return
+
+    def iter_items(self) -> Iterator[Tuple[str, object]]:
+        """Yield (key, record) for every element of every top-level array."""
+        self._expect("{")
+        if self._peek() == "}":
+            return
+        while True:
+            key = self._decode_value()
+            self._expect(":")
+            if self.sections is not None and key not in self.sections:
+                self._skip_value()
+            elif self._peek() == "[":
+                self.pos += 1
+                if self._peek() == "]":
+                    self.pos += 1
+                else:
+                    while True:
+                        yield key, self._decode_value()
+                        separator = self._peek()
+                        self.pos += 1
+                        if separator == "]":
+                            break
+                        if separator != ",":
+                            raise ValueError("Invalid COCO json: malformed array")
+            else:
+                self._skip_value()
+
+            separator = self._peek()
+            self.pos += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                raise ValueError("Invalid COCO json: malformed object")
+
+
+def iter_coco_records(
+    json_path: Union[str, Path],
+    sections: Optional[Sequence[str]] = None,
+    chunk_size: int = _DEFAULT_CHUNK_SIZE,
+) -> Iterator[Tuple[str, dict]]:
+    """Stream (section, record) pairs of a COCO file in file order."""
+    sections = sections or COCO_SECTIONS
+    with open_coco_file(json_path) as f:
+        yield from JsonRecordStream(f, chunk_size, sections).iter_items()
+
+
+def iter_coco_section(
+    json_path: Union[str, Path],
+    section: str,
+    chunk_size: int = _DEFAULT_CHUNK_SIZE,
+) -> Iterator[dict]:
+    for _, record in iter_coco_records(json_path, [section], chunk_size=chunk_size):
+        yield record
+
+
+def _compression_from_suffix(path: Union[str, Path]) -> Optional[str]:
+    suffix = Path(path).suffix
+    if suffix == ".gz":
+        return "gzip"
+    if suffix == ".zst":
+        return "zstd"
+    return None
+
+
+def _import_zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd compression requires `pip install zstandard`")
+    return zstandard
+
+
+def open_coco_file(json_path: Union[str, Path]) -> TextIO:
+    """Open a COCO file for reading, transparently handling .gz / .zst."""
+    compression = _compression_from_suffix(json_path)
+    if compression == "gzip":
+        return gzip.open(json_path, "rt")
+    if compression == "zstd":
+        zstandard = _import_zstandard()
+        reader = zstandard.ZstdDecompressor().stream_reader(open(json_path, "rb"))
+        return io.TextIOWrapper(reader)
+    return open(json_path, "r")
+
+
+def read_coco_bytes(json_path: Union[str, Path]) -> bytes:
+    """Raw (decompressed) bytes of a COCO file."""
+    compression = _compression_from_suffix(json_path)
+    if compression == "gzip":
+        with gzip.open(json_path, "rb") as f:
+            return f.read()
+    if compression == "zstd":
+        zstandard = _import_zstandard()
+        with open(json_path, "rb") as f:
+            return zstandard.ZstdDecompressor().stream_reader(f).read()
+    with open(json_path, "rb") as f:
+        return f.read()
+
+
+def open_coco_output(
+    file_path: Union[str, Path], compression: Optional[str] = None
+) -> BinaryIO:
+    compression = compression or _compression_from_suffix(file_path)
+    if compression == "gzip":
+        return gzip.open(file_path, "wb", compresslevel=6)
+    if compression == "zstd":
+        zstandard = _import_zstandard()
+        return zstandard.ZstdCompressor().stream_writer(open(file_path, "wb"))
+    if compression is not None:
+        raise ValueError(f"Unsupported compression: {compression}")
+    return open(file_path, "wb")
+
+
+def get_json_encoder() -> Callable[[object], bytes]:
+    """Return the fastest available `obj -> bytes` compact JSON encoder."""
+    try:
+        import orjson
+
+        return orjson.dumps
+    except ImportError:
+        pass
+    try:
+        import msgspec
+
+        return msgspec.json.Encoder().encode
+    except ImportError:
+        pass
+    encoder = json.JSONEncoder(separators=(",", ":"))
+    return lambda obj: encoder.encode(obj).encode("utf-8")
+
+
+def _batched(records: Iterable[dict], size: int) -> Iterator[list]:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def write_coco_records(
+    fp: BinaryIO,
+    sections: Dict[str, Iterable[dict]],
+    compact: bool = False,
+):
+    """Stream COCO sections to `fp` without building the full document.
+
+    Records are consumed lazily from the given iterables. The non compact
+    layout puts one record per line, which keeps files diffable while being
+    much smaller than an indented dump.
+    """
+    encode = get_json_encoder()
+    newline = b"" if compact else b"\n"
+    separator = b"," + newline
+    fp.write(b"{")
+    for section_index, (section, records) in enumerate(sections.items()):
+        if section_index:
+            fp.write(b",")
+        fp.write(newline + encode(section) + b":[")
+        first_batch = True
+        for batch in _batched(records, _WRITE_BATCH_SIZE):
+            fp.write(separator if not first_batch else newline)
+            fp.write(separator.join(encode(record) for record in batch))
+            first_batch = False
+        fp.write(newline + b"]")
+    fp.write(newline + b"}")
+
+
+def write_coco_file(
+    file_path: Union[str, Path],
+    sections: Dict[str, Iterable[dict]],
+    compact: bool = False,
+    compression: Optional[str] = None,
+):
+    with open_coco_output(file_path, compression=compression) as fp:
+        write_coco_records(fp, sections, compact=compact)
+
+
+def dump_coco_bytes(sections: Dict[str, Iterable[dict]], compact: bool = True) -> bytes:
+    buffer = io.BytesIO()
+    write_coco_records(buffer, sections, compact=compact)
+    return buffer.getvalue()
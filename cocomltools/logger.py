@@ -1,9 +1,11 @@
 import logging
+from rich.console import Console
 from rich.logging import RichHandler
 
 logger = logging.getLogger("cocomltools")
 logger.setLevel(logging.INFO)
-rich_handler = RichHandler()
+# Logs go to stderr so that commands can print their results to stdout.
+rich_handler = RichHandler(console=Console(stderr=True))
 formatter = logging.Formatter(fmt="%(message)s", datefmt="[%X]")
 rich_handler.setFormatter(formatter)
 logger.addHandler(rich_handler)
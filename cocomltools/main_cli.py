@@ -2,6 +2,35 @@ from cocomltools.cmd import Cmd
 import argparse
 
 
+def add_output_args(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Write compact json without whitespace",
+    )
+    parser.add_argument(
+        "--compression",
+        type=str,
+        choices=["gzip", "zstd"],
+        default=None,
+        help="Compress the output coco file(s)",
+    )
+
+
+def add_cache_args(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Load the coco file from the binary cache, parsing it only once",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=None,
+        help="Cache directory - default to $COCOML_CACHE_DIR or ~/.cache/cocomltools",
+    )
+
+
 def parse_args():
     parser = argparse.ArgumentParser(
         prog="cocomltools-cli", description="COCO tools for Machine Learning"
@@ -15,14 +44,55 @@ def parse_args():
         "--output-dir", required=False, type=str, help="Path to save split coco files"
     )
     parser_split.add_argument(
-        "--ratio", type=int, default=0.2, help="Split ratio - default to 0.2"
+        "--ratio", type=float, default=0.2, help="Split ratio - default to 0.2"
     )
     parser_split.add_argument(
         "--mode",
         type=str,
         default="random",
-        help="Should one of the following: random, strat_single_obj or strat_multi_obj",
+        help="Should be one of the following: random or strat",
+    )
+    parser_split.add_argument(
+        "--ratios",
+        type=str,
+        default=None,
+        help="Comma separated ratios of an N-way split, e.g. 0.7,0.2,0.1",
+    )
+    parser_split.add_argument(
+        "--names",
+        type=str,
+        default=None,
+        help="Comma separated names of the N-way split files, e.g. train,val,test",
+    )
+    parser_split.add_argument(
+        "--group-regex",
+        type=str,
+        default=None,
+        help="Keep images whose file_name match the same regex group in one split",
+    )
+    parser_split.add_argument(
+        "--group-field",
+        type=str,
+        default=None,
+        help="Keep images with the same value of this image field in one split",
+    )
+    parser_split.add_argument(
+        "--kfold",
+        type=int,
+        default=None,
+        help="Write the train / val files of a k-fold split",
+    )
+    parser_split.add_argument(
+        "--seed", type=int, default=None, help="Seed of the random / strat split"
+    )
+    parser_split.add_argument(
+        "--hash-split",
+        action="store_true",
+        help="Split on a stable hash of image file names, so that adding images "
+        "never moves existing ones between splits",
     )
+    add_output_args(parser_split)
+    add_cache_args(parser_split)
     parser_merge = subparsers.add_parser("merge", help="Merge coco files")
     parser_merge.add_argument(
         "--coco-paths", required=True, help="Path to coco files separated by comma"
@@ -33,6 +103,26 @@ def parse_args():
         required=False,
         help="Path where to save merged coco file",
     )
+    parser_merge.add_argument(
+        "--num-workers",
+        required=False,
+        default=1,
+        type=int,
+        help="number of processes used to parse the coco files",
+    )
+    parser_merge.add_argument(
+        "--streaming",
+        action="store_true",
+        help="stream annotations to the output file, for shards larger than RAM",
+    )
+    parser_merge.add_argument(
+        "--validate",
+        type=str,
+        choices=["full", "sample", "none"],
+        default="full",
+        help="Validate all, a sample or none of the input records - default to full",
+    )
+    add_output_args(parser_merge)
     parser_crop = subparsers.add_parser(
         "crop", help="Crop images from annotations in coco file"
     )
@@ -40,6 +130,7 @@ def parse_args():
     parser_crop.add_argument(
         "--images-dir", required=True, help="Path to coco image files"
     )
+    add_cache_args(parser_crop)
     parser_crop.add_argument("--output-dir", required=False, help="Path to output dir")
     parser_crop.add_argument(
         "--num-workers",
@@ -48,7 +139,84 @@ def parse_args():
         type=int,
         help="number of workers to crop the dataset",
     )
-    args = parser.parse_args()
+    parser_crop.add_argument(
+        "--backend",
+        required=False,
+        default="thread",
+        choices=["thread", "process"],
+        help="run crop workers as threads or processes",
+    )
+    parser_crop.add_argument(
+        "--max-side",
+        required=False,
+        type=int,
+        help="downscale crops so that their longest side fits this size",
+    )
+    parser_crop.add_argument(
+        "--output-size",
+        required=False,
+        type=str,
+        help="resize crops to a fixed WIDTHxHEIGHT, e.g. 224x224",
+    )
+    parser_crop.add_argument(
+        "--format",
+        required=False,
+        default="jpeg",
+        choices=["jpeg", "png", "webp"],
+        help="output image format of the crops",
+    )
+    parser_crop.add_argument(
+        "--quality",
+        required=False,
+        default=75,
+        type=int,
+        help="jpeg / webp quality of the crops",
+    )
+    parser_crop.add_argument(
+        "--padding-pct",
+        required=False,
+        default=0.0,
+        type=float,
+        help="context padding on each side of the bbox, in percent of its size",
+    )
+    parser_crop.add_argument(
+        "--square",
+        action="store_true",
+        help="extend crop boxes to squares around the bbox center",
+    )
+    parser_crop.add_argument(
+        "--clamp",
+        action="store_true",
+        help="clamp crop boxes to the image bounds",
+    )
+    parser_crop.add_argument(
+        "--output-mode",
+        required=False,
+        default="files",
+        choices=["files", "tar", "array"],
+        help="write one file per crop, pack crops into tar shards or into "
+        "uint8 arrays (needs --output-size)",
+    )
+    parser_crop.add_argument(
+        "--shard-size",
+        required=False,
+        default=10000,
+        type=int,
+        help="number of crops per tar shard / between array flushes",
+    )
+    parser_crop.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="recrop every image instead of skipping those in the crop manifest",
+    )
+    parser_crop.add_argument(
+        "--mask",
+        required=False,
+        default=None,
+        choices=["zero", "alpha"],
+        help="zero the background outside the instance mask, or write it as "
+        "alpha channel (png / webp)",
+    )
 
     parser_filter = subparsers.add_parser("filter", help="Split coco file")
     parser_filter.add_argument(
@@ -56,13 +224,99 @@ def parse_args():
     )
     parser_filter.add_argument(
         "--categories",
-        required=True,
+        required=False,
         type=str,
         help="comma separated string of categories to filter",
     )
+    parser_filter.add_argument(
+        "--where",
+        required=False,
+        type=str,
+        help="remove annotations matching the expression, "
+        "e.g. 'category=person,score<0.3,area>1024'",
+    )
     parser_filter.add_argument(
         "--output-dir", required=False, type=str, help="Path to save split coco files"
     )
+    add_output_args(parser_filter)
+    add_cache_args(parser_filter)
+
+    parser_stats = subparsers.add_parser(
+        "stats", help="Compute dataset stats in a single streaming pass"
+    )
+    parser_stats.add_argument(
+        "--coco-path",
+        required=True,
+        type=str,
+        help="Path to coco file or to a directory of coco shards",
+    )
+    parser_stats.add_argument(
+        "--num-workers",
+        required=False,
+        default=1,
+        type=int,
+        help="number of shards read in parallel",
+    )
+    parser_stats.add_argument(
+        "--bins",
+        required=False,
+        default=50,
+        type=int,
+        help="number of bins of the relative bbox size histograms",
+    )
+    parser_stats.add_argument(
+        "--output",
+        required=False,
+        type=str,
+        help="Path to the output json, printed to stdout if not given",
+    )
+
+    parser_masks = subparsers.add_parser(
+        "masks",
+        help="Convert segmentations to compressed RLE and recompute areas from masks",
+    )
+    parser_masks.add_argument(
+        "--coco-path", required=True, type=str, help="Path to coco file"
+    )
+    parser_masks.add_argument(
+        "--output-dir", required=False, type=str, help="Path to save the coco file"
+    )
+    parser_masks.add_argument(
+        "--keep-polygons",
+        action="store_true",
+        help="only recompute areas / bboxes, keep segmentations as they are",
+    )
+    parser_masks.add_argument(
+        "--recompute-bbox",
+        action="store_true",
+        help="also replace bboxes by the pixel extent of the masks",
+    )
+    add_output_args(parser_masks)
+    add_cache_args(parser_masks)
+
+    parser_cache = subparsers.add_parser(
+        "cache", help="Inspect or clear the binary cache of parsed coco files"
+    )
+    parser_cache.add_argument(
+        "action",
+        nargs="?",
+        choices=["info", "clear", "prune"],
+        default="info",
+        help="info lists the entries, prune evicts down to --max-bytes",
+    )
+    parser_cache.add_argument(
+        "--cache-dir",
+        type=str,
+        default=None,
+        help="Cache directory - default to $COCOML_CACHE_DIR or ~/.cache/cocomltools",
+    )
+    parser_cache.add_argument(
+        "--max-bytes",
+        type=int,
+        default=None,
+        help="Cache size bound - default to $COCOML_CACHE_MAX_BYTES or 4GB",
+    )
+    args = parser.parse_args()
     return args
 
 
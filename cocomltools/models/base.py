@@ -1,8 +1,12 @@
-from pydantic import BaseModel, Field
-from typing import List, Union
+from functools import lru_cache
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Callable, Dict, List, Union
 
 
 class Image(BaseModel):
+    # Extra fields (video_id, site, ...) are kept and written back.
+    model_config = ConfigDict(extra="allow")
+
     id: int = Field(default=0)
     file_name: str
     width: int
@@ -10,16 +14,72 @@ class Image(BaseModel):
 
 
 class Annotation(BaseModel):
+    # Like images, extra fields (attributes, ...) are kept and written back.
+    model_config = ConfigDict(extra="allow")
+
     id: int = Field(default=0)
     image_id: int
     category_id: int
     score: float = Field(default=1.0)
     bbox: List[float]
-    segmentation: Union[List[float], List[List[float]]] = Field(default=[])
+    # Polygons, or an RLE dict with "size" and (compressed) "counts".
+    segmentation: Union[List[float], List[List[float]], Dict] = Field(default=[])
     area: float
     iscrowd: int = Field(default=0)
 
 
 class Category(BaseModel):
+    # Extra fields (supercategory, ...) are kept and written back.
+    model_config = ConfigDict(extra="allow")
+
     id: int = Field(default=0)
     name: str
+
+
+@lru_cache(maxsize=None)
+def trusted_constructor(model: type) -> Callable[[Dict], BaseModel]:
+    """`record -> model` without validation, a leaner `model_construct`.
+
+    Fills the instance `__dict__` directly, which is several times faster than
+    `model_construct` on millions of records. Only for trusted input.
+    """
+    field_names = frozenset(model.model_fields)
+    defaults = {
+        name: field.default
+        for name, field in model.model_fields.items()
+        if not field.is_required()
+    }
+    # Mutable defaults are copied so records never share them.
+    list_defaults = [name for name, value in defaults.items() if value == []]
+    allow_extra = model.model_config.get("extra") == "allow"
+    new = model.__new__
+    set_attr = object.__setattr__
+
+    def construct(elem: Dict) -> BaseModel:
+        values = {**defaults, **elem}
+        fields_set = set(elem)
+        extra = {} if allow_extra else None
+        if not fields_set <= field_names:
+            extra_values = {k: values.pop(k) for k in fields_set - field_names}
+            fields_set -= extra_values.keys()
+            if allow_extra:
+                extra = extra_values
+        for name in list_defaults:
+            if name not in fields_set:
+                values[name] = []
+        instance = new(model)
+        set_attr(instance, "__dict__", values)
+        set_attr(instance, "__pydantic_fields_set__", fields_set)
+        set_attr(instance, "__pydantic_extra__", extra)
+        set_attr(instance, "__pydantic_private__", None)
+        return instance
+
+    return construct
+
+
+class CocoData(BaseModel):
+    """A whole coco file, validated in one pass by pydantic-core."""
+
+    images: List[Image] = Field(default=[])
+    annotations: List[Annotation] = Field(default=[])
+    categories: List[Category] = Field(default=[])
@@ -1,11 +1,125 @@
+import gc
 import json
 import logging
-from typing import List, Dict, Optional, Tuple
-from cocomltools.utils import get_max_id_from_seq
-from collections import defaultdict
-from cocomltools.models.base import Image, Annotation, Category
+from contextlib import contextmanager
+from typing import Iterator, List, Dict, Optional, Sequence, Tuple
+from cocomltools.json_io import (
+    COCO_SECTIONS,
+    dump_coco_bytes,
+    iter_coco_records,
+    iter_coco_section,
+    read_coco_bytes,
+    write_coco_file,
+)
+from cocomltools.models.base import (
+    Image,
+    Annotation,
+    Category,
+    CocoData,
+    trusted_constructor,
+)
+from cocomltools.models.index import CocoIndex
+from cocomltools.models.records import SECTION_RECORDS
+from cocomltools.query import AnnotationIndex, filter_by_ann_count, select_rows
+import numpy as np
+from pydantic import BaseModel, TypeAdapter
+from pydantic_core import from_json
 from cocomltools.logger import logger
 
+VALIDATE_MODES = ("full", "sample", "none")
+# Records validated by validate="sample" before its stride doubles.
+VALIDATE_SAMPLE_SIZE = 1000
+SECTION_MODELS = {"images": Image, "annotations": Annotation, "categories": Category}
+REQUIRED_FIELDS = {
+    section: frozenset(
+        name for name, field in model.model_fields.items() if field.is_required()
+    )
+    for section, model in SECTION_MODELS.items()
+}
+
+
+@contextmanager
+def _gc_paused():
+    """Pause the cyclic GC while building millions of acyclic records.
+
+    Every allocation burst otherwise triggers full collections that rescan
+    all the records already built, which about doubles load times.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _sample_blocks(length: int) -> Iterator[Tuple[int, int]]:
+    """(start, step) of the blocks of records validated by validate="sample".
+
+    Each block validates VALIDATE_SAMPLE_SIZE records, every record for the
+    first one, then the stride doubles at every block. The sample spreads
+    over the whole section and only depends on the record index, so streamed
+    and in-memory loads check the same records (see `_is_sampled`).
+    """
+    start, step = 0, 1
+    while start < length:
+        yield start, step
+        start += VALIDATE_SAMPLE_SIZE * step
+        step *= 2
+
+
+def _is_sampled(index: int) -> bool:
+    """Whether validate="sample" validates the record at `index`."""
+    block = (index // VALIDATE_SAMPLE_SIZE + 1).bit_length() - 1
+    start = VALIDATE_SAMPLE_SIZE * ((1 << block) - 1)
+    return (index - start) % (1 << block) == 0
+
+
+def check_required_fields(section: str, elem: Dict):
+    if not REQUIRED_FIELDS[section] <= elem.keys():
+        missing = sorted(REQUIRED_FIELDS[section] - elem.keys())
+        raise ValueError(f"Missing required fields {missing} in coco {section}")
+
+
+def validate_records(section: str, records: List[Dict], validate: str = "full"):
+    """Validate raw `records` of a section, all of them or a sample.
+
+    Records left out of the sample, and all of them with validate="none", are
+    only checked for their required fields.
+    """
+    if validate != "full":
+        for elem in records:
+            check_required_fields(section, elem)
+    if validate == "none" or not records:
+        return
+    adapter = TypeAdapter(List[SECTION_MODELS[section]])
+    if validate == "full":
+        blocks = ((start, 1) for start in range(0, len(records), VALIDATE_SAMPLE_SIZE))
+    else:
+        blocks = _sample_blocks(len(records))
+    for start, step in blocks:
+        adapter.validate_python(
+            records[start : start + VALIDATE_SAMPLE_SIZE * step : step]
+        )
+
+
+def _construct_records(
+    section: str, records: List[Dict], validate: str = "none", slots: bool = False
+) -> list:
+    """Records built without validation, for trusted files.
+
+    With validate="sample", an evenly strided sample of the records is fully
+    validated first, so a malformed file still fails fast; "full" validates
+    them all, in chunks, then drops the validated models.
+    """
+    model = SECTION_MODELS[section]
+    validate_records(section, records, validate)
+    construct = (
+        SECTION_RECORDS[section].from_dict if slots else trusted_constructor(model)
+    )
+    return [construct(elem) for elem in records]
+
 
 class COCO:
     def __init__(
@@ -19,52 +133,151 @@ class COCO:
         self.annotations = annotations or []
         self.categories = categories or []
 
-        self.max_image_id = get_max_id_from_seq(
-            [elem.model_dump() for elem in self.images]
-        )
-        self.max_ann_id = get_max_id_from_seq(
-            [elem.model_dump() for elem in self.annotations]
-        )
-        self.max_cat_id = get_max_id_from_seq(
-            [elem.model_dump() for elem in self.categories]
-        )
+        self.index = CocoIndex.build(self.images, self.annotations, self.categories)
+        self._query_index = None
+        self._query_index_version = None
+
+    @property
+    def max_image_id(self) -> int:
+        return self.index.max_image_id
+
+    @property
+    def max_ann_id(self) -> int:
+        return self.index.max_ann_id
+
+    @property
+    def max_cat_id(self) -> int:
+        return self.index.max_cat_id
 
-        self.image_names_to_ids = {elem.file_name: elem.id for elem in self.images}
+    @property
+    def image_names_to_ids(self) -> Dict[str, int]:
+        return self.index.image_names_to_ids
 
-        self.image_ids_to_names = {elem.id: elem.file_name for elem in self.images}
+    @property
+    def image_ids_to_names(self) -> Dict[int, str]:
+        return self.index.image_ids_to_names
 
-        self.cat_names_to_ids = {elem.name: elem.id for elem in self.categories}
+    @property
+    def cat_names_to_ids(self) -> Dict[str, int]:
+        return self.index.cat_names_to_ids
 
-        self.cat_ids_to_names = {elem.id: elem.name for elem in self.categories}
+    @property
+    def cat_ids_to_names(self) -> Dict[int, str]:
+        return self.index.cat_ids_to_names
 
-        self.image_ids_to_anns = defaultdict(list)
-        self.image_ids_to_ann_count = defaultdict(int)
-        for ann in self.annotations:
-            self.image_ids_to_anns[ann.image_id].append(ann)
-            self.image_ids_to_ann_count[ann.image_id] += 1
+    @property
+    def image_ids_to_anns(self) -> Dict[int, List[Annotation]]:
+        return self.index.image_ids_to_anns
+
+    @property
+    def image_ids_to_ann_count(self) -> Dict[int, int]:
+        return self.index.image_ids_to_ann_count
 
     def remove_category_from_coco(self, category_name: str):
-        if category_name not in self.cat_names_to_ids:
-            logger.warning(f"No category found with {category_name} in coco - skipping")
+        """Remove a category and its annotations, updating the index in place.
+
+        Images left without annotations are dropped, as with `remove`, which
+        rebuilds the whole index and is meant for bulk removals.
+        """
+        category_ids = self._lookup_ids(
+            [category_name], self.cat_names_to_ids, "category"
+        )
+        if not category_ids:
             return
-        categ_id = self.cat_names_to_ids[category_name]
-        new_categories = [elem for elem in self.categories if elem.id != categ_id]
-        new_annotations = []
-        empty_images_names = set()
+        (category_id,) = category_ids
+        kept, removed = [], []
         for elem in self.annotations:
-            if elem.category_id == categ_id:
-                self.image_ids_to_ann_count[elem.image_id] -= 1
-                if self.image_ids_to_ann_count[elem.image_id] == 0:
-                    empty_images_names.add(self.image_ids_to_names[elem.image_id])
+            (removed if elem.category_id == category_id else kept).append(elem)
+        self.annotations = kept
+        self.categories = [elem for elem in self.categories if elem.id != category_id]
+        self.index.remove_annotations(removed)
+        self.index.remove_category(category_id)
+
+        emptied = {
+            elem.image_id
+            for elem in removed
+            if not self.image_ids_to_ann_count.get(elem.image_id)
+        }
+        if emptied:
+            self.images = [elem for elem in self.images if elem.id not in emptied]
+            for image_id in emptied:
+                self.index.remove_image(image_id)
+
+    def remove(
+        self,
+        category_names: Optional[List[str]] = None,
+        image_names: Optional[List[str]] = None,
+        min_score: Optional[float] = None,
+        area_range: Optional[Tuple[float, float]] = None,
+        remove_crowd: bool = False,
+        where: Optional[Dict] = None,
+        drop_empty_images: bool = True,
+    ):
+        """Remove categories, images and matching annotations in one pass.
+
+        Annotations are dropped when their category or image is removed, their
+        score is below `min_score`, their area is outside `area_range`, they
+        are crowd annotations and `remove_crowd` is set, or they match the
+        `where` query (see `query`). Images left without annotations by the
+        removal are dropped when `drop_empty_images` is set.
+        """
+        category_ids = self._lookup_ids(
+            category_names, self.cat_names_to_ids, "category"
+        )
+        image_ids = self._lookup_ids(image_names, self.image_names_to_ids, "image")
+        min_area, max_area = area_range or (None, None)
+        matched = np.zeros(len(self.annotations), dtype=bool)
+        if where:
+            matched[self.query_rows(**where)] = True
+
+        new_annotations = []
+        touched_image_ids = set()
+        kept_image_ids = set()
+        for elem, is_matched in zip(self.annotations, matched.tolist()):
+            if (
+                is_matched
+                or elem.category_id in category_ids
+                or elem.image_id in image_ids
+                or (min_score is not None and elem.score < min_score)
+                or (min_area is not None and elem.area < min_area)
+                or (max_area is not None and elem.area > max_area)
+                or (remove_crowd and elem.iscrowd)
+            ):
+                touched_image_ids.add(elem.image_id)
                 continue
+            kept_image_ids.add(elem.image_id)
             new_annotations.append(elem)
 
-        # Remove images with no annotations
-        for image_name in empty_images_names:
-            self.remove_image_from_coco(image_name)
+        if drop_empty_images:
+            image_ids |= touched_image_ids - kept_image_ids
 
-        self.categories = new_categories
         self.annotations = new_annotations
+        if image_ids:
+            self.images = [elem for elem in self.images if elem.id not in image_ids]
+        if category_ids:
+            self.categories = [
+                elem for elem in self.categories if elem.id not in category_ids
+            ]
+        self._rebuild_index()
+
+    @staticmethod
+    def _lookup_ids(names: Optional[List[str]], names_to_ids: Dict, kind: str) -> set:
+        ids = set()
+        for name in names or []:
+            if name not in names_to_ids:
+                logger.warning(f"No {kind} found with {name} in coco - skipping")
+                continue
+            ids.add(names_to_ids[name])
+        return ids
+
+    def _rebuild_index(self):
+        # Max ids never go down so removed ids are not handed out again.
+        old_index = self.index
+        self.index = CocoIndex.build(self.images, self.annotations, self.categories)
+        self.index.max_image_id = max(self.max_image_id, old_index.max_image_id)
+        self.index.max_ann_id = max(self.max_ann_id, old_index.max_ann_id)
+        self.index.max_cat_id = max(self.max_cat_id, old_index.max_cat_id)
+        self.index.version = old_index.version + 1
 
     def add_image_to_coco(self, elem: Image) -> int:
 
@@ -73,37 +286,32 @@ class COCO:
         if image_id:
             return image_id
 
-        new_id = self.max_image_id + 1
-        elem.id = new_id
-        self.max_image_id = new_id
+        elem.id = self.max_image_id + 1
         self.images.append(elem)
-        self.image_names_to_ids = {elem.file_name: elem.id for elem in self.images}
-        self.image_ids_to_names = {elem.id: elem.file_name for elem in self.images}
-        return new_id
+        self.index.add_image(elem)
+        return elem.id
 
     def remove_image_from_coco(self, image_name: str):
-        if image_name not in self.image_names_to_ids:
-            logger.warning(f"No image found with {image_name} in coco - skipping")
+        """Remove an image and its annotations, updating the index in place."""
+        image_ids = self._lookup_ids([image_name], self.image_names_to_ids, "image")
+        if not image_ids:
             return
-        image_id = self.image_names_to_ids[image_name]
-        new_images = [elem for elem in self.images if elem.id != image_id]
-        new_annotations = [
+        (image_id,) = image_ids
+        self.annotations = [
             elem for elem in self.annotations if elem.image_id != image_id
         ]
-        self.images = new_images
-        self.annotations = new_annotations
+        self.images = [elem for elem in self.images if elem.id != image_id]
+        self.index.remove_image(image_id)
 
     def add_ann_to_coco(
         self, elem: Annotation, new_image_id: int, new_category_id: int
     ) -> int:
-        new_id = self.max_ann_id + 1
-        elem.id = new_id
+        elem.id = self.max_ann_id + 1
         elem.image_id = new_image_id
         elem.category_id = new_category_id
         self.annotations.append(elem)
-        self.image_ids_to_anns[elem.image_id].append(elem)
-        self.max_ann_id = new_id
-        return new_id
+        self.index.add_annotation(elem)
+        return elem.id
 
     def add_cat_to_coco(self, elem: Category) -> int:
         category_id = self._check_if_categ_exists(elem.name)
@@ -111,13 +319,59 @@ class COCO:
         if category_id:
             return category_id
 
-        new_id = self.max_cat_id + 1
-        elem.id = new_id
+        elem.id = self.max_cat_id + 1
         self.categories.append(elem)
-        self.cat_names_to_ids = {elem.name: elem.id for elem in self.categories}
-        self.cat_ids_to_names = {elem.id: elem.name for elem in self.categories}
-        self.max_cat_id = new_id
-        return new_id
+        self.index.add_category(elem)
+        return elem.id
+
+    def annotations_changed(self):
+        """Refresh the query index after annotations were edited in place."""
+        self.index.version += 1
+
+    @property
+    def query_index(self) -> AnnotationIndex:
+        """Secondary annotation indexes, rebuilt lazily after any mutation."""
+        if self._query_index is None or self._query_index_version != self.index.version:
+            n = len(self.annotations)
+            self._query_index = AnnotationIndex(
+                image_ids=np.fromiter(
+                    (elem.image_id for elem in self.annotations), np.int64, n
+                ),
+                category_ids=np.fromiter(
+                    (elem.category_id for elem in self.annotations), np.int64, n
+                ),
+                scores=np.fromiter(
+                    (elem.score for elem in self.annotations), np.float64, n
+                ),
+                areas=np.fromiter(
+                    (elem.area for elem in self.annotations), np.float64, n
+                ),
+                iscrowd=np.fromiter(
+                    (elem.iscrowd for elem in self.annotations), np.int64, n
+                ),
+            )
+            self._query_index_version = self.index.version
+        return self._query_index
+
+    def query_rows(self, **query) -> np.ndarray:
+        return select_rows(self.query_index, self.cat_names_to_ids, **query)
+
+    def query(self, **query) -> List[Annotation]:
+        """Annotations matching all predicates.
+
+        e.g. `coco.query(category="person", score_lt=0.3, area_gt=32**2)`.
+        Supported arguments: category, iscrowd and score/area with the
+        _lt, _le, _gt, _ge and _between suffixes.
+        """
+        return [self.annotations[row] for row in self.query_rows(**query)]
+
+    def query_images(
+        self, anns_gt: Optional[int] = None, anns_lt: Optional[int] = None
+    ) -> List[Image]:
+        positions = filter_by_ann_count(
+            [elem.id for elem in self.images], self.query_index, anns_gt, anns_lt
+        )
+        return [self.images[pos] for pos in positions]
 
     def get_annotation_by_image_id(self, image_id: int) -> List[Dict]:
         return self.image_ids_to_anns[image_id]
@@ -140,15 +394,51 @@ class COCO:
 
     def get_coco_dict(self) -> Dict:
         return {
-            "images": [elem.model_dump() for elem in self.images],
-            "annotations": [elem.model_dump() for elem in self.annotations],
-            "categories": [elem.model_dump() for elem in self.categories],
+            "images": [elem.model_dump(warnings=False) for elem in self.images],
+            "annotations": [
+                elem.model_dump(warnings=False) for elem in self.annotations
+            ],
+            "categories": [elem.model_dump(warnings=False) for elem in self.categories],
         }
 
-    def save_coco_dict(self, file_path: str):
-        coco_dict = self.get_coco_dict()
-        with open(file_path, "w") as f:
-            json.dump(coco_dict, f, indent=4)
+    def iter_records(self, section: str) -> Iterator[Dict]:
+        for elem in getattr(self, section):
+            # Trusted, unvalidated records may hold ints for float fields.
+            yield elem.model_dump(warnings=False)
+
+    def _record_sections(self) -> Dict[str, Iterator[Dict]]:
+        return {section: self.iter_records(section) for section in COCO_SECTIONS}
+
+    def save_coco_dict(
+        self, file_path: str, compact: bool = False, compression: Optional[str] = None
+    ):
+        write_coco_file(
+            file_path,
+            self._record_sections(),
+            compact=compact,
+            compression=compression,
+        )
+
+    def to_json_bytes(self, compact: bool = True) -> bytes:
+        return dump_coco_bytes(self._record_sections(), compact=compact)
+
+    def to_arrow(self) -> Dict:
+        from cocomltools.models.columnar import ColumnarCOCO
+
+        return ColumnarCOCO.from_coco(self).to_arrow()
+
+    def to_parquet(self, directory: str):
+        from cocomltools.models.columnar import ColumnarCOCO
+
+        ColumnarCOCO.from_coco(self).to_parquet(directory)
+
+    @classmethod
+    def from_parquet(
+        cls, directory: str, columns: Optional[Dict[str, Sequence[str]]] = None
+    ) -> "COCO":
+        from cocomltools.models.columnar import ColumnarCOCO
+
+        return ColumnarCOCO.from_parquet(directory, columns).to_coco()
 
     def extend(self, coco: "COCO"):
         for image in coco.images:
@@ -167,18 +457,94 @@ class COCO:
             self.add_ann_to_coco(ann, new_image_id, new_category_id)
 
     @classmethod
-    def from_json_file(cls, json_file: str) -> "COCO":
-        with open(json_file, "r") as f:
-            coco_data = json.load(f)
-        return cls._from_coco_data(coco_data)
+    def from_json_file(
+        cls,
+        json_file: str,
+        streaming: bool = False,
+        validate: str = "full",
+        slots: bool = False,
+    ) -> "COCO":
+        """Load a coco file.
+
+        validate="full" checks every record, "sample" checks a sample of each
+        section and "none" only checks that required fields are present, for
+        trusted files. slots=True
+        loads compact `__slots__` records instead of pydantic models.
+        """
+        check_validate_mode(validate)
+        if streaming:
+            return cls._from_coco_stream(json_file, validate=validate, slots=slots)
+        raw = read_coco_bytes(json_file)
+        with _gc_paused():
+            if validate == "full" and not slots:
+                # Parsed and validated in a single pass, no intermediate dicts.
+                coco_data = CocoData.model_validate_json(raw)
+                return cls(
+                    coco_data.images, coco_data.annotations, coco_data.categories
+                )
+            return cls._from_coco_data(from_json(raw), validate=validate, slots=slots)
+
+    @staticmethod
+    def iter_images(json_file: str) -> Iterator[Image]:
+        for elem in iter_coco_section(json_file, "images"):
+            yield Image(**elem)
+
+    @staticmethod
+    def iter_annotations(json_file: str) -> Iterator[Annotation]:
+        for elem in iter_coco_section(json_file, "annotations"):
+            yield Annotation(**elem)
+
+    @staticmethod
+    def iter_categories(json_file: str) -> Iterator[Category]:
+        for elem in iter_coco_section(json_file, "categories"):
+            yield Category(**elem)
 
     @classmethod
-    def from_dict(cls, coco_data: Dict) -> "COCO":
-        return cls._from_coco_data(coco_data)
+    def from_dict(
+        cls, coco_data: Dict, validate: str = "full", slots: bool = False
+    ) -> "COCO":
+        check_validate_mode(validate)
+        with _gc_paused():
+            return cls._from_coco_data(coco_data, validate=validate, slots=slots)
 
     @classmethod
-    def _from_coco_data(cls, coco_data: Dict) -> "COCO":
-        images = [Image(**elem) for elem in coco_data.get("images", [])]
-        annotations = [Annotation(**elem) for elem in coco_data.get("annotations", [])]
-        categories = [Category(**elem) for elem in coco_data.get("categories", [])]
-        return cls(images, annotations, categories)
+    def _from_coco_stream(
+        cls, json_file: str, validate: str = "full", slots: bool = False
+    ) -> "COCO":
+        records = {section: [] for section in COCO_SECTIONS}
+        for section, elem in iter_coco_records(json_file):
+            model = SECTION_MODELS[section]
+            check = validate == "full" or (
+                validate == "sample" and _is_sampled(len(records[section]))
+            )
+            if not check:
+                check_required_fields(section, elem)
+            if slots:
+                if check:
+                    model(**elem)
+                record = SECTION_RECORDS[section].from_dict(elem)
+            elif check:
+                record = model(**elem)
+            else:
+                record = trusted_constructor(model)(elem)
+            records[section].append(record)
+        return cls(records["images"], records["annotations"], records["categories"])
+
+    @classmethod
+    def _from_coco_data(
+        cls, coco_data: Dict, validate: str = "full", slots: bool = False
+    ) -> "COCO":
+        if validate == "full" and not slots:
+            coco_data = CocoData.model_validate(coco_data)
+            return cls(coco_data.images, coco_data.annotations, coco_data.categories)
+        return cls(
+            *(
+                _construct_records(section, coco_data.get(section, []), validate, slots)
+                for section in COCO_SECTIONS
+            )
+        )
+
+
+def check_validate_mode(validate: str):
+    if validate not in VALIDATE_MODES:
+        raise ValueError(f"validate should be one of {VALIDATE_MODES}, got {validate}")
@@ -0,0 +1,863 @@
+import json
+from array import array
+from functools import cached_property
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from pydantic_core import from_json
+
+from cocomltools.models.base import Image, Annotation, Category
+from cocomltools.models.coco import COCO, check_validate_mode, validate_records
+from cocomltools.query import AnnotationIndex, filter_by_ann_count, select_rows
+from cocomltools.json_io import (
+    COCO_SECTIONS,
+    dump_coco_bytes,
+    iter_coco_records,
+    open_coco_file,
+    read_coco_bytes,
+    write_coco_file,
+)
+
+_ANN_VALUE_COLUMNS = ("scores", "areas", "iscrowd", "bboxes")
+IMAGE_FIELDS = ("id", "file_name", "width", "height")
+ANNOTATION_FIELDS = frozenset(
+    (
+        "id",
+        "image_id",
+        "category_id",
+        "score",
+        "bbox",
+        "segmentation",
+        "area",
+        "iscrowd",
+    )
+)
+CATEGORY_FIELDS = frozenset(("id", "name"))
+STORE_COLUMNS = (
+    "image_ids",
+    "file_names",
+    "widths",
+    "heights",
+    "ann_ids",
+    "ann_image_ids",
+    "ann_category_ids",
+    "scores",
+    "areas",
+    "iscrowd",
+    "bboxes",
+    "segmentations",
+    "cat_ids",
+    "cat_names",
+    "image_extras",
+    "ann_extras",
+    "cat_extras",
+)
+
+
+def _gather_ranges(offsets: np.ndarray, rows: np.ndarray):
+    """Return (new_offsets, positions) selecting the ragged ranges of `rows`."""
+    starts = offsets[rows]
+    lengths = offsets[rows + 1] - starts
+    new_offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=new_offsets[1:])
+    positions = np.repeat(starts - new_offsets[:-1], lengths) + np.arange(
+        new_offsets[-1], dtype=np.int64
+    )
+    return new_offsets, positions
+
+
+class RaggedSegmentation:
+    """Segmentations as annotation -> polygon -> value offsets over a flat buffer.
+
+    `nested[i]` tells whether annotation i was a list of polygons or a flat list,
+    so records round-trip to the exact same JSON. RLE segmentations have no
+    polygon and are kept as dicts in the `rles` object array, None when no
+    annotation has one.
+    """
+
+    def __init__(
+        self,
+        ann_offsets: np.ndarray,
+        poly_offsets: np.ndarray,
+        values: np.ndarray,
+        nested: np.ndarray,
+        rles: Optional[np.ndarray] = None,
+    ):
+        self.ann_offsets = ann_offsets
+        self.poly_offsets = poly_offsets
+        self.values = values
+        self.nested = nested
+        self.rles = rles
+
+    def __len__(self) -> int:
+        return len(self.nested)
+
+    def __getitem__(self, row: int) -> Union[list, Dict]:
+        if self.rles is not None and self.rles[row] is not None:
+            return self.rles[row]
+        start, end = self.ann_offsets[row], self.ann_offsets[row + 1]
+        polygons = [
+            self.values[self.poly_offsets[p] : self.poly_offsets[p + 1]].tolist()
+            for p in range(start, end)
+        ]
+        if self.nested[row]:
+            return polygons
+        return polygons[0] if polygons else []
+
+    def take(self, rows: np.ndarray) -> "RaggedSegmentation":
+        rows = np.asarray(rows, dtype=np.int64)
+        ann_offsets, poly_rows = _gather_ranges(self.ann_offsets, rows)
+        poly_offsets, value_rows = _gather_ranges(self.poly_offsets, poly_rows)
+        return RaggedSegmentation(
+            ann_offsets,
+            poly_offsets,
+            self.values[value_rows],
+            self.nested[rows],
+            None if self.rles is None else self.rles[rows],
+        )
+
+    def _rles_column(self) -> np.ndarray:
+        if self.rles is None:
+            return _object_array([None] * len(self))
+        return self.rles
+
+    @classmethod
+    def from_lists(
+        cls, segmentations: Iterable[Union[list, Dict]]
+    ) -> "RaggedSegmentation":
+        ann_lengths, poly_lengths, values, nested, rles = [], [], [], [], []
+        for seg in segmentations:
+            if isinstance(seg, dict):
+                rles.append(seg)
+                nested.append(False)
+                ann_lengths.append(0)
+                continue
+            rles.append(None)
+            is_nested = bool(seg) and isinstance(seg[0], (list, tuple))
+            polygons = seg if is_nested else ([seg] if seg else [])
+            nested.append(is_nested)
+            ann_lengths.append(len(polygons))
+            for polygon in polygons:
+                poly_lengths.append(len(polygon))
+                values.extend(polygon)
+        return cls(
+            _offsets_from_lengths(ann_lengths),
+            _offsets_from_lengths(poly_lengths),
+            np.asarray(values, dtype=np.float64),
+            np.asarray(nested, dtype=bool),
+            _object_array(rles) if any(rle is not None for rle in rles) else None,
+        )
+
+    @classmethod
+    def concat(cls, parts: Sequence["RaggedSegmentation"]) -> "RaggedSegmentation":
+        if not parts:
+            return cls.from_lists([])
+        ann_offsets = [np.zeros(1, dtype=np.int64)]
+        poly_offsets = [np.zeros(1, dtype=np.int64)]
+        num_polygons, num_values = 0, 0
+        for part in parts:
+            ann_offsets.append(part.ann_offsets[1:] + num_polygons)
+            poly_offsets.append(part.poly_offsets[1:] + num_values)
+            num_polygons += part.ann_offsets[-1]
+            num_values += part.poly_offsets[-1]
+        return cls(
+            np.concatenate(ann_offsets),
+            np.concatenate(poly_offsets),
+            np.concatenate([part.values for part in parts]),
+            np.concatenate([part.nested for part in parts]),
+            (
+                np.concatenate([part._rles_column() for part in parts])
+                if any(part.rles is not None for part in parts)
+                else None
+            ),
+        )
+
+
+def _offsets_from_lengths(lengths: Sequence[int]) -> np.ndarray:
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(np.asarray(lengths, dtype=np.int64), out=offsets[1:])
+    return offsets
+
+
+class ColumnarBuilder:
+    """Accumulates raw COCO records straight into typed columns."""
+
+    def __init__(self):
+        self.image_ids = array("q")
+        self.file_names = []
+        self.widths = array("q")
+        self.heights = array("q")
+        self.image_extras = []
+
+        self.ann_ids = array("q")
+        self.ann_image_ids = array("q")
+        self.ann_category_ids = array("q")
+        self.scores = array("d")
+        self.areas = array("d")
+        self.iscrowd = array("q")
+        self.bboxes = array("d")
+        self.seg_ann_lengths = array("q")
+        self.seg_poly_lengths = array("q")
+        self.seg_values = array("d")
+        self.seg_nested = array("b")
+        self.seg_rles = []
+        self.ann_extras = []
+
+        self.cat_ids = array("q")
+        self.cat_names = []
+        self.cat_extras = []
+
+    def add(self, section: str, elem: dict):
+        try:
+            if section == "images":
+                self.add_image(elem)
+            elif section == "annotations":
+                self.add_annotation(elem)
+            elif section == "categories":
+                self.add_category(elem)
+        except KeyError as e:
+            raise ValueError(f"Missing required field {e} in coco {section}")
+        except TypeError as e:
+            raise ValueError(f"Invalid field in coco {section}: {e}")
+
+    def add_image(self, elem: dict):
+        image_id, width, height = _as_ints(
+            elem.get("id", 0), elem["width"], elem["height"]
+        )
+        self.image_ids.append(image_id)
+        self.file_names.append(elem["file_name"])
+        self.widths.append(width)
+        self.heights.append(height)
+        extras = {k: v for k, v in elem.items() if k not in IMAGE_FIELDS}
+        self.image_extras.append(extras or None)
+
+    def add_annotation(self, elem: dict):
+        bbox = elem["bbox"]
+        if len(bbox) != 4:
+            raise ValueError(f"Invalid bbox {bbox} for annotation {elem.get('id')}")
+        ann_id, image_id, category_id, iscrowd = _as_ints(
+            elem.get("id", 0),
+            elem["image_id"],
+            elem["category_id"],
+            elem.get("iscrowd", 0),
+        )
+        self.ann_ids.append(ann_id)
+        self.ann_image_ids.append(image_id)
+        self.ann_category_ids.append(category_id)
+        self.scores.append(elem.get("score", 1.0))
+        self.areas.append(elem["area"])
+        self.iscrowd.append(iscrowd)
+        self.bboxes.extend(bbox)
+        self.ann_extras.append(_extras(elem, ANNOTATION_FIELDS))
+
+        seg = elem.get("segmentation") or []
+        if isinstance(seg, dict):
+            # RLE, kept aside as is.
+            self.seg_rles.append(seg)
+            self.seg_nested.append(False)
+            self.seg_ann_lengths.append(0)
+            return
+        self.seg_rles.append(None)
+        is_nested = isinstance(seg[0], (list, tuple)) if seg else False
+        polygons = seg if is_nested else ([seg] if seg else [])
+        self.seg_nested.append(is_nested)
+        self.seg_ann_lengths.append(len(polygons))
+        for polygon in polygons:
+            self.seg_poly_lengths.append(len(polygon))
+            self.seg_values.extend(polygon)
+
+    def add_category(self, elem: dict):
+        self.cat_ids.append(_as_ints(elem.get("id", 0))[0])
+        self.cat_names.append(elem["name"])
+        self.cat_extras.append(_extras(elem, CATEGORY_FIELDS))
+
+    def build(self) -> "ColumnarCOCO":
+        return ColumnarCOCO(
+            image_ids=np.array(self.image_ids, dtype=np.int64),
+            file_names=_object_array(self.file_names),
+            widths=np.array(self.widths, dtype=np.int64),
+            heights=np.array(self.heights, dtype=np.int64),
+            ann_ids=np.array(self.ann_ids, dtype=np.int64),
+            ann_image_ids=np.array(self.ann_image_ids, dtype=np.int64),
+            ann_category_ids=np.array(self.ann_category_ids, dtype=np.int64),
+            scores=np.array(self.scores, dtype=np.float64),
+            areas=np.array(self.areas, dtype=np.float64),
+            iscrowd=np.array(self.iscrowd, dtype=np.int64),
+            bboxes=np.array(self.bboxes, dtype=np.float64).reshape(-1, 4),
+            segmentations=RaggedSegmentation(
+                _offsets_from_lengths(self.seg_ann_lengths),
+                _offsets_from_lengths(self.seg_poly_lengths),
+                np.array(self.seg_values, dtype=np.float64),
+                np.array(self.seg_nested, dtype=bool),
+                _object_array(self.seg_rles) if any(self.seg_rles) else None,
+            ),
+            cat_ids=np.array(self.cat_ids, dtype=np.int64),
+            cat_names=_object_array(self.cat_names),
+            image_extras=_extras_array(self.image_extras),
+            ann_extras=_extras_array(self.ann_extras),
+            cat_extras=_extras_array(self.cat_extras),
+        )
+
+
+def _remap_ids(values: np.ndarray, keys: np.ndarray, mapped: Sequence[int]):
+    """Vectorized `mapped[keys.index(v)]` lookup for every v in `values`."""
+    if len(values) == 0:
+        return np.zeros(0, dtype=np.int64)
+    order = np.argsort(keys, kind="stable")
+    positions = np.searchsorted(keys, values, sorter=order)
+    positions = np.minimum(positions, max(len(keys) - 1, 0))
+    if len(keys) == 0 or not np.all(keys[order][positions] == values):
+        raise ValueError("Annotations reference ids missing from the coco file")
+    return np.asarray(mapped, dtype=np.int64)[order][positions]
+
+
+def _as_ints(*values) -> tuple:
+    """`values` as ints, coercing integral floats such as 640.0 like pydantic."""
+    if all(type(value) is int for value in values):
+        return values
+    coerced = []
+    for value in values:
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        elif not isinstance(value, int):
+            raise ValueError(f"Expected an integer, got {value!r}")
+        coerced.append(value)
+    return tuple(coerced)
+
+
+def _object_array(values: list) -> np.ndarray:
+    arr = np.empty(len(values), dtype=object)
+    arr[:] = values
+    return arr
+
+
+def _extras(elem: dict, fields: frozenset) -> Optional[Dict]:
+    """Fields of `elem` outside of `fields`, None when there are none."""
+    if elem.keys() <= fields:
+        return None
+    return {k: v for k, v in elem.items() if k not in fields}
+
+
+def _extras_array(extras: list) -> Optional[np.ndarray]:
+    return _object_array(extras) if any(extras) else None
+
+
+def _extras_at(extras: Optional[np.ndarray], row: int) -> Dict:
+    if extras is None:
+        return {}
+    return extras[row] or {}
+
+
+def _take_extras(extras: Optional[np.ndarray], rows: np.ndarray):
+    return None if extras is None else extras[rows]
+
+
+class ColumnarCOCO:
+    """Array-backed COCO store.
+
+    Images, annotations and categories are kept as NumPy columns instead of one
+    pydantic model per record. The read API mirrors `COCO`; models are only
+    built when `images` / `annotations` / `categories` are accessed.
+    Instances are treated as immutable: selections return new stores.
+    """
+
+    def __init__(
+        self,
+        image_ids: np.ndarray,
+        file_names: np.ndarray,
+        widths: np.ndarray,
+        heights: np.ndarray,
+        ann_ids: np.ndarray,
+        ann_image_ids: np.ndarray,
+        ann_category_ids: np.ndarray,
+        scores: np.ndarray,
+        areas: np.ndarray,
+        iscrowd: np.ndarray,
+        bboxes: np.ndarray,
+        segmentations: RaggedSegmentation,
+        cat_ids: np.ndarray,
+        cat_names: np.ndarray,
+        image_extras: Optional[np.ndarray] = None,
+        ann_extras: Optional[np.ndarray] = None,
+        cat_extras: Optional[np.ndarray] = None,
+    ):
+        self.image_ids = image_ids
+        self.file_names = file_names
+        self.widths = widths
+        self.heights = heights
+        # Object arrays of the extra fields dict (or None) of each record, None
+        # when no record of the section has extra fields.
+        self.image_extras = image_extras
+
+        self.ann_ids = ann_ids
+        self.ann_image_ids = ann_image_ids
+        self.ann_category_ids = ann_category_ids
+        self.scores = scores
+        self.areas = areas
+        self.iscrowd = iscrowd
+        self.bboxes = bboxes
+        self.segmentations = segmentations
+        self.ann_extras = ann_extras
+
+        self.cat_ids = cat_ids
+        self.cat_names = cat_names
+        self.cat_extras = cat_extras
+
+    @property
+    def num_images(self) -> int:
+        return len(self.image_ids)
+
+    @property
+    def num_annotations(self) -> int:
+        return len(self.ann_ids)
+
+    @property
+    def max_image_id(self) -> int:
+        return int(self.image_ids.max()) if self.num_images else 0
+
+    @property
+    def max_ann_id(self) -> int:
+        return int(self.ann_ids.max()) if self.num_annotations else 0
+
+    @property
+    def max_cat_id(self) -> int:
+        return int(self.cat_ids.max()) if len(self.cat_ids) else 0
+
+    @cached_property
+    def image_names_to_ids(self) -> Dict[str, int]:
+        return dict(zip(self.file_names.tolist(), self.image_ids.tolist()))
+
+    @cached_property
+    def image_ids_to_names(self) -> Dict[int, str]:
+        return dict(zip(self.image_ids.tolist(), self.file_names.tolist()))
+
+    @cached_property
+    def cat_names_to_ids(self) -> Dict[str, int]:
+        return dict(zip(self.cat_names.tolist(), self.cat_ids.tolist()))
+
+    @cached_property
+    def cat_ids_to_names(self) -> Dict[int, str]:
+        return dict(zip(self.cat_ids.tolist(), self.cat_names.tolist()))
+
+    @cached_property
+    def _ann_order(self) -> np.ndarray:
+        return np.argsort(self.ann_image_ids, kind="stable")
+
+    @cached_property
+    def _sorted_ann_image_ids(self) -> np.ndarray:
+        return self.ann_image_ids[self._ann_order]
+
+    @property
+    def images(self) -> List[Image]:
+        return [self._image_at(row) for row in range(self.num_images)]
+
+    @property
+    def annotations(self) -> List[Annotation]:
+        return [self._annotation_at(row) for row in range(self.num_annotations)]
+
+    @property
+    def categories(self) -> List[Category]:
+        return [
+            Category.model_construct(**record)
+            for record in self.iter_records("categories")
+        ]
+
+    def _image_at(self, row: int) -> Image:
+        return Image.model_construct(
+            id=int(self.image_ids[row]),
+            file_name=self.file_names[row],
+            width=int(self.widths[row]),
+            height=int(self.heights[row]),
+            **self.image_extras_at(row),
+        )
+
+    def image_extras_at(self, row: int) -> Dict:
+        return _extras_at(self.image_extras, row)
+
+    def _annotation_at(self, row: int) -> Annotation:
+        return Annotation.model_construct(
+            id=int(self.ann_ids[row]),
+            image_id=int(self.ann_image_ids[row]),
+            category_id=int(self.ann_category_ids[row]),
+            score=float(self.scores[row]),
+            bbox=self.bboxes[row].tolist(),
+            segmentation=self.segmentations[row],
+            area=float(self.areas[row]),
+            iscrowd=int(self.iscrowd[row]),
+            **_extras_at(self.ann_extras, row),
+        )
+
+    @cached_property
+    def query_index(self) -> AnnotationIndex:
+        return AnnotationIndex(
+            image_ids=self.ann_image_ids,
+            category_ids=self.ann_category_ids,
+            scores=self.scores,
+            areas=self.areas,
+            iscrowd=self.iscrowd,
+        )
+
+    def query_rows(self, **query) -> np.ndarray:
+        return select_rows(self.query_index, self.cat_names_to_ids, **query)
+
+    def query(self, **query) -> List[Annotation]:
+        return [self._annotation_at(row) for row in self.query_rows(**query)]
+
+    def query_images(
+        self, anns_gt: Optional[int] = None, anns_lt: Optional[int] = None
+    ) -> List[Image]:
+        positions = filter_by_ann_count(
+            self.image_ids, self.query_index, anns_gt, anns_lt
+        )
+        return [self._image_at(row) for row in positions]
+
+    def annotation_rows_by_image_id(self, image_id: int) -> np.ndarray:
+        start, end = np.searchsorted(
+            self._sorted_ann_image_ids, [image_id, image_id + 1]
+        )
+        return self._ann_order[start:end]
+
+    def get_annotation_by_image_id(self, image_id: int) -> List[Annotation]:
+        return [
+            self._annotation_at(row)
+            for row in self.annotation_rows_by_image_id(image_id)
+        ]
+
+    def get_annotations_by_image_name(self, image_name: str) -> List[Annotation]:
+        image_id = self.image_names_to_ids.get(image_name)
+        if image_id is None:
+            return []
+        return self.get_annotation_by_image_id(image_id)
+
+    @classmethod
+    def concat(cls, stores: Sequence["ColumnarCOCO"]) -> "ColumnarCOCO":
+        """Merge stores with the same semantics as chained `COCO.extend`.
+
+        The first store keeps its ids. Images and categories of the following
+        stores are deduplicated by name, new ones get ids after the current
+        max, and annotation ids are renumbered. Name lookups are done once per
+        image/category, annotations are remapped with vectorized lookups.
+        """
+        base = stores[0]
+        image_names_to_ids = dict(base.image_names_to_ids)
+        cat_names_to_ids = dict(base.cat_names_to_ids)
+        max_image_id, max_ann_id, max_cat_id = (
+            base.max_image_id,
+            base.max_ann_id,
+            base.max_cat_id,
+        )
+        image_columns = {
+            name: [getattr(base, name)]
+            for name in ("image_ids", "file_names", "widths", "heights")
+        }
+        cat_columns = {name: [getattr(base, name)] for name in ("cat_ids", "cat_names")}
+        ann_columns = {
+            name: [getattr(base, name)]
+            for name in _ANN_VALUE_COLUMNS
+            + ("ann_ids", "ann_image_ids", "ann_category_ids")
+        }
+        extras_columns = {
+            name: [base._extras_column(name)]
+            for name in ("image_extras", "ann_extras", "cat_extras")
+            if any(getattr(store, name) is not None for store in stores)
+        }
+
+        for store in stores[1:]:
+            new_image_ids, new_image_rows = [], []
+            for row, name in enumerate(store.file_names.tolist()):
+                if name not in image_names_to_ids:
+                    max_image_id += 1
+                    image_names_to_ids[name] = max_image_id
+                    new_image_rows.append(row)
+                new_image_ids.append(image_names_to_ids[name])
+            new_image_ids = np.asarray(new_image_ids, dtype=np.int64)
+            new_image_rows = np.asarray(new_image_rows, dtype=np.int64)
+
+            new_cat_ids, new_cat_rows = [], []
+            for row, name in enumerate(store.cat_names.tolist()):
+                if name not in cat_names_to_ids:
+                    max_cat_id += 1
+                    cat_names_to_ids[name] = max_cat_id
+                    new_cat_rows.append(row)
+                new_cat_ids.append(cat_names_to_ids[name])
+            new_cat_ids = np.asarray(new_cat_ids, dtype=np.int64)
+            new_cat_rows = np.asarray(new_cat_rows, dtype=np.int64)
+
+            image_columns["image_ids"].append(new_image_ids[new_image_rows])
+            for name in ("file_names", "widths", "heights"):
+                image_columns[name].append(getattr(store, name)[new_image_rows])
+            new_rows = {
+                "image_extras": new_image_rows,
+                "ann_extras": slice(None),
+                "cat_extras": new_cat_rows,
+            }
+            for name, parts in extras_columns.items():
+                parts.append(store._extras_column(name)[new_rows[name]])
+            cat_columns["cat_ids"].append(new_cat_ids[new_cat_rows])
+            cat_columns["cat_names"].append(store.cat_names[new_cat_rows])
+
+            ann_columns["ann_ids"].append(
+                np.arange(1, store.num_annotations + 1, dtype=np.int64) + max_ann_id
+            )
+            max_ann_id += store.num_annotations
+            ann_columns["ann_image_ids"].append(
+                _remap_ids(store.ann_image_ids, store.image_ids, new_image_ids)
+            )
+            ann_columns["ann_category_ids"].append(
+                _remap_ids(store.ann_category_ids, store.cat_ids, new_cat_ids)
+            )
+            for name in _ANN_VALUE_COLUMNS:
+                ann_columns[name].append(getattr(store, name))
+
+        return cls(
+            segmentations=RaggedSegmentation.concat(
+                [store.segmentations for store in stores]
+            ),
+            **{
+                name: np.concatenate(parts)
+                for columns in (image_columns, cat_columns, ann_columns, extras_columns)
+                for name, parts in columns.items()
+            },
+        )
+
+    def select(
+        self,
+        image_rows: np.ndarray,
+        ann_rows: np.ndarray,
+        cat_rows: Optional[np.ndarray] = None,
+    ) -> "ColumnarCOCO":
+        if cat_rows is None:
+            cat_rows = np.arange(len(self.cat_ids))
+        return ColumnarCOCO(
+            image_ids=self.image_ids[image_rows],
+            file_names=self.file_names[image_rows],
+            widths=self.widths[image_rows],
+            heights=self.heights[image_rows],
+            ann_ids=self.ann_ids[ann_rows],
+            ann_image_ids=self.ann_image_ids[ann_rows],
+            ann_category_ids=self.ann_category_ids[ann_rows],
+            scores=self.scores[ann_rows],
+            areas=self.areas[ann_rows],
+            iscrowd=self.iscrowd[ann_rows],
+            bboxes=self.bboxes[ann_rows],
+            segmentations=self.segmentations.take(np.asarray(ann_rows)),
+            cat_ids=self.cat_ids[cat_rows],
+            cat_names=self.cat_names[cat_rows],
+            image_extras=_take_extras(self.image_extras, image_rows),
+            ann_extras=_take_extras(self.ann_extras, ann_rows),
+            cat_extras=_take_extras(self.cat_extras, cat_rows),
+        )
+
+    def with_columns(self, **columns) -> "ColumnarCOCO":
+        """New store with `columns` replaced, the other columns are shared."""
+        return ColumnarCOCO(
+            **{**{name: getattr(self, name) for name in STORE_COLUMNS}, **columns}
+        )
+
+    def _extras_column(self, name: str) -> np.ndarray:
+        """`name` extras with one entry per record, even when none has extras."""
+        length = {
+            "image_extras": self.num_images,
+            "ann_extras": self.num_annotations,
+            "cat_extras": len(self.cat_ids),
+        }[name]
+        extras = getattr(self, name)
+        return _object_array([None] * length) if extras is None else extras
+
+    def select_images(self, image_rows: np.ndarray) -> "ColumnarCOCO":
+        image_rows = np.asarray(image_rows, dtype=np.int64)
+        ann_mask = np.isin(self.ann_image_ids, self.image_ids[image_rows])
+        return self.select(image_rows, np.flatnonzero(ann_mask))
+
+    def remove(
+        self,
+        category_names: Optional[Sequence[str]] = None,
+        image_names: Optional[Sequence[str]] = None,
+        min_score: Optional[float] = None,
+        area_range: Optional[Tuple[float, float]] = None,
+        remove_crowd: bool = False,
+        where: Optional[Dict] = None,
+        drop_empty_images: bool = True,
+    ) -> "ColumnarCOCO":
+        """Vectorized counterpart of `COCO.remove`, returning a new store."""
+        cat_mask = np.isin(self.cat_names, list(category_names or []))
+        image_mask = np.isin(self.file_names, list(image_names or []))
+
+        removed_anns = np.isin(self.ann_category_ids, self.cat_ids[cat_mask])
+        removed_anns |= np.isin(self.ann_image_ids, self.image_ids[image_mask])
+        if min_score is not None:
+            removed_anns |= self.scores < min_score
+        if area_range is not None:
+            min_area, max_area = area_range
+            if min_area is not None:
+                removed_anns |= self.areas < min_area
+            if max_area is not None:
+                removed_anns |= self.areas > max_area
+        if remove_crowd:
+            removed_anns |= self.iscrowd != 0
+        if where:
+            removed_anns[self.query_rows(**where)] = True
+
+        if drop_empty_images:
+            # Images emptied by the removal are dropped, images that had no
+            # annotations to begin with are kept.
+            touched = np.isin(self.image_ids, self.ann_image_ids[removed_anns])
+            kept = np.isin(self.image_ids, self.ann_image_ids[~removed_anns])
+            image_mask |= touched & ~kept
+
+        return self.select(
+            np.flatnonzero(~image_mask),
+            np.flatnonzero(~removed_anns),
+            np.flatnonzero(~cat_mask),
+        )
+
+    def remove_categories(self, category_names: Sequence[str]) -> "ColumnarCOCO":
+        return self.remove(category_names=category_names)
+
+    def remove_images(self, image_names: Sequence[str]) -> "ColumnarCOCO":
+        return self.remove(image_names=image_names)
+
+    def get_coco_dict(self) -> Dict:
+        return {section: list(self.iter_records(section)) for section in COCO_SECTIONS}
+
+    def iter_records(self, section: str) -> Iterator[Dict]:
+        if section == "images":
+            for row, (image_id, file_name, width, height) in enumerate(
+                zip(
+                    self.image_ids.tolist(),
+                    self.file_names.tolist(),
+                    self.widths.tolist(),
+                    self.heights.tolist(),
+                )
+            ):
+                yield {
+                    "id": image_id,
+                    "file_name": file_name,
+                    "width": width,
+                    "height": height,
+                    **self.image_extras_at(row),
+                }
+        elif section == "annotations":
+            columns = zip(
+                self.ann_ids.tolist(),
+                self.ann_image_ids.tolist(),
+                self.ann_category_ids.tolist(),
+                self.scores.tolist(),
+                self.bboxes.tolist(),
+                self.areas.tolist(),
+                self.iscrowd.tolist(),
+            )
+            for row, (
+                ann_id,
+                image_id,
+                cat_id,
+                score,
+                bbox,
+                area,
+                iscrowd,
+            ) in enumerate(columns):
+                yield {
+                    "id": ann_id,
+                    "image_id": image_id,
+                    "category_id": cat_id,
+                    "score": score,
+                    "bbox": bbox,
+                    "segmentation": self.segmentations[row],
+                    "area": area,
+                    "iscrowd": iscrowd,
+                    **_extras_at(self.ann_extras, row),
+                }
+        elif section == "categories":
+            for row, (cat_id, name) in enumerate(
+                zip(self.cat_ids.tolist(), self.cat_names.tolist())
+            ):
+                yield {"id": cat_id, "name": name, **_extras_at(self.cat_extras, row)}
+
+    def _record_sections(self) -> Dict[str, Iterator[Dict]]:
+        return {section: self.iter_records(section) for section in COCO_SECTIONS}
+
+    def save_coco_dict(
+        self, file_path: str, compact: bool = False, compression: Optional[str] = None
+    ):
+        write_coco_file(
+            file_path,
+            self._record_sections(),
+            compact=compact,
+            compression=compression,
+        )
+
+    def to_json_bytes(self, compact: bool = True) -> bytes:
+        return dump_coco_bytes(self._record_sections(), compact=compact)
+
+    def to_coco(self, slots: bool = False) -> COCO:
+        if slots:
+            return COCO.from_dict(self.get_coco_dict(), validate="none", slots=True)
+        return COCO(self.images, self.annotations, self.categories)
+
+    def to_arrow(self) -> Dict:
+        """images / annotations / categories `pyarrow.Table`s over the columns."""
+        from cocomltools.arrow_io import to_arrow_tables
+
+        return to_arrow_tables(self)
+
+    def to_parquet(self, directory: str):
+        from cocomltools.arrow_io import write_parquet
+
+        write_parquet(self, directory)
+
+    @classmethod
+    def from_parquet(
+        cls, directory: str, columns: Optional[Dict[str, Sequence[str]]] = None
+    ) -> "ColumnarCOCO":
+        """Load a parquet directory, reading only `columns` of the sections in it.
+
+        See `read_parquet_tables`; columns left out get their default value.
+        """
+        from cocomltools.arrow_io import read_parquet_tables, store_from_tables
+
+        return store_from_tables(read_parquet_tables(directory, columns))
+
+    @classmethod
+    def from_coco(cls, coco: COCO) -> "ColumnarCOCO":
+        return cls._from_coco_data(coco.get_coco_dict())
+
+    @classmethod
+    def from_json_file(
+        cls, json_file: str, streaming: bool = False, validate: str = "none"
+    ) -> "ColumnarCOCO":
+        """Load a coco file, `validate` checks the records like `COCO`.
+
+        With validate="none" only the fields read into the columns are checked.
+        Streaming loads are not validated.
+        """
+        check_validate_mode(validate)
+        if streaming:
+            if validate != "none":
+                raise ValueError(
+                    "Streaming columnar loads only support validate='none'"
+                )
+            builder = ColumnarBuilder()
+            for section, elem in iter_coco_records(json_file):
+                builder.add(section, elem)
+            return builder.build()
+        if validate != "none":
+            return cls.from_dict(from_json(read_coco_bytes(json_file)), validate)
+        with open_coco_file(json_file) as f:
+            coco_data = json.load(f)
+        return cls._from_coco_data(coco_data)
+
+    @classmethod
+    def from_dict(cls, coco_data: Dict, validate: str = "none") -> "ColumnarCOCO":
+        check_validate_mode(validate)
+        for section in COCO_SECTIONS:
+            validate_records(section, coco_data.get(section, []), validate)
+        # The builder coerces integral floats (640.0) to ints like the models.
+        return cls._from_coco_data(coco_data)
+
+    @classmethod
+    def _from_coco_data(cls, coco_data: Dict) -> "ColumnarCOCO":
+        builder = ColumnarBuilder()
+        for section in COCO_SECTIONS:
+            for elem in coco_data.get(section, []):
+                builder.add(section, elem)
+        return builder.build()
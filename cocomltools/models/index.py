@@ -0,0 +1,88 @@
+from collections import defaultdict
+from typing import Iterable
+from cocomltools.models.base import Image, Annotation, Category
+
+
+class CocoIndex:
+    """Id bookkeeping for a `COCO` dataset, built once and updated in place.
+
+    `version` is bumped on every mutation so derived caches can tell when
+    they went stale.
+    """
+
+    def __init__(self):
+        self.max_image_id = 0
+        self.max_ann_id = 0
+        self.max_cat_id = 0
+
+        self.image_names_to_ids = {}
+        self.image_ids_to_names = {}
+        self.cat_names_to_ids = {}
+        self.cat_ids_to_names = {}
+
+        self.image_ids_to_anns = defaultdict(list)
+        self.image_ids_to_ann_count = defaultdict(int)
+        self.version = 0
+
+    @classmethod
+    def build(
+        cls,
+        images: Iterable[Image],
+        annotations: Iterable[Annotation],
+        categories: Iterable[Category],
+    ) -> "CocoIndex":
+        index = cls()
+        for image in images:
+            index.add_image(image)
+        for ann in annotations:
+            index.add_annotation(ann)
+        for cat in categories:
+            index.add_category(cat)
+        return index
+
+    def add_image(self, image: Image):
+        self.image_names_to_ids[image.file_name] = image.id
+        self.image_ids_to_names[image.id] = image.file_name
+        if image.id > self.max_image_id:
+            self.max_image_id = image.id
+        self.version += 1
+
+    def add_annotation(self, ann: Annotation):
+        self.image_ids_to_anns[ann.image_id].append(ann)
+        self.image_ids_to_ann_count[ann.image_id] += 1
+        if ann.id > self.max_ann_id:
+            self.max_ann_id = ann.id
+        self.version += 1
+
+    def add_category(self, cat: Category):
+        self.cat_names_to_ids[cat.name] = cat.id
+        self.cat_ids_to_names[cat.id] = cat.name
+        if cat.id > self.max_cat_id:
+            self.max_cat_id = cat.id
+        self.version += 1
+
+    def remove_image(self, image_id: int):
+        image_name = self.image_ids_to_names.pop(image_id, None)
+        if self.image_names_to_ids.get(image_name) == image_id:
+            del self.image_names_to_ids[image_name]
+        self.image_ids_to_anns.pop(image_id, None)
+        self.image_ids_to_ann_count.pop(image_id, None)
+        self.version += 1
+
+    def remove_annotations(self, annotations: Iterable[Annotation]):
+        removed_per_image = defaultdict(set)
+        for ann in annotations:
+            removed_per_image[ann.image_id].add(id(ann))
+        for image_id, removed in removed_per_image.items():
+            anns = self.image_ids_to_anns.get(image_id)
+            if anns is None:
+                continue
+            anns[:] = [elem for elem in anns if id(elem) not in removed]
+            self.image_ids_to_ann_count[image_id] = len(anns)
+        self.version += 1
+
+    def remove_category(self, category_id: int):
+        category_name = self.cat_ids_to_names.pop(category_id, None)
+        if self.cat_names_to_ids.get(category_name) == category_id:
+            del self.cat_names_to_ids[category_name]
+        self.version += 1
@@ -0,0 +1,243 @@
+from array import array
+from struct import Struct
+from typing import Dict, Iterable, List, Union
+
+from pydantic import BaseModel
+
+from cocomltools.models.base import Image, Annotation, Category
+
+
+class _Record:
+    """Base of the `__slots__` records: no per-instance `__dict__`, no
+    validation, and the `model_dump` / field names of the pydantic models so
+    `COCO` and `CocoOps` use both interchangeably. Unknown keys are kept in
+    the `extra` slot of each record and written back."""
+
+    __slots__ = ()
+    model: type = BaseModel
+
+    def __getattr__(self, name: str):
+        # Only called for names missing from the slots.
+        extra = object.__getattribute__(self, "extra")
+        if extra and name in extra:
+            return extra[name]
+        raise AttributeError(name)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (_Record, BaseModel)):
+            return self.model_dump() == other.model_dump()
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{k}={v!r}" for k, v in self.model_dump().items())
+        return f"{type(self).__name__}({fields})"
+
+    def __getstate__(self):
+        return self.model_dump()
+
+    def __setstate__(self, state: Dict):
+        self.__init__(**state)
+
+    def to_model(self) -> BaseModel:
+        return self.model.model_construct(**self.model_dump())
+
+    @classmethod
+    def from_dict(cls, elem: Dict) -> "_Record":
+        return cls(**elem)
+
+    @classmethod
+    def from_model(cls, model: BaseModel) -> "_Record":
+        return cls(**model.model_dump(warnings=False))
+
+
+class ImageRecord(_Record):
+    __slots__ = ("id", "file_name", "width", "height", "extra")
+    model = Image
+
+    def __init__(self, file_name: str, width: int, height: int, id: int = 0, **extra):
+        self.id = id
+        self.file_name = file_name
+        self.width = width
+        self.height = height
+        # Extra fields (video_id, ...), None when there are none.
+        self.extra = extra or None
+
+    def model_dump(self, **kwargs) -> Dict:
+        return {
+            "id": self.id,
+            "file_name": self.file_name,
+            "width": self.width,
+            "height": self.height,
+            **(self.extra or {}),
+        }
+
+
+def _pack_values(values: Iterable[float]) -> bytes:
+    return array("d", values).tobytes()
+
+
+def _unpack_values(buffer: bytes) -> List[float]:
+    values = array("d")
+    values.frombytes(buffer)
+    return values.tolist()
+
+
+def _pack_segmentation(seg) -> tuple:
+    """(stored segmentation, nested flag) of a polygon list or RLE dict."""
+    if not seg:
+        return None, False
+    if isinstance(seg, dict):
+        return seg, False
+    if isinstance(seg[0], (list, tuple, array)):
+        # A single polygon, the common case, is kept as one bytes buffer.
+        packed = tuple(_pack_values(polygon) for polygon in seg)
+        return (packed[0] if len(packed) == 1 else packed), True
+    return _pack_values(seg), False
+
+
+# id, image_id, category_id, iscrowd, nested segmentation flag, score, area, bbox
+_ANN_STRUCT = Struct("<4qB6d")
+
+
+def _packed_field(index: int, doc: str) -> property:
+    def get(self):
+        return _ANN_STRUCT.unpack(self._packed)[index]
+
+    def set(self, value):
+        values = list(_ANN_STRUCT.unpack(self._packed))
+        values[index] = value
+        self._packed = _ANN_STRUCT.pack(*values)
+
+    return property(get, set, doc=doc)
+
+
+class AnnotationRecord(_Record):
+    """Annotation packed in two slots: one bytes buffer for every scalar and
+    the bbox, and the segmentation (packed polygons, or an RLE dict).
+
+    About a third of the memory of a pydantic `Annotation`; fields are
+    unpacked on access, so hot loops should prefer `ColumnarCOCO`.
+    """
+
+    __slots__ = ("_packed", "_segmentation", "extra")
+    model = Annotation
+
+    def __init__(
+        self,
+        image_id: int,
+        category_id: int,
+        bbox: List[float],
+        area: float,
+        id: int = 0,
+        score: float = 1.0,
+        segmentation: Union[List[float], List[List[float]], Dict, None] = None,
+        iscrowd: int = 0,
+        **extra,
+    ):
+        if len(bbox) != 4:
+            raise ValueError(f"Invalid bbox {bbox} for annotation {id}")
+        self._segmentation, nested = _pack_segmentation(segmentation)
+        self._packed = _ANN_STRUCT.pack(
+            id, image_id, category_id, iscrowd, nested, score, area, *bbox
+        )
+        self.extra = extra or None
+
+    id = _packed_field(0, "Annotation id")
+    image_id = _packed_field(1, "Image id")
+    category_id = _packed_field(2, "Category id")
+    iscrowd = _packed_field(3, "Crowd flag")
+    _nested = _packed_field(4, "Whether the segmentation is a list of polygons")
+    score = _packed_field(5, "Score")
+    area = _packed_field(6, "Area")
+
+    @property
+    def bbox(self) -> List[float]:
+        return list(_ANN_STRUCT.unpack(self._packed)[7:])
+
+    @bbox.setter
+    def bbox(self, bbox: Iterable[float]):
+        bbox = list(bbox)
+        if len(bbox) != 4:
+            raise ValueError(f"Invalid bbox {bbox} for annotation {self.id}")
+        self._packed = _ANN_STRUCT.pack(*_ANN_STRUCT.unpack(self._packed)[:7], *bbox)
+
+    @property
+    def segmentation(self) -> Union[List[float], List[List[float]], Dict]:
+        seg = self._segmentation
+        if seg is None:
+            return []
+        if isinstance(seg, bytes):
+            polygon = _unpack_values(seg)
+            return [polygon] if self._nested else polygon
+        if isinstance(seg, tuple):
+            return [_unpack_values(polygon) for polygon in seg]
+        return seg
+
+    @segmentation.setter
+    def segmentation(self, seg):
+        self._segmentation, self._nested = _pack_segmentation(seg)
+
+    def model_dump(self, **kwargs) -> Dict:
+        (
+            ann_id,
+            image_id,
+            category_id,
+            iscrowd,
+            _,
+            score,
+            area,
+            *bbox,
+        ) = _ANN_STRUCT.unpack(self._packed)
+        return {
+            "id": ann_id,
+            "image_id": image_id,
+            "category_id": category_id,
+            "score": score,
+            "bbox": bbox,
+            "segmentation": self.segmentation,
+            "area": area,
+            "iscrowd": iscrowd,
+            **(self.extra or {}),
+        }
+
+
+class CategoryRecord(_Record):
+    __slots__ = ("id", "name", "extra")
+    model = Category
+
+    def __init__(self, name: str, id: int = 0, **extra):
+        self.id = id
+        self.name = name
+        self.extra = extra or None
+
+    def model_dump(self, **kwargs) -> Dict:
+        return {"id": self.id, "name": self.name, **(self.extra or {})}
+
+
+SECTION_RECORDS = {
+    "images": ImageRecord,
+    "annotations": AnnotationRecord,
+    "categories": CategoryRecord,
+}
+MODEL_RECORDS = {
+    Image: ImageRecord,
+    Annotation: AnnotationRecord,
+    Category: CategoryRecord,
+}
+
+
+def to_records(elems: Iterable[Union[BaseModel, _Record]]) -> List[_Record]:
+    """Slotted records of pydantic models, records are kept as is."""
+    return [
+        (
+            elem
+            if isinstance(elem, _Record)
+            else MODEL_RECORDS[type(elem)].from_model(elem)
+        )
+        for elem in elems
+    ]
+
+
+def to_models(elems: Iterable[Union[BaseModel, _Record]]) -> List[BaseModel]:
+    """Pydantic models of records, for API boundaries; models are kept as is."""
+    return [elem.to_model() if isinstance(elem, _Record) else elem for elem in elems]
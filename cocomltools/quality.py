@@ -0,0 +1,194 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from cocomltools.utils import annotation_image_rows
+
+# Groups up to this size get a full IoU matrix, larger ones a sort-and-sweep.
+DENSE_IOU_MAX_BOXES = 256
+
+
+def _iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    inter_w = np.minimum(a[..., 0] + a[..., 2], b[..., 0] + b[..., 2]) - np.maximum(
+        a[..., 0], b[..., 0]
+    )
+    inter_h = np.minimum(a[..., 1] + a[..., 3], b[..., 1] + b[..., 3]) - np.maximum(
+        a[..., 1], b[..., 1]
+    )
+    inter = np.clip(inter_w, 0, None) * np.clip(inter_h, 0, None)
+    union = a[..., 2] * a[..., 3] + b[..., 2] * b[..., 3] - inter
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(union > 0, inter / union, 0.0)
+
+
+def iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """IoU of every pair of coco (x, y, w, h) boxes, with broadcasting."""
+    return _iou(boxes_a[:, None, :], boxes_b[None, :, :])
+
+
+def pair_iou(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """IoU of row aligned pairs of coco boxes."""
+    return _iou(boxes_a, boxes_b)
+
+
+def candidate_pairs(boxes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Pairs of boxes whose x-intervals intersect, found with a sort-and-sweep.
+
+    Boxes are sorted by x1 and each box is paired with the following boxes
+    starting before its x2, so the output stays linear in the number of real
+    candidates instead of quadratic in the number of boxes.
+    """
+    order = np.argsort(boxes[:, 0], kind="stable")
+    x1 = boxes[order, 0]
+    x2 = x1 + boxes[order, 2]
+    starts = np.arange(1, len(boxes))
+    ends = np.searchsorted(x1, x2[:-1], side="left")
+    counts = np.clip(ends - starts, 0, None)
+    first = np.repeat(np.arange(len(boxes) - 1), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    second = np.repeat(starts, counts) + offsets
+    return order[first], order[second]
+
+
+def overlap_pairs(
+    boxes: np.ndarray, iou_threshold: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(first, second, iou) of the box pairs with IoU >= iou_threshold."""
+    if len(boxes) <= DENSE_IOU_MAX_BOXES:
+        first, second = np.triu_indices(len(boxes), k=1)
+        ious = iou_matrix(boxes, boxes)[first, second]
+    else:
+        first, second = candidate_pairs(boxes)
+        ious = pair_iou(boxes[first], boxes[second])
+    keep = ious >= iou_threshold
+    return first[keep], second[keep], ious[keep]
+
+
+def _groups_overlaps(
+    bboxes: np.ndarray, group_offsets: np.ndarray, iou_threshold: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Overlapping pairs within each `bboxes[offsets[k]:offsets[k + 1]]` group."""
+    firsts, seconds, ious = [], [], []
+    for start, end in zip(group_offsets[:-1].tolist(), group_offsets[1:].tolist()):
+        if end - start < 2:
+            continue
+        first, second, iou = overlap_pairs(bboxes[start:end], iou_threshold)
+        firsts.append(first + start)
+        seconds.append(second + start)
+        ious.append(iou)
+    if not firsts:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0)
+    return np.concatenate(firsts), np.concatenate(seconds), np.concatenate(ious)
+
+
+def quality_stats(
+    ann_ids: np.ndarray,
+    image_ids: np.ndarray,
+    widths: np.ndarray,
+    heights: np.ndarray,
+    ann_image_ids: np.ndarray,
+    ann_category_ids: np.ndarray,
+    bboxes: np.ndarray,
+    cat_ids_to_names: Dict[int, str],
+    iou_threshold: float = 0.5,
+    duplicate_iou: float = 0.95,
+    max_workers: int = 1,
+    chunk_size: int = 4096,
+) -> dict:
+    """Box quality report per category.
+
+    Counts degenerate boxes (non positive width or height), boxes going out
+    of their image, exact duplicates, and pairs of boxes of the same image
+    and category overlapping with IoU >= iou_threshold (overlaps) or
+    >= duplicate_iou (near duplicates). Pairs are counted on the category of
+    their boxes, and near duplicate annotation ids are listed for cleanup.
+    Groups of boxes are processed in chunks, in parallel with `max_workers`.
+    """
+    # Annotations of missing images have no image to be checked against.
+    image_rows = annotation_image_rows(image_ids, ann_image_ids)
+    matched = image_rows >= 0
+    if not matched.all():
+        image_rows, ann_ids = image_rows[matched], ann_ids[matched]
+        ann_category_ids, bboxes = ann_category_ids[matched], bboxes[matched]
+    cat_ids = np.unique(ann_category_ids)
+    cat_rows = np.searchsorted(cat_ids, ann_category_ids)
+    num_cats = len(cat_ids)
+
+    x, y, w, h = bboxes.T
+    degenerate = (w <= 0) | (h <= 0)
+    out_of_bounds = (
+        (x < 0) | (y < 0) | (x + w > widths[image_rows]) | (y + h > heights[image_rows])
+    )
+
+    # Every copy after the first one of a box is an exact duplicate.
+    exact_duplicates = np.zeros(num_cats, dtype=np.int64)
+    if len(bboxes):
+        unique_keys, key_counts = np.unique(
+            np.column_stack([image_rows, cat_rows, bboxes]), axis=0, return_counts=True
+        )
+        exact_duplicates = np.bincount(
+            unique_keys[:, 1].astype(np.int64),
+            weights=key_counts - 1,
+            minlength=num_cats,
+        ).astype(np.int64)
+
+    order = np.lexsort((cat_rows, image_rows))
+    sorted_bboxes = bboxes[order]
+    group_keys = image_rows[order] * num_cats + cat_rows[order]
+    group_offsets = np.flatnonzero(np.diff(group_keys)) + 1
+    group_offsets = np.concatenate([[0], group_offsets, [len(order)]]).astype(np.int64)
+    chunks = [
+        group_offsets[start : start + chunk_size + 1]
+        for start in range(0, max(len(group_offsets) - 1, 1), chunk_size)
+    ]
+    if max_workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(
+                executor.map(
+                    _groups_overlaps,
+                    [sorted_bboxes[offsets[0] : offsets[-1]] for offsets in chunks],
+                    [offsets - offsets[0] for offsets in chunks],
+                    [iou_threshold] * len(chunks),
+                )
+            )
+        results = [
+            (first + offsets[0], second + offsets[0], ious)
+            for (first, second, ious), offsets in zip(results, chunks)
+        ]
+    else:
+        results = [
+            _groups_overlaps(sorted_bboxes, offsets, iou_threshold)
+            for offsets in chunks
+        ]
+    first = order[np.concatenate([result[0] for result in results])]
+    second = order[np.concatenate([result[1] for result in results])]
+    ious = np.concatenate([result[2] for result in results])
+    duplicates = ious >= duplicate_iou
+
+    def per_category(mask: np.ndarray, rows: np.ndarray = cat_rows) -> List[int]:
+        return np.bincount(rows[mask], minlength=num_cats).tolist()
+
+    columns = {
+        "num_annotations": np.bincount(cat_rows, minlength=num_cats).tolist(),
+        "degenerate": per_category(degenerate),
+        "out_of_bounds": per_category(out_of_bounds),
+        "exact_duplicates": exact_duplicates.tolist(),
+        "near_duplicates": per_category(duplicates, cat_rows[first]),
+        "overlaps": per_category(np.ones(len(ious), bool), cat_rows[first]),
+    }
+    table = [
+        {
+            "category": cat_ids_to_names.get(cat_id, str(cat_id)),
+            **{name: values[row] for name, values in columns.items()},
+        }
+        for row, cat_id in enumerate(cat_ids.tolist())
+    ]
+    return {
+        "table": table,
+        "total": {name: int(sum(values)) for name, values in columns.items()},
+        "duplicate_pairs": np.column_stack(
+            [ann_ids[first[duplicates]], ann_ids[second[duplicates]]]
+        ).tolist(),
+    }
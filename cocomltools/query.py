@@ -0,0 +1,199 @@
+import re
+from functools import cached_property
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from cocomltools.logger import logger
+
+RANGE_FIELDS = ("score", "area")
+RANGE_OPS = ("lt", "le", "gt", "ge")
+
+_EXPRESSION_TERM = re.compile(r"^\s*(\w+)\s*(<=|>=|!=|=|<|>)\s*(.+?)\s*$")
+_EXPRESSION_OPS = {"<": "lt", "<=": "le", ">": "gt", ">=": "ge"}
+
+
+class AnnotationIndex:
+    """Secondary indexes over annotation columns for predicate queries.
+
+    Holds category -> rows buckets and sorted score/area arrays. A query
+    starts from the most selective index lookup and evaluates the remaining
+    predicates only on those candidate rows.
+    """
+
+    def __init__(
+        self,
+        image_ids: np.ndarray,
+        category_ids: np.ndarray,
+        scores: np.ndarray,
+        areas: np.ndarray,
+        iscrowd: np.ndarray,
+    ):
+        self.image_ids = image_ids
+        self.category_ids = category_ids
+        self.iscrowd = iscrowd
+        self.columns = {"score": scores, "area": areas}
+
+        order = np.argsort(category_ids, kind="stable")
+        cat_values, starts = np.unique(category_ids[order], return_index=True)
+        ends = np.append(starts[1:], len(order))
+        self.category_rows = {
+            cat_id: order[start:end]
+            for cat_id, start, end in zip(cat_values.tolist(), starts, ends)
+        }
+        self.sorted_orders = {}
+        self.sorted_values = {}
+        for field, values in self.columns.items():
+            self.sorted_orders[field] = np.argsort(values, kind="stable")
+            self.sorted_values[field] = values[self.sorted_orders[field]]
+
+    def __len__(self) -> int:
+        return len(self.category_ids)
+
+    def _range_rows(self, field: str, bounds: Dict[str, float]) -> np.ndarray:
+        sorted_values = self.sorted_values[field]
+        start, end = 0, len(sorted_values)
+        if "gt" in bounds:
+            start = max(start, np.searchsorted(sorted_values, bounds["gt"], "right"))
+        if "ge" in bounds:
+            start = max(start, np.searchsorted(sorted_values, bounds["ge"], "left"))
+        if "lt" in bounds:
+            end = min(end, np.searchsorted(sorted_values, bounds["lt"], "left"))
+        if "le" in bounds:
+            end = min(end, np.searchsorted(sorted_values, bounds["le"], "right"))
+        return self.sorted_orders[field][start : max(start, end)]
+
+    def select(
+        self,
+        category_ids: Optional[Sequence[int]] = None,
+        ranges: Optional[Dict[str, Dict[str, float]]] = None,
+        iscrowd: Optional[int] = None,
+    ) -> np.ndarray:
+        """Return the sorted rows matching every given constraint."""
+        ranges = {field: bounds for field, bounds in (ranges or {}).items() if bounds}
+        candidates = []
+        if category_ids is not None:
+            buckets = [
+                self.category_rows[cat_id]
+                for cat_id in category_ids
+                if cat_id in self.category_rows
+            ]
+            candidates.append(
+                np.concatenate(buckets) if buckets else np.zeros(0, dtype=np.int64)
+            )
+        for field, bounds in ranges.items():
+            candidates.append(self._range_rows(field, bounds))
+
+        if not candidates:
+            rows = np.arange(len(self), dtype=np.int64)
+        else:
+            rows = min(candidates, key=len)
+
+        mask = np.ones(len(rows), dtype=bool)
+        if category_ids is not None:
+            mask &= np.isin(self.category_ids[rows], list(category_ids))
+        for field, bounds in ranges.items():
+            values = self.columns[field][rows]
+            if "gt" in bounds:
+                mask &= values > bounds["gt"]
+            if "ge" in bounds:
+                mask &= values >= bounds["ge"]
+            if "lt" in bounds:
+                mask &= values < bounds["lt"]
+            if "le" in bounds:
+                mask &= values <= bounds["le"]
+        if iscrowd is not None:
+            mask &= self.iscrowd[rows] == iscrowd
+        return np.sort(rows[mask])
+
+    @cached_property
+    def image_ann_counts(self) -> Tuple[np.ndarray, np.ndarray]:
+        return np.unique(self.image_ids, return_counts=True)
+
+
+def query_ranges(**kwargs) -> Dict[str, Dict[str, float]]:
+    """Group `score_lt=..., area_between=(lo, hi)` style kwargs per field."""
+    ranges = {field: {} for field in RANGE_FIELDS}
+    for key, value in kwargs.items():
+        if value is None:
+            continue
+        field, _, op = key.partition("_")
+        if field not in RANGE_FIELDS:
+            raise ValueError(f"Unknown query argument: {key}")
+        if op == "between":
+            ranges[field]["ge"], ranges[field]["le"] = value
+        elif op in RANGE_OPS:
+            ranges[field][op] = value
+        else:
+            raise ValueError(f"Unknown query argument: {key}")
+    return ranges
+
+
+def parse_query_expression(expression: str) -> Dict[str, Union[float, int, List]]:
+    """Parse `"category=person,score<0.3,area>=1024"` into query kwargs.
+
+    Terms are comma separated and combined with AND. Supported fields are
+    category (=), iscrowd (=), score and area (<, <=, >, >=).
+    """
+    query = {}
+    for term in expression.split(","):
+        if not term.strip():
+            continue
+        match = _EXPRESSION_TERM.match(term)
+        if match is None:
+            raise ValueError(f"Invalid query term: '{term}'")
+        field, op, value = match.groups()
+        if field == "category" and op == "=":
+            query.setdefault("category", []).append(value)
+        elif field == "iscrowd" and op == "=":
+            query["iscrowd"] = int(value)
+        elif field in RANGE_FIELDS and op in _EXPRESSION_OPS:
+            query[f"{field}_{_EXPRESSION_OPS[op]}"] = float(value)
+        else:
+            raise ValueError(f"Unsupported query term: '{term}'")
+    return query
+
+
+def select_rows(
+    index: AnnotationIndex,
+    cat_names_to_ids: Dict[str, int],
+    category: Optional[Union[str, int, Sequence[Union[str, int]]]] = None,
+    iscrowd: Optional[int] = None,
+    **range_kwargs,
+) -> np.ndarray:
+    category_ids = None
+    if category is not None:
+        categories = [category] if isinstance(category, (str, int)) else category
+        category_ids = []
+        for cat in categories:
+            if isinstance(cat, int):
+                category_ids.append(cat)
+            elif cat in cat_names_to_ids:
+                category_ids.append(cat_names_to_ids[cat])
+            else:
+                logger.warning(f"No category found with {cat} in coco - skipping")
+    return index.select(category_ids, query_ranges(**range_kwargs), iscrowd)
+
+
+def filter_by_ann_count(
+    image_ids: Sequence[int],
+    index: AnnotationIndex,
+    anns_gt: Optional[int] = None,
+    anns_lt: Optional[int] = None,
+) -> np.ndarray:
+    """Return the positions in `image_ids` whose annotation count is in range."""
+    image_ids = np.asarray(image_ids, dtype=np.int64)
+    ids_with_anns, counts = index.image_ann_counts
+    image_counts = np.zeros(len(image_ids), dtype=np.int64)
+    if len(ids_with_anns):
+        positions = np.minimum(
+            np.searchsorted(ids_with_anns, image_ids), len(ids_with_anns) - 1
+        )
+        found = ids_with_anns[positions] == image_ids
+        image_counts[found] = counts[positions[found]]
+    mask = np.ones(len(image_ids), dtype=bool)
+    if anns_gt is not None:
+        mask &= image_counts > anns_gt
+    if anns_lt is not None:
+        mask &= image_counts < anns_lt
+    return np.flatnonzero(mask)
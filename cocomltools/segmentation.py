@@ -0,0 +1,440 @@
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from cocomltools.models.columnar import RaggedSegmentation
+
+Segmentation = Union[List[float], List[List[float]], Dict]
+# A 64-bit count never needs more 5-bit chunks than this.
+_MAX_CHUNKS = 13
+
+
+def _segment_positions(offsets: np.ndarray) -> np.ndarray:
+    """Position of every element inside its `offsets` segment."""
+    lengths = np.diff(offsets)
+    return np.arange(offsets[-1], dtype=np.int64) - np.repeat(offsets[:-1], lengths)
+
+
+def _segmented_cumsum(values: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """Cumulative sum of `values` restarting at every segment of `offsets`."""
+    total = np.cumsum(values)
+    before = np.concatenate([[0], total])[offsets[:-1]]
+    return total - np.repeat(before, np.diff(offsets))
+
+
+def _encode_counts(counts: np.ndarray, offsets: np.ndarray) -> List[str]:
+    """Compressed strings of the run lengths `counts[offsets[i]:offsets[i + 1]]`.
+
+    Same format as pycocotools' `rleToString`: from the fourth run on, each
+    count is stored minus the count two runs before, then written as 5-bit
+    little-endian chunks with a continuation bit (0x20) and, on the last chunk,
+    a sign bit (0x10), offset by 48 to printable ASCII. Every count of every
+    mask is encoded at once.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    values = counts.copy()
+    values[3:] -= counts[1:-2]
+    # The first three counts of each mask are stored as is.
+    firsts = (offsets[:-1, None] + np.arange(3)).ravel()
+    firsts = firsts[firsts < np.repeat(offsets[1:], 3)]
+    values[firsts] = counts[firsts]
+
+    # A value takes k chunks when -2^(5k-1) <= value < 2^(5k-1).
+    magnitudes = np.where(values < 0, ~values, values)
+    num_chunks = np.ones(len(values), dtype=np.int64)
+    for index in range(1, _MAX_CHUNKS):
+        longer = magnitudes >= 1 << (5 * index - 1)
+        if not longer.any():
+            break
+        num_chunks += longer
+    chunk_offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum(num_chunks, out=chunk_offsets[1:])
+    chars = np.empty(chunk_offsets[-1], dtype=np.uint8)
+    rows = np.arange(len(values))
+    for index in range(_MAX_CHUNKS):
+        if index:
+            rows = rows[num_chunks[rows] > index]
+        if not len(rows):
+            break
+        chunk = (values[rows] >> 5 * index) & 0x1F
+        more = num_chunks[rows] > index + 1
+        chars[chunk_offsets[rows] + index] = chunk + 48 + 0x20 * more
+
+    text = chars.tobytes().decode()
+    char_offsets = chunk_offsets[offsets].tolist()
+    return [text[start:end] for start, end in zip(char_offsets, char_offsets[1:])]
+
+
+def _decode_counts(
+    strings: Sequence[Union[str, bytes]],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """(counts, offsets) of compressed RLE strings, decoded in one pass."""
+    encoded = [s.encode() if isinstance(s, str) else bytes(s) for s in strings]
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.int64) - 48
+    if np.any((data < 0) | (data > 0x3F)):
+        raise ValueError("Invalid character in compressed RLE counts")
+    char_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(s) for s in encoded], out=char_offsets[1:])
+
+    last_chunks = (data & 0x20) == 0
+    # A count never spans two strings, their last chunk ends a count.
+    if np.any(~last_chunks[char_offsets[1:][np.diff(char_offsets) > 0] - 1]):
+        raise ValueError("Truncated compressed RLE counts")
+    ends = np.flatnonzero(last_chunks)
+    starts = np.concatenate([[0], ends[:-1] + 1])[: len(ends)]
+    num_chunks = ends - starts + 1
+    shifts = 5 * (np.arange(len(data)) - np.repeat(starts, num_chunks))
+    values = (
+        np.add.reduceat((data & 0x1F) << shifts, starts)
+        if len(data)
+        else np.zeros(0, dtype=np.int64)
+    )
+    negative = (data[ends] & 0x10) != 0
+    values[negative] -= np.left_shift(1, 5 * num_chunks[negative])
+
+    # Undo the delta coding, separately along the odd and the even runs.
+    offsets = np.searchsorted(ends, char_offsets, side="left")
+    positions = _segment_positions(offsets)
+    chains = np.repeat(np.arange(len(encoded)), np.diff(offsets)) * 3 + np.where(
+        positions == 0, 0, 2 - positions % 2
+    )
+    order = np.lexsort((positions, chains))
+    chains = chains[order]
+    chain_offsets = np.concatenate(
+        [[0], np.flatnonzero(chains[1:] != chains[:-1]) + 1, [len(chains)]]
+    )
+    counts = np.empty_like(values)
+    counts[order] = _segmented_cumsum(values[order], chain_offsets)
+    return counts, offsets
+
+
+def encode_counts(counts: Sequence[int]) -> str:
+    """pycocotools compressed string of uncompressed RLE counts."""
+    counts = np.asarray(counts, dtype=np.int64)
+    return _encode_counts(counts, np.array([0, len(counts)]))[0]
+
+
+def decode_counts(counts: Union[str, bytes]) -> np.ndarray:
+    """Uncompressed RLE counts of a pycocotools compressed string."""
+    return _decode_counts([counts])[0]
+
+
+def mask_to_rle(mask: np.ndarray) -> Dict:
+    """Compressed RLE of a (height, width) binary mask."""
+    mask = np.asarray(mask)
+    height, width = mask.shape
+    pixels = mask.ravel(order="F") != 0
+    changes = np.flatnonzero(pixels[1:] != pixels[:-1]) + 1
+    counts = np.diff(np.concatenate([[0], changes, [pixels.size]]))
+    if pixels.size and pixels[0]:
+        # RLE counts always start with a (possibly empty) background run.
+        counts = np.concatenate([[0], counts])
+    return {"size": [height, width], "counts": encode_counts(counts)}
+
+
+def rle_counts(rle: Dict) -> np.ndarray:
+    """Run lengths of a compressed or uncompressed RLE."""
+    counts = rle["counts"]
+    if isinstance(counts, (str, bytes)):
+        return decode_counts(counts)
+    return np.asarray(counts, dtype=np.int64)
+
+
+def rle_to_mask(rle: Dict) -> np.ndarray:
+    """(height, width) uint8 mask of a compressed or uncompressed RLE."""
+    height, width = rle["size"]
+    counts = rle_counts(rle)
+    pixels = np.repeat(np.arange(len(counts), dtype=np.uint8) % 2, counts)
+    if len(pixels) != height * width:
+        raise ValueError(f"RLE counts cover {len(pixels)} pixels, not {height * width}")
+    return np.ascontiguousarray(pixels.reshape(width, height).T)
+
+
+def _merge_runs(
+    run_rows: np.ndarray, starts: np.ndarray, ends: np.ndarray, sizes: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Union of the [start, end) runs of every mask, sorted and merged.
+
+    Masks are laid end to end with a one pixel gap, so runs of two masks
+    never touch and one global sort merges every mask at once.
+    """
+    bases = np.zeros(len(sizes), dtype=np.int64)
+    np.cumsum(sizes[:-1] + 1, out=bases[1:])
+    global_starts = bases[run_rows] + starts
+    global_ends = bases[run_rows] + ends
+    order = np.argsort(global_starts, kind="stable")
+    global_starts, global_ends = global_starts[order], global_ends[order]
+    reach = np.maximum.accumulate(global_ends) if len(global_ends) else global_ends
+    first = np.flatnonzero(
+        np.concatenate([[True], global_starts[1:] > reach[:-1]])
+        if len(global_starts)
+        else np.zeros(0, dtype=bool)
+    )
+    merged_starts = global_starts[first]
+    merged_ends = reach[np.concatenate([first[1:] - 1, [len(reach) - 1]])[: len(first)]]
+    rows = np.searchsorted(bases, merged_starts, side="right") - 1
+    return rows, merged_starts - bases[rows], merged_ends - bases[rows]
+
+
+def _polygon_runs(
+    poly_rows: np.ndarray,
+    poly_offsets: np.ndarray,
+    values: np.ndarray,
+    heights: np.ndarray,
+    widths: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Column-major foreground runs of every polygon, rasterized at once.
+
+    A pixel is inside when its center is, by the even-odd rule. Every edge
+    is intersected with the centers of the pixel columns it spans; sorting
+    the crossings by polygon, column and row pairs them into the vertical
+    spans of each column, which are already RLE runs.
+    """
+    num_vertices = np.diff(poly_offsets) // 2
+    num_vertices[num_vertices < 3] = 0
+    vertex_polys = np.repeat(np.arange(len(num_vertices)), num_vertices)
+    vertex_index = _segment_positions(np.concatenate([[0], np.cumsum(num_vertices)]))
+    poly_starts = poly_offsets[:-1][vertex_polys]
+    current = poly_starts + 2 * vertex_index
+    following = poly_starts + 2 * ((vertex_index + 1) % num_vertices[vertex_polys])
+    x0, y0 = values[current], values[current + 1]
+    x1, y1 = values[following], values[following + 1]
+
+    # Columns whose center lies in [min x, max x) of the edge.
+    edge_rows = poly_rows[vertex_polys]
+    first_columns = np.maximum(np.ceil(np.minimum(x0, x1) - 0.5), 0)
+    end_columns = np.minimum(np.ceil(np.maximum(x0, x1) - 0.5), widths[edge_rows])
+    num_columns = np.maximum(end_columns - first_columns, 0).astype(np.int64)
+    edges = np.repeat(np.arange(len(x0)), num_columns)
+    columns = first_columns[edges].astype(np.int64) + _segment_positions(
+        np.concatenate([[0], np.cumsum(num_columns)])
+    )
+    x0, y0, x1, y1 = x0[edges], y0[edges], x1[edges], y1[edges]
+    ys = y0 + (columns + 0.5 - x0) * (y1 - y0) / (x1 - x0)
+    polys = vertex_polys[edges]
+    rows = poly_rows[polys]
+    # First row whose center is below the crossing. Sorting these rows
+    # instead of the ys gives the same spans, ties pair the same rows.
+    crossing_rows = np.clip(np.ceil(ys - 0.5), 0, heights[rows]).astype(np.int64)
+
+    max_rows = int(heights.max()) + 1 if len(heights) else 1
+    max_columns = int(widths.max()) if len(widths) else 1
+    order = np.argsort((polys * max_columns + columns) * max_rows + crossing_rows)
+    # Crossings of a polygon column come in (enter, leave) pairs.
+    enters, leaves = order[0::2], order[1::2]
+    rows, columns = rows[enters], columns[enters]
+    heights = heights[rows]
+    first_rows, end_rows = crossing_rows[enters], crossing_rows[leaves]
+    spans = end_rows > first_rows
+    base = columns[spans] * heights[spans]
+    return rows[spans], base + first_rows[spans], base + end_rows[spans]
+
+
+def _counts_runs(
+    counts: np.ndarray, offsets: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(mask, start, end) of the non-empty foreground runs of RLE counts."""
+    ends = _segmented_cumsum(counts, offsets)
+    foreground = (_segment_positions(offsets) % 2 == 1) & (counts > 0)
+    masks = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    return masks[foreground], (ends - counts)[foreground], ends[foreground]
+
+
+class MaskRuns:
+    """Foreground runs of the masks of many annotations.
+
+    Runs are [start, end) ranges of column-major pixel indices, the layout of
+    COCO RLE, sorted and merged per annotation. Areas, bboxes and compressed
+    RLEs of every mask are computed from them with array operations, without
+    materializing any mask. `has_mask` is False for annotations without
+    segmentation, whose areas and bboxes are 0.
+    """
+
+    def __init__(
+        self,
+        rows: np.ndarray,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        heights: np.ndarray,
+        widths: np.ndarray,
+        has_mask: np.ndarray,
+    ):
+        self.rows = rows
+        self.starts = starts
+        self.ends = ends
+        self.heights = heights
+        self.widths = widths
+        self.has_mask = has_mask
+
+    def __len__(self) -> int:
+        return len(self.has_mask)
+
+    @classmethod
+    def from_segmentations(
+        cls,
+        segmentations: Union[RaggedSegmentation, Sequence[Segmentation]],
+        heights: Sequence[int],
+        widths: Sequence[int],
+    ) -> "MaskRuns":
+        """Runs of polygons and RLEs, in images of size (`heights`, `widths`).
+
+        The size of an RLE is the one it carries.
+        """
+        if not isinstance(segmentations, RaggedSegmentation):
+            segmentations = RaggedSegmentation.from_lists(segmentations)
+        heights = np.array(heights, dtype=np.int64)
+        widths = np.array(widths, dtype=np.int64)
+        num_polygons = np.diff(segmentations.ann_offsets)
+        has_mask = num_polygons > 0
+
+        rle_rows = np.zeros(0, dtype=np.int64)
+        rles = []
+        if segmentations.rles is not None:
+            rle_rows = np.flatnonzero(
+                np.fromiter(
+                    (rle is not None for rle in segmentations.rles.tolist()),
+                    bool,
+                    len(segmentations),
+                )
+            )
+            rles = segmentations.rles[rle_rows].tolist()
+            has_mask[rle_rows] = True
+            heights[rle_rows] = [rle["size"][0] for rle in rles]
+            widths[rle_rows] = [rle["size"][1] for rle in rles]
+
+        poly_rows = np.repeat(np.arange(len(segmentations)), num_polygons)
+        runs = [
+            _polygon_runs(
+                poly_rows,
+                segmentations.poly_offsets,
+                np.asarray(segmentations.values, dtype=np.float64),
+                heights,
+                widths,
+            )
+        ]
+        if rles:
+            runs.append(_rle_runs(rle_rows, rles))
+        rows, starts, ends = (np.concatenate(parts) for parts in zip(*runs))
+        return cls(
+            *_merge_runs(rows, starts, ends, heights * widths),
+            heights=heights,
+            widths=widths,
+            has_mask=has_mask,
+        )
+
+    def areas(self) -> np.ndarray:
+        return np.bincount(
+            self.rows, weights=self.ends - self.starts, minlength=len(self)
+        )
+
+    def bboxes(self) -> np.ndarray:
+        """[x, y, width, height] pixel extents of every mask."""
+        heights = self.heights[self.rows]
+        first_columns, first_rows = np.divmod(self.starts, heights)
+        last_columns, last_rows = np.divmod(self.ends - 1, heights)
+        # A run spanning several columns covers every row between them.
+        spanning = last_columns > first_columns
+        first_rows[spanning] = 0
+        last_rows[spanning] = heights[spanning] - 1
+
+        bboxes = np.zeros((len(self), 4), dtype=np.float64)
+        if not len(self.rows):
+            return bboxes
+        # Runs are sorted by mask, so every mask is one reduceat segment.
+        masks, segments = np.unique(self.rows, return_index=True)
+        x_min = first_columns[segments]
+        x_max = last_columns[np.concatenate([segments[1:], [len(self.rows)]]) - 1]
+        y_min = np.minimum.reduceat(first_rows, segments)
+        y_max = np.maximum.reduceat(last_rows, segments)
+        bboxes[masks] = np.stack(
+            [x_min, y_min, x_max - x_min + 1, y_max - y_min + 1], axis=1
+        )
+        return bboxes
+
+    def counts(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(counts, offsets) of the uncompressed RLE of every mask."""
+        num_runs = np.bincount(self.rows, minlength=len(self))
+        # Boundaries of mask i: 0, start, end, ..., start, end, height * width.
+        bound_offsets = np.zeros(len(self) + 1, dtype=np.int64)
+        np.cumsum(2 * num_runs + 2, out=bound_offsets[1:])
+        bounds = np.empty(bound_offsets[-1], dtype=np.int64)
+        bounds[bound_offsets[:-1]] = 0
+        bounds[bound_offsets[1:] - 1] = self.heights * self.widths
+        run_index = _segment_positions(np.concatenate([[0], np.cumsum(num_runs)]))
+        run_slots = bound_offsets[self.rows] + 1 + 2 * run_index
+        bounds[run_slots] = self.starts
+        bounds[run_slots + 1] = self.ends
+
+        counts = np.diff(bounds)
+        keep = np.ones(len(counts), dtype=bool)
+        # Differences across two masks, and empty trailing background runs.
+        keep[bound_offsets[1:-1] - 1] = False
+        last = bound_offsets[1:] - 2
+        keep[last[(counts[last] == 0) & (num_runs > 0)]] = False
+        lengths = 2 * num_runs + 1 - ((counts[last] == 0) & (num_runs > 0))
+        offsets = np.zeros(len(self) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return counts[keep], offsets
+
+    def to_rles(self) -> List[Optional[Dict]]:
+        """Compressed RLE of every mask, None for annotations without one."""
+        strings = _encode_counts(*self.counts())
+        return [
+            {"size": [height, width], "counts": string} if has_mask else None
+            for height, width, string, has_mask in zip(
+                self.heights.tolist(),
+                self.widths.tolist(),
+                strings,
+                self.has_mask.tolist(),
+            )
+        ]
+
+    def mask(self, row: int) -> np.ndarray:
+        """(height, width) uint8 mask of annotation `row`."""
+        height, width = int(self.heights[row]), int(self.widths[row])
+        start, end = np.searchsorted(self.rows, [row, row + 1])
+        edges = np.zeros(height * width + 1, dtype=np.int8)
+        edges[self.starts[start:end]] = 1
+        edges[self.ends[start:end]] -= 1
+        pixels = np.cumsum(edges[:-1], dtype=np.int8).astype(np.uint8)
+        return np.ascontiguousarray(pixels.reshape(width, height).T)
+
+
+def _rle_runs(rows: np.ndarray, rles: List[Dict]) -> Tuple[np.ndarray, ...]:
+    """Runs of RLEs, compressed strings being decoded together."""
+    compressed = [
+        index
+        for index, rle in enumerate(rles)
+        if isinstance(rle["counts"], (str, bytes))
+    ]
+    parts = []
+    if compressed:
+        counts, offsets = _decode_counts(
+            [rles[index]["counts"] for index in compressed]
+        )
+        masks, starts, ends = _counts_runs(counts, offsets)
+        parts.append((rows[compressed][masks], starts, ends))
+    compressed = set(compressed)
+    uncompressed = [index for index in range(len(rles)) if index not in compressed]
+    if uncompressed:
+        lists = [rles[index]["counts"] for index in uncompressed]
+        offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+        np.cumsum([len(counts) for counts in lists], out=offsets[1:])
+        counts = np.fromiter(
+            (count for counts in lists for count in counts), np.int64, offsets[-1]
+        )
+        masks, starts, ends = _counts_runs(counts, offsets)
+        parts.append((rows[uncompressed][masks], starts, ends))
+    return tuple(np.concatenate(part) for part in zip(*parts))
+
+
+def segmentation_to_rle(segmentation: Segmentation, height: int, width: int) -> Dict:
+    """Compressed RLE of a polygon list or RLE, in an image of that size."""
+    return MaskRuns.from_segmentations([segmentation], [height], [width]).to_rles()[0]
+
+
+def segmentation_to_mask(
+    segmentation: Segmentation, height: int, width: int
+) -> np.ndarray:
+    """(height, width) uint8 mask of a polygon list or RLE."""
+    return MaskRuns.from_segmentations([segmentation], [height], [width]).mask(0)
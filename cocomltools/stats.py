@@ -0,0 +1,347 @@
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from cocomltools.json_io import iter_coco_records
+from cocomltools.utils import annotation_image_rows
+
+# Relative bbox sizes live in [0, 1], larger values (bbox outside of the image)
+# are counted in the last bin.
+RELATIVE_SIZE_RANGE = (0.0, 1.0)
+
+
+def histogram(
+    values: np.ndarray, bins: int, value_range: Optional[tuple] = None
+) -> Dict[str, list]:
+    """Pre-binned histogram, `counts[i]` values fall in `[edges[i], edges[i+1])`."""
+    if value_range is None:
+        value_range = (
+            (float(values.min()), float(values.max())) if len(values) else (0.0, 1.0)
+        )
+    else:
+        values = np.clip(values, *value_range)
+    counts, edges = np.histogram(values, bins=bins, range=value_range)
+    return {"edges": edges.tolist(), "counts": counts.tolist()}
+
+
+def coco_stats(
+    image_ids: np.ndarray,
+    widths: np.ndarray,
+    heights: np.ndarray,
+    ann_image_ids: np.ndarray,
+    ann_category_ids: np.ndarray,
+    scores: np.ndarray,
+    bboxes: np.ndarray,
+    cat_ids_to_names: Dict[int, str],
+    histogram_bins: Optional[int] = None,
+) -> dict:
+    """Dataset statistics computed with NumPy over annotation columns.
+
+    Annotations are mapped to image / category rows with a binary search and
+    counted with `bincount`, without any Python loop over annotations. With
+    `histogram_bins`, bbox and image sizes are returned as fixed size
+    histograms instead of one point per annotation / image.
+    """
+    stats = {
+        "num_images": len(image_ids),
+        "num_annotations": len(ann_image_ids),
+        "num_categories": len(cat_ids_to_names),
+    }
+
+    # Annotations of missing images count for their category only.
+    image_rows = annotation_image_rows(image_ids, ann_image_ids)
+    matched = image_rows >= 0
+    image_rows = image_rows[matched]
+    objs_per_image = np.bincount(image_rows, minlength=len(image_ids))
+    objs_per_image = objs_per_image[objs_per_image > 0]
+    stats["avg_obj_per_image"] = (
+        int(objs_per_image.mean()) if len(objs_per_image) else 0
+    )
+    stats["min_obj_per_image"] = int(objs_per_image.min()) if len(objs_per_image) else 0
+    stats["max_obj_per_image"] = int(objs_per_image.max()) if len(objs_per_image) else 0
+
+    cat_ids = np.unique(ann_category_ids)
+    cat_rows = np.searchsorted(cat_ids, ann_category_ids)
+    cat_counts = np.bincount(cat_rows, minlength=len(cat_ids))
+    score_sums = np.bincount(cat_rows, weights=scores, minlength=len(cat_ids))
+    stats["class_scores"] = dict(
+        zip(cat_ids.tolist(), (score_sums / np.maximum(cat_counts, 1)).tolist())
+    )
+    stats["count_objs_per_categ"] = dict(zip(cat_ids.tolist(), cat_counts.tolist()))
+    stats["categories"] = [cat_ids_to_names[cat_id] for cat_id in cat_ids.tolist()]
+
+    relative_widths = bboxes[matched, 2] / widths[image_rows]
+    relative_heights = bboxes[matched, 3] / heights[image_rows]
+    if histogram_bins is None:
+        stats["ann_width_heights"] = np.column_stack(
+            [relative_widths, relative_heights, ann_category_ids[matched]]
+        ).tolist()
+        stats["img_width_heights"] = {
+            image_id: [width, height]
+            for image_id, width, height in zip(
+                image_ids.tolist(), widths.tolist(), heights.tolist()
+            )
+        }
+    else:
+        stats["ann_width_hist"] = histogram(
+            relative_widths, histogram_bins, RELATIVE_SIZE_RANGE
+        )
+        stats["ann_height_hist"] = histogram(
+            relative_heights, histogram_bins, RELATIVE_SIZE_RANGE
+        )
+        stats["img_width_hist"] = histogram(widths, histogram_bins)
+        stats["img_height_hist"] = histogram(heights, histogram_bins)
+    return stats
+
+
+class StatsAccumulator:
+    """Mergeable single-pass statistics over streamed COCO files.
+
+    Counts and score sums are kept per category, relative bbox sizes go to
+    fixed-range histograms and image sizes to sparse fixed-width bins, so two
+    accumulators are merged by adding their states. Files are treated as
+    shards of one dataset: they share category ids and hold distinct images.
+    Memory is bounded by the number of images of the file being read; a file
+    listing its annotations before its images is read twice, image sizes
+    first.
+    """
+
+    def __init__(self, histogram_bins: int = 50, image_size_bin: int = 32):
+        self.histogram_bins = histogram_bins
+        self.image_size_bin = image_size_bin
+        self.num_images = 0
+        self.num_annotations = 0
+        self.cat_ids_to_names: Dict[int, str] = {}
+        self.cat_counts: Dict[int, int] = {}
+        self.cat_score_sums: Dict[int, float] = {}
+        # Objects per image, summarized once a file is complete.
+        self.num_images_with_anns = 0
+        self.min_obj_per_image: Optional[int] = None
+        self.max_obj_per_image: Optional[int] = None
+        self.ann_width_counts = np.zeros(histogram_bins, dtype=np.int64)
+        self.ann_height_counts = np.zeros(histogram_bins, dtype=np.int64)
+        self.img_width_bins: Dict[int, int] = {}
+        self.img_height_bins: Dict[int, int] = {}
+
+    def add_file(self, json_file: Union[str, Path], batch_size: int = 65536):
+        image_sizes: Dict[int, Tuple[float, float]] = {}
+        image_ann_counts: Dict[int, int] = {}
+        batch = []
+        images_read = False
+        for section, elem in iter_coco_records(json_file):
+            if section == "images":
+                if not images_read:
+                    self._add_image(elem, image_sizes)
+            elif section == "categories":
+                self.cat_ids_to_names[elem.get("id", 0)] = elem["name"]
+            else:
+                if not image_sizes and not images_read:
+                    # Annotations listed before the images: read the image
+                    # sizes in a first pass that skips the other sections.
+                    for _, image in iter_coco_records(json_file, ["images"]):
+                        self._add_image(image, image_sizes)
+                images_read = True
+                batch.append(elem)
+                if len(batch) == batch_size:
+                    self._add_annotations(batch, image_sizes, image_ann_counts)
+                    batch = []
+        self._add_annotations(batch, image_sizes, image_ann_counts)
+        self.num_images += len(image_sizes)
+        if image_ann_counts:
+            file_min = min(image_ann_counts.values())
+            file_max = max(image_ann_counts.values())
+            self.num_images_with_anns += len(image_ann_counts)
+            self.min_obj_per_image = (
+                file_min
+                if self.min_obj_per_image is None
+                else min(self.min_obj_per_image, file_min)
+            )
+            self.max_obj_per_image = max(self.max_obj_per_image or 0, file_max)
+        return self
+
+    def _add_image(self, elem: dict, image_sizes: Dict[int, Tuple[float, float]]):
+        image_sizes[elem.get("id", 0)] = (elem["width"], elem["height"])
+        self._add_image_size(elem["width"], elem["height"])
+
+    def _add_image_size(self, width: float, height: float):
+        width_bin = int(width // self.image_size_bin)
+        height_bin = int(height // self.image_size_bin)
+        self.img_width_bins[width_bin] = self.img_width_bins.get(width_bin, 0) + 1
+        self.img_height_bins[height_bin] = self.img_height_bins.get(height_bin, 0) + 1
+
+    def _add_annotations(
+        self,
+        anns: List[dict],
+        image_sizes: Dict[int, Tuple[float, float]],
+        image_ann_counts: Dict[int, int],
+    ):
+        for ann in anns:
+            if ann["image_id"] not in image_sizes:
+                raise ValueError(
+                    f"Annotation {ann.get('id')} references unknown image "
+                    f"{ann['image_id']}"
+                )
+        if not anns:
+            return
+
+        num_anns = len(anns)
+        image_ids = np.fromiter((ann["image_id"] for ann in anns), np.int64, num_anns)
+        cat_ids = np.fromiter((ann["category_id"] for ann in anns), np.int64, num_anns)
+        scores = np.fromiter(
+            (ann.get("score", 1.0) for ann in anns), np.float64, num_anns
+        )
+        sizes = np.fromiter(
+            (
+                (ann["bbox"][2], ann["bbox"][3], *image_sizes[ann["image_id"]])
+                for ann in anns
+            ),
+            np.dtype((np.float64, 4)),
+            num_anns,
+        ).reshape(num_anns, 4)
+        self.num_annotations += num_anns
+
+        unique_image_ids, image_counts = np.unique(image_ids, return_counts=True)
+        for image_id, count in zip(unique_image_ids.tolist(), image_counts.tolist()):
+            image_ann_counts[image_id] = image_ann_counts.get(image_id, 0) + count
+
+        unique_cat_ids, cat_rows = np.unique(cat_ids, return_inverse=True)
+        cat_counts = np.bincount(cat_rows)
+        score_sums = np.bincount(cat_rows, weights=scores)
+        for cat_id, count, score_sum in zip(
+            unique_cat_ids.tolist(), cat_counts.tolist(), score_sums.tolist()
+        ):
+            self.cat_counts[cat_id] = self.cat_counts.get(cat_id, 0) + count
+            self.cat_score_sums[cat_id] = (
+                self.cat_score_sums.get(cat_id, 0.0) + score_sum
+            )
+
+        for counts, relative_sizes in [
+            (self.ann_width_counts, sizes[:, 0] / sizes[:, 2]),
+            (self.ann_height_counts, sizes[:, 1] / sizes[:, 3]),
+        ]:
+            counts += np.histogram(
+                np.clip(relative_sizes, *RELATIVE_SIZE_RANGE),
+                bins=self.histogram_bins,
+                range=RELATIVE_SIZE_RANGE,
+            )[0]
+
+    def merge(self, other: "StatsAccumulator") -> "StatsAccumulator":
+        if (self.histogram_bins, self.image_size_bin) != (
+            other.histogram_bins,
+            other.image_size_bin,
+        ):
+            raise ValueError("Cannot merge stats with different histogram bins")
+        self.num_images += other.num_images
+        self.num_annotations += other.num_annotations
+        self.cat_ids_to_names.update(other.cat_ids_to_names)
+        for cat_id, count in other.cat_counts.items():
+            self.cat_counts[cat_id] = self.cat_counts.get(cat_id, 0) + count
+            self.cat_score_sums[cat_id] = (
+                self.cat_score_sums.get(cat_id, 0.0) + other.cat_score_sums[cat_id]
+            )
+        if other.num_images_with_anns:
+            self.num_images_with_anns += other.num_images_with_anns
+            self.min_obj_per_image = (
+                other.min_obj_per_image
+                if self.min_obj_per_image is None
+                else min(self.min_obj_per_image, other.min_obj_per_image)
+            )
+            self.max_obj_per_image = max(
+                self.max_obj_per_image or 0, other.max_obj_per_image
+            )
+        self.ann_width_counts += other.ann_width_counts
+        self.ann_height_counts += other.ann_height_counts
+        for bins, other_bins in [
+            (self.img_width_bins, other.img_width_bins),
+            (self.img_height_bins, other.img_height_bins),
+        ]:
+            for size_bin, count in other_bins.items():
+                bins[size_bin] = bins.get(size_bin, 0) + count
+        return self
+
+    def _image_size_histogram(self, bins: Dict[int, int]) -> Dict[str, list]:
+        if not bins:
+            return {"edges": [], "counts": []}
+        first, last = min(bins), max(bins)
+        return {
+            "edges": [
+                size_bin * self.image_size_bin for size_bin in range(first, last + 2)
+            ],
+            "counts": [bins.get(size_bin, 0) for size_bin in range(first, last + 1)],
+        }
+
+    def to_dict(self) -> dict:
+        """Stats in the layout of `coco_stats` with histograms."""
+        cat_ids = sorted(self.cat_counts)
+        edges = np.linspace(*RELATIVE_SIZE_RANGE, self.histogram_bins + 1).tolist()
+        return {
+            "num_images": self.num_images,
+            "num_annotations": self.num_annotations,
+            "num_categories": len(self.cat_ids_to_names),
+            "avg_obj_per_image": (
+                int(self.num_annotations / self.num_images_with_anns)
+                if self.num_images_with_anns
+                else 0
+            ),
+            "min_obj_per_image": int(self.min_obj_per_image or 0),
+            "max_obj_per_image": int(self.max_obj_per_image or 0),
+            "class_scores": {
+                cat_id: self.cat_score_sums[cat_id] / self.cat_counts[cat_id]
+                for cat_id in cat_ids
+            },
+            "count_objs_per_categ": {
+                cat_id: self.cat_counts[cat_id] for cat_id in cat_ids
+            },
+            "categories": [
+                self.cat_ids_to_names.get(cat_id, str(cat_id)) for cat_id in cat_ids
+            ],
+            "ann_width_hist": {
+                "edges": edges,
+                "counts": self.ann_width_counts.tolist(),
+            },
+            "ann_height_hist": {
+                "edges": edges,
+                "counts": self.ann_height_counts.tolist(),
+            },
+            "img_width_hist": self._image_size_histogram(self.img_width_bins),
+            "img_height_hist": self._image_size_histogram(self.img_height_bins),
+        }
+
+
+def _file_stats(json_file: Union[str, Path], histogram_bins: int) -> StatsAccumulator:
+    return StatsAccumulator(histogram_bins=histogram_bins).add_file(json_file)
+
+
+def list_coco_files(path: Union[str, Path]) -> List[Path]:
+    """A coco file, or the coco shards (.json, .json.gz, .json.zst) of a dir."""
+    path = Path(path)
+    if not path.is_dir():
+        return [path]
+    return sorted(
+        file_path
+        for pattern in ["*.json", "*.json.gz", "*.json.zst"]
+        for file_path in path.glob(pattern)
+    )
+
+
+def stream_stats(
+    input_files: List[Union[str, Path]],
+    histogram_bins: int = 50,
+    max_workers: int = 1,
+) -> dict:
+    """Single-pass stats over files too large to load, one worker per file."""
+    if max_workers > 1 and len(input_files) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            partials = list(
+                executor.map(
+                    _file_stats, input_files, [histogram_bins] * len(input_files)
+                )
+            )
+    else:
+        partials = [_file_stats(json_file, histogram_bins) for json_file in input_files]
+    stats = StatsAccumulator(histogram_bins=histogram_bins)
+    for partial in partials:
+        stats.merge(partial)
+    return stats.to_dict()
@@ -0,0 +1,128 @@
+import heapq
+import random
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def label_matrix(
+    sample_rows: np.ndarray, labels: np.ndarray, num_samples: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Sparse CSR (indptr, indices) of the set of labels of each sample.
+
+    `sample_rows[i]` is the sample holding `labels[i]`, repeated labels of a
+    sample are counted once. Label values are mapped to `0..L-1` and the
+    original values are returned as the third element.
+    """
+    label_values, label_rows = np.unique(labels, return_inverse=True)
+    num_labels = max(len(label_values), 1)
+    keys = np.unique(np.asarray(sample_rows, dtype=np.int64) * num_labels + label_rows)
+    rows, indices = np.divmod(keys, num_labels)
+    indptr = np.zeros(num_samples + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=num_samples), out=indptr[1:])
+    return indptr, indices, label_values
+
+
+def label_pairs(
+    indptr: np.ndarray, indices: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """CSR matrix of the label pairs (a <= b) of each sample, as new labels.
+
+    Second order stratification balances these pairs, which also balances
+    single labels through the (a, a) pairs and label co-occurrences.
+    """
+    num_labels = int(indices.max()) + 1 if len(indices) else 0
+    entry_samples = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    # Each entry is paired with itself and the following entries of its sample.
+    counts = indptr[entry_samples + 1] - np.arange(len(indices))
+    first = np.repeat(np.arange(len(indices)), counts)
+    second = (
+        first + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    )
+    sample_rows = entry_samples[first]
+    pairs = indices[first] * num_labels + indices[second]
+    new_indptr, new_indices, _ = label_matrix(sample_rows, pairs, len(indptr) - 1)
+    return new_indptr, new_indices
+
+
+def iterative_stratification(
+    indptr: np.ndarray,
+    indices: np.ndarray,
+    ratios: Sequence[float],
+    seed: Optional[int] = None,
+    order: int = 2,
+) -> np.ndarray:
+    """Assign each sample to a fold with iterative stratification.
+
+    Implements Sechidis et al. (2011) on a CSR label matrix: the label with
+    the fewest remaining samples is picked from a lazy min-heap, and each of
+    its samples goes to the fold that still wants the most of that label,
+    ties broken by the fold that wants the most samples, then at random.
+    Samples without labels fill the folds by size. With `order=2` the label
+    pairs of each sample are stratified, like skmultilearn does. The cost is
+    O(nnz log L + N k) instead of the dense O(N^2 L) of skmultilearn.
+
+    Returns the fold index of every sample.
+    """
+    if order == 2:
+        indptr, indices = label_pairs(indptr, indices)
+    elif order != 1:
+        raise ValueError(f"Unsupported stratification order {order}, use 1 or 2")
+    rng = random.Random(seed)
+    num_samples = len(indptr) - 1
+    num_labels = int(indices.max()) + 1 if len(indices) else 0
+    num_folds = len(ratios)
+    ratios = [ratio / sum(ratios) for ratio in ratios]
+
+    sample_labels = np.split(indices, indptr[1:-1])
+    sample_labels = [labels.tolist() for labels in sample_labels]
+    label_counts = np.bincount(indices, minlength=num_labels)
+    # CSC view: the samples of each label, shuffled so ties are not ordered.
+    permutation = np.random.default_rng(seed).permutation(num_samples)
+    sample_of_entry = np.repeat(np.arange(num_samples), np.diff(indptr))
+    rank = np.empty(num_samples, dtype=np.int64)
+    rank[permutation] = np.arange(num_samples)
+    entry_order = np.lexsort((rank[sample_of_entry], indices))
+    label_offsets = np.concatenate([[0], np.cumsum(label_counts)])
+    label_samples = sample_of_entry[entry_order]
+
+    desired = [[ratio * count for ratio in ratios] for count in label_counts.tolist()]
+    desired_sizes = [ratio * num_samples for ratio in ratios]
+    remaining = label_counts.tolist()
+    folds = np.full(num_samples, -1, dtype=np.int64)
+
+    def assign(sample: int, fold: int):
+        folds[sample] = fold
+        desired_sizes[fold] -= 1
+        for label in sample_labels[sample]:
+            desired[label][fold] -= 1
+            remaining[label] -= 1
+            if remaining[label]:
+                heapq.heappush(heap, (remaining[label], label))
+
+    def best_fold(wanted: Sequence[float]) -> int:
+        best = max(wanted)
+        candidates = [fold for fold in range(num_folds) if wanted[fold] == best]
+        if len(candidates) > 1:
+            best_size = max(desired_sizes[fold] for fold in candidates)
+            candidates = [
+                fold for fold in candidates if desired_sizes[fold] == best_size
+            ]
+        return candidates[0] if len(candidates) == 1 else rng.choice(candidates)
+
+    heap = [(count, label) for label, count in enumerate(remaining) if count]
+    heapq.heapify(heap)
+    while heap:
+        count, label = heapq.heappop(heap)
+        if count != remaining[label]:
+            # Stale entry, a fresher one was pushed when the count changed.
+            continue
+        for sample in label_samples[
+            label_offsets[label] : label_offsets[label + 1]
+        ].tolist():
+            if folds[sample] < 0:
+                assign(sample, best_fold(desired[label]))
+
+    for sample in permutation[np.diff(indptr)[permutation] == 0].tolist():
+        assign(sample, best_fold(desired_sizes))
+    return folds
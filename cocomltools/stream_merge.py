@@ -0,0 +1,123 @@
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+from cocomltools.json_io import iter_coco_records, iter_coco_section, write_coco_file
+
+
+class StreamingMerge:
+    """Out-of-core merge of COCO shards into a single output file.
+
+    Only the image-name / category-name remap tables are kept in memory. The
+    images pass reads images and categories of every shard and builds the
+    tables, then annotations are streamed shard by shard straight into the
+    output with remapped ids. Ids follow chained `COCO.extend` semantics:
+    the first shard keeps its ids, later shards are deduplicated by name and
+    renumbered. Records are written as read, so extra fields are preserved.
+    """
+
+    def __init__(self, input_files: List[Union[str, Path]]):
+        self.input_files = input_files
+        self.image_names_to_ids: Dict[str, int] = {}
+        self.cat_names_to_ids: Dict[str, int] = {}
+        self.image_id_maps: List[Dict[int, int]] = []
+        self.cat_id_maps: List[Dict[int, int]] = []
+        self.categories: List[dict] = []
+        self.max_image_id = 0
+        self.max_cat_id = 0
+        self.max_ann_id = 0
+        self.num_images = 0
+        self.num_annotations = 0
+
+    def iter_images(self) -> Iterator[dict]:
+        for shard_index, coco_file in enumerate(self.input_files):
+            image_id_map, cat_id_map = {}, {}
+            for section, elem in iter_coco_records(coco_file, ["images", "categories"]):
+                if section == "categories":
+                    cat_id_map[elem.get("id", 0)] = self._add_category(
+                        elem, keep_id=shard_index == 0
+                    )
+                    continue
+                new_id = self._add_image(elem, keep_id=shard_index == 0)
+                if new_id is not None:
+                    self.num_images += 1
+                    yield {**elem, "id": new_id}
+                image_id_map[elem.get("id", 0)] = self.image_names_to_ids[
+                    elem["file_name"]
+                ]
+            self.image_id_maps.append(image_id_map)
+            self.cat_id_maps.append(cat_id_map)
+
+    def iter_annotations(self) -> Iterator[dict]:
+        # The first shard keeps its ids untouched, like the base of COCO.extend.
+        for shard_index, coco_file in enumerate(self.input_files):
+            image_id_map = self.image_id_maps[shard_index]
+            cat_id_map = self.cat_id_maps[shard_index]
+            for elem in iter_coco_section(coco_file, "annotations"):
+                self.num_annotations += 1
+                if shard_index == 0:
+                    self.max_ann_id = max(self.max_ann_id, elem.get("id", 0))
+                    yield elem
+                    continue
+                try:
+                    image_id = image_id_map[elem["image_id"]]
+                    category_id = cat_id_map[elem["category_id"]]
+                except KeyError as e:
+                    raise ValueError(
+                        f"Annotation {elem.get('id')} in {coco_file} references "
+                        f"unknown id {e}"
+                    )
+                self.max_ann_id += 1
+                yield {
+                    **elem,
+                    "id": self.max_ann_id,
+                    "image_id": image_id,
+                    "category_id": category_id,
+                }
+
+    def iter_categories(self) -> Iterator[dict]:
+        yield from self.categories
+
+    def write(
+        self,
+        output_file: Union[str, Path],
+        compact: bool = False,
+        compression: Optional[str] = None,
+    ):
+        write_coco_file(
+            output_file,
+            {
+                "images": self.iter_images(),
+                "annotations": self.iter_annotations(),
+                "categories": self.iter_categories(),
+            },
+            compact=compact,
+            compression=compression,
+        )
+
+    def _add_image(self, elem: dict, keep_id: bool) -> Optional[int]:
+        """Register an image, returning its output id or None if duplicated."""
+        file_name = elem["file_name"]
+        if keep_id:
+            image_id = elem.get("id", 0)
+            self.image_names_to_ids[file_name] = image_id
+            self.max_image_id = max(self.max_image_id, image_id)
+            return image_id
+        if file_name in self.image_names_to_ids:
+            return None
+        self.max_image_id += 1
+        self.image_names_to_ids[file_name] = self.max_image_id
+        return self.max_image_id
+
+    def _add_category(self, elem: dict, keep_id: bool) -> int:
+        name = elem["name"]
+        if keep_id:
+            cat_id = elem.get("id", 0)
+            self.max_cat_id = max(self.max_cat_id, cat_id)
+        elif name in self.cat_names_to_ids:
+            return self.cat_names_to_ids[name]
+        else:
+            self.max_cat_id += 1
+            cat_id = self.max_cat_id
+        self.cat_names_to_ids[name] = cat_id
+        self.categories.append({**elem, "id": cat_id})
+        return cat_id
@@ -1,16 +1,20 @@
 import json
 from pathlib import Path
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import MultiLabelBinarizer
-from typing import List
-import random
-from skmultilearn.model_selection import iterative_train_test_split
+from typing import Iterable, List, Optional, Sequence
+import hashlib
+import re
 import numpy as np
+from cocomltools.logger import logger
 
 
 def check_is_json(file_path: str) -> bool:
+    """Whether `file_path` is a .json file, plain or as .json.gz / .json.zst."""
     file_path = Path(file_path)
-    return file_path.is_file() and file_path.suffix == ".json"
+    name = (
+        file_path.with_suffix("") if file_path.suffix in (".gz", ".zst") else file_path
+    )
+    return file_path.is_file() and name.suffix == ".json"
 
 
 def load_json_file(json_path: Path):
@@ -25,13 +29,115 @@ def get_max_id_from_seq(seq: list[dict]) -> int:
     return max([elem["id"] for elem in seq])
 
 
-def random_split(data: List, split_ratio: float = 0.2):
-    random.shuffle(data)
-    split_index = int(len(data) * split_ratio)
-    set_A, set_B = data[split_index:], data[:split_index]
+def lookup_rows(keys: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Row of every value in `keys`, -1 for the values missing from `keys`."""
+    rows = np.full(len(values), -1, dtype=np.int64)
+    if len(keys) == 0 or len(values) == 0:
+        return rows
+    order = np.argsort(keys, kind="stable")
+    positions = np.searchsorted(keys, values, sorter=order)
+    positions = order[np.minimum(positions, len(keys) - 1)]
+    found = keys[positions] == values
+    rows[found] = positions[found]
+    return rows
+
+
+def annotation_image_rows(
+    image_ids: np.ndarray, ann_image_ids: np.ndarray
+) -> np.ndarray:
+    """Image row of every annotation, -1 for annotations of missing images."""
+    rows = lookup_rows(image_ids, ann_image_ids)
+    num_orphans = int(np.count_nonzero(rows < 0))
+    if num_orphans:
+        logger.warning(
+            f"{num_orphans} annotations reference images missing from the coco file"
+        )
+    return rows
+
+
+def random_split(data: List, split_ratio: float = 0.2, seed: Optional[int] = None):
+    folds = random_folds(len(data), [1 - split_ratio, split_ratio], seed)
+    set_A = [elem for elem, fold in zip(data, folds.tolist()) if fold == 0]
+    set_B = [elem for elem, fold in zip(data, folds.tolist()) if fold == 1]
     return set_A, set_B
 
 
+def random_folds(
+    num_samples: int, ratios: Sequence[float], seed: Optional[int] = None
+) -> np.ndarray:
+    """Fold of each sample from a seeded permutation.
+
+    Fold i > 0 gets `int(num_samples * ratios[i])` samples, fold 0 the rest.
+    """
+    sizes = [int(num_samples * ratio) for ratio in ratios[1:]]
+    bounds = np.cumsum([num_samples - sum(sizes), *sizes])
+    permutation = np.random.default_rng(seed).permutation(num_samples)
+    folds = np.empty(num_samples, dtype=np.int64)
+    folds[permutation] = np.searchsorted(bounds, np.arange(num_samples), "right")
+    return folds
+
+
+def random_group_folds(
+    group_sizes: np.ndarray, ratios: Sequence[float], seed: Optional[int] = None
+) -> np.ndarray:
+    """Fold of each group from a seeded permutation, balanced on group sizes.
+
+    Groups are laid out in random order and each one goes to the fold whose
+    share of the samples contains the middle of the group.
+    """
+    group_sizes = np.asarray(group_sizes, dtype=np.float64)
+    permutation = np.random.default_rng(seed).permutation(len(group_sizes))
+    ends = np.cumsum(group_sizes[permutation])
+    total = ends[-1] if len(ends) else 0.0
+    bounds = total * np.cumsum([1 - sum(ratios[1:]), *ratios[1:]])[:-1]
+    folds = np.empty(len(group_sizes), dtype=np.int64)
+    folds[permutation] = np.searchsorted(
+        bounds, ends - group_sizes[permutation] / 2, "right"
+    )
+    return folds
+
+
+def regex_groups(names: Iterable[str], pattern: str) -> List[str]:
+    """Group key of each name: the first capture group of `pattern` (or the
+    whole match). Names not matching are their own group."""
+    regex = re.compile(pattern)
+    keys = []
+    for name in names:
+        match = regex.search(name)
+        if match is None:
+            keys.append(name)
+        else:
+            keys.append(match.group(1) if regex.groups else match.group(0))
+    return keys
+
+
+def hash_folds(
+    names: Iterable[str], ratios: Sequence[float], seed: Optional[int] = None
+) -> np.ndarray:
+    """Fold of each name from a stable hash, independent of the other names.
+
+    The fold of a name never changes when names are added or removed; `seed`
+    salts the hash to draw another partition. The last fold takes the lowest
+    hashes, so a name in the test fold of a 2-way split stays in the last fold
+    of a 3-way split with the same last ratio.
+    """
+    prefix = "" if seed is None else f"{seed}:"
+    hashes = np.fromiter(
+        (
+            int.from_bytes(
+                hashlib.blake2b(f"{prefix}{name}".encode(), digest_size=8).digest(),
+                "little",
+            )
+            for name in names
+        ),
+        dtype=np.uint64,
+    )
+    # The top 53 bits give a uniform float in [0, 1).
+    uniform = (hashes >> np.uint64(11)) / 2.0**53
+    thresholds = np.cumsum(list(ratios)[::-1])[:-1]
+    return len(ratios) - 1 - np.searchsorted(thresholds, uniform, "right")
+
+
 def stratified_split(data_dict: dict, ratio: float = 0.2):
     train_split = {}
     test_split = {}
@@ -53,20 +159,3 @@ def stratified_split(data_dict: dict, ratio: float = 0.2):
             test_split[key] = []
 
     return train_split, test_split
-
-
-def mlt_stratified_split(data_dict, ratio: float = 0.2):
-
-    # Convert category lists to a binary format for stratification
-    mlb = MultiLabelBinarizer()
-    category_matrix = mlb.fit_transform(list(data_dict.values()))
-    image_ids = np.array(list(data_dict.keys())).reshape(-1, 1)
-
-    X_train, _, X_test, _ = iterative_train_test_split(
-        image_ids, category_matrix, test_size=ratio
-    )
-
-    # Flatten the arrays
-    train_ids = X_train.ravel()
-    test_ids = X_test.ravel()
-    return set(train_ids), set(test_ids)
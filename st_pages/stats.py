@@ -1,12 +1,35 @@
+import atexit
+import shutil
+import tempfile
 import streamlit as st
-from cocomltools.models.coco import COCO
+from cocomltools.cache import DatasetCache
 from cocomltools.coco_ops import CocoOps
 from st_pages.utils import coco_file_uploader
-import json
-from collections import defaultdict
 import pandas as pd
 import altair as alt
 
+HISTOGRAM_BINS = 50
+# Uploads are cached in a temporary directory of the server process, never in
+# the user cache, and the oldest entries are evicted above this size.
+PAGE_CACHE_MAX_BYTES = 512 * 1024**2
+
+
+@st.cache_resource
+def page_cache() -> DatasetCache:
+    cache_dir = tempfile.mkdtemp(prefix="cocomltools-st-")
+    atexit.register(shutil.rmtree, cache_dir, ignore_errors=True)
+    return DatasetCache(cache_dir=cache_dir, max_bytes=PAGE_CACHE_MAX_BYTES)
+
+
+def histogram_to_dataframe(hist):
+    return pd.DataFrame(
+        {
+            "start": hist["edges"][:-1],
+            "end": hist["edges"][1:],
+            "count": hist["counts"],
+        }
+    )
+
 
 @st.cache_data
 def stats_dict_to_dataframe(stats):
@@ -16,26 +39,26 @@ def stats_dict_to_dataframe(stats):
     df = pd.DataFrame(
         {"Category": stats["categories"], "Count": counts, "Scores": scores}
     )
-
-    df_img = pd.DataFrame(
-        stats["img_width_heights"].values(),
-        columns=["Img width", "Img height"],
-    )
-    df_ann = pd.DataFrame(
-        stats["ann_width_heights"],
-        columns=["Bbox width", "Bbox height", "Category"],
-    )
-    return df, df_img, df_ann
+    df_hists = {
+        key: histogram_to_dataframe(stats[key])
+        for key in [
+            "img_width_hist",
+            "img_height_hist",
+            "ann_width_hist",
+            "ann_height_hist",
+        ]
+    }
+    return df, df_hists
 
 
 @st.cache_data
 def analyse_coco_input(input_file):
-    coco_ops = CocoOps(
-        COCO.from_dict(json.loads(input_file.getvalue().decode("utf-8")))
-    )
-    stats = coco_ops.calculate_coco_stats()
-    df, df_img, df_ann = stats_dict_to_dataframe(stats)
-    return coco_ops, stats, df, df_img, df_ann
+    # Reruns and new sessions on the same file reload the parsed columns.
+    coco_ops = CocoOps(page_cache().load_bytes(input_file.getvalue()))
+    # Pre-binned histograms keep the page light on large datasets.
+    stats = coco_ops.calculate_coco_stats(histogram_bins=HISTOGRAM_BINS, quality=True)
+    df, df_hists = stats_dict_to_dataframe(stats)
+    return stats, df, df_hists
 
 
 class CocoAnalysis:
@@ -48,14 +71,14 @@ class CocoAnalysis:
 
         if st.session_state.files_ready:
 
-            self.coco_ops, self.stats, self.df, self.df_img, self.df_ann = (
-                analyse_coco_input(self.uploaded_files[0])
+            self.stats, self.df, self.df_hists = analyse_coco_input(
+                self.uploaded_files[0]
             )
             self.display_stats_grid()
 
     def _setup_tabs(self):
-        self.tab1, self.tab2, self.tab3 = st.tabs(
-            ["Overview", "Distributions", "Per category stats"]
+        self.tab1, self.tab2, self.tab3, self.tab4 = st.tabs(
+            ["Overview", "Distributions", "Per category stats", "Quality"]
         )
 
     def display_stats_grid(self):
@@ -104,6 +127,25 @@ class CocoAnalysis:
                     sort_key="Scores",
                 )
 
+        with self.tab4:
+            self.display_quality_stats()
+
+    def display_quality_stats(self):
+        quality = self.stats["quality"]
+        st.table(
+            pd.DataFrame([{"category": "total", **quality["total"]}, *quality["table"]])
+        )
+        if quality["duplicate_pairs"]:
+            st.text(
+                f"Near duplicate annotation id pairs: {len(quality['duplicate_pairs'])}"
+            )
+            st.dataframe(
+                pd.DataFrame(
+                    quality["duplicate_pairs"],
+                    columns=["First ann id", "Second ann id"],
+                )
+            )
+
     def display_general_stats(self):
         # Collecting data in a more descriptive format
         stats = {
@@ -116,9 +158,9 @@ class CocoAnalysis:
                 "Max objects per image",
             ],
             "Value": [
-                len(self.coco_ops.coco.images),
-                len(self.coco_ops.coco.annotations),
-                len(self.coco_ops.coco.categories),
+                self.stats["num_images"],
+                self.stats["num_annotations"],
+                self.stats["num_categories"],
                 self.stats["avg_obj_per_image"],
                 self.stats["min_obj_per_image"],
                 self.stats["max_obj_per_image"],
@@ -132,49 +174,33 @@ class CocoAnalysis:
         # st.table(df)
         st.table(df.assign(hack="").set_index("hack"))
 
-    def plot_img_width_distribution(self):
+    def plot_histogram(self, key, title, color):
 
         chart = (
-            alt.Chart(self.df_img)
-            .mark_bar(color="purple")
-            .encode(alt.X("Img width:Q", bin=True), y="count()")
+            alt.Chart(self.df_hists[key])
+            .mark_bar(color=color)
+            .encode(
+                x=alt.X("start:Q", title=title),
+                x2="end:Q",
+                y=alt.Y("count:Q", title="count"),
+                tooltip=["start", "end", "count"],
+            )
             .interactive()
         )
 
         st.altair_chart(chart, use_container_width=True)
 
-    def plot_img_height_distribution(self):
-
-        chart = (
-            alt.Chart(self.df_img)
-            .mark_bar(color="purple")
-            .encode(alt.X("Img height:Q", bin=True), y="count()")
-            .interactive()
-        )
+    def plot_img_width_distribution(self):
+        self.plot_histogram("img_width_hist", "Img width", "purple")
 
-        st.altair_chart(chart, use_container_width=True)
+    def plot_img_height_distribution(self):
+        self.plot_histogram("img_height_hist", "Img height", "purple")
 
     def plot_bbox_width_distribution(self):
-
-        chart = (
-            alt.Chart(self.df_ann)
-            .mark_bar(color="pink")
-            .encode(alt.X("Bbox width:Q", bin=True), y="count()")
-            .interactive()
-        )
-
-        st.altair_chart(chart, use_container_width=True)
+        self.plot_histogram("ann_width_hist", "Bbox width", "pink")
 
     def plot_bbox_height_distribution(self):
-
-        chart = (
-            alt.Chart(self.df_ann)
-            .mark_bar(color="pink")
-            .encode(alt.X("Bbox height:Q", bin=True), y="count()")
-            .interactive()
-        )
-
-        st.altair_chart(chart, use_container_width=True)
+        self.plot_histogram("ann_height_hist", "Bbox height", "pink")
 
     def plot_per_class_count(
         self, top_n=None, bottom_n=None, title="", sort_key="Count"
@@ -85,21 +85,21 @@ class StApp:
                 col1, col2, col3 = st.columns(3)
                 with col1:
                     self.download_coco_button(
-                        coco_train.get_coco_dict(),
+                        coco_train,
                         label="download coco train",
                         file_name="coco_train.json",
                     )
 
                 with col2:
                     self.download_coco_button(
-                        coco_val.get_coco_dict(),
+                        coco_val,
                         label="download coco val",
                         file_name="coco_val.json",
                     )
 
                 with col3:
                     self.download_coco_button(
-                        coco_test.get_coco_dict(),
+                        coco_test,
                         label="download coco test",
                         file_name="coco_test.json",
                     )
@@ -113,7 +113,7 @@ class StApp:
             else:
                 coco_output = self.merge_coco_files()
                 self.download_coco_button(
-                    coco_output.get_coco_dict(),
+                    coco_output,
                     label="download merged coco",
                     file_name="coco_merged.json",
                 )
@@ -140,27 +140,25 @@ class StApp:
         coco_base = COCO.from_dict(
             json.loads(self.uploaded_files[0].getvalue().decode("utf-8"))
         )
-        train_coco, test_coco = CocoOps(coco_base).split(
-            ratio=self.split_ratios[0], mode=st.session_state.split_mode
+        # The val ratio applies to what is left once the test split is removed.
+        test_ratio = self.split_ratios[0]
+        val_ratio = (1 - test_ratio) * self.split_ratios[1]
+        return CocoOps(coco_base).split_many(
+            [1 - test_ratio - val_ratio, val_ratio, test_ratio],
+            mode=st.session_state.split_mode,
         )
-        train_coco, val_coco = CocoOps(train_coco).split(
-            ratio=self.split_ratios[1], mode=st.session_state.split_mode
-        )
-
-        return train_coco, val_coco, test_coco
 
     def download_coco_button(
         self,
-        coco_dict,
+        coco: COCO,
         label: str = "Download COCO result",
         file_name: str = "coco_merged.json",
     ):
-        json_string = json.dumps(coco_dict)
         st.download_button(
             label=label,
             file_name=file_name,
             mime="application/json",
-            data=json_string,
+            data=coco.to_json_bytes(compact=True),
             help=None,
         )
 
@@ -0,0 +1,79 @@
+import pytest
+
+from cocomltools.models.coco import COCO
+from cocomltools.models.columnar import ColumnarCOCO
+
+pa = pytest.importorskip("pyarrow")
+
+
+def test_arrow_tables_layout(coco_split_random_input):
+    # ARRANGE
+    store = ColumnarCOCO.from_dict(coco_split_random_input)
+
+    # ACT
+    tables = store.to_arrow()
+
+    # ASSERT
+    assert tables["images"].num_rows == store.num_images
+    assert tables["annotations"].num_rows == store.num_annotations
+    assert tables["annotations"].schema.field("bbox").type == pa.list_(pa.float64(), 4)
+    assert tables["annotations"].column("bbox").to_pylist() == store.bboxes.tolist()
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_parquet_round_trip(coco_split_random_input, tmp_path, columnar):
+    # ARRANGE
+    coco_split_random_input["images"][0]["video_id"] = 3
+    coco_split_random_input["annotations"][0]["segmentation"] = [[1, 2, 3, 4, 5, 6]]
+    coco_split_random_input["annotations"][1]["segmentation"] = [1, 2, 3, 4, 5, 6]
+    coco_split_random_input["annotations"][2]["segmentation"] = {
+        "size": [480, 640],
+        "counts": "a0b1",
+    }
+    coco_split_random_input["annotations"][3]["attributes"] = {"occluded": True}
+    coco_cls = ColumnarCOCO if columnar else COCO
+    coco = coco_cls.from_dict(coco_split_random_input)
+
+    # ACT
+    coco.to_parquet(tmp_path / "parquet")
+    loaded = coco_cls.from_parquet(tmp_path / "parquet")
+
+    # ASSERT
+    assert loaded.get_coco_dict() == coco.get_coco_dict()
+
+
+def test_read_parquet_tables_projection(coco_split_random_input, tmp_path):
+    # ARRANGE
+    from cocomltools.arrow_io import read_parquet_tables
+
+    ColumnarCOCO.from_dict(coco_split_random_input).to_parquet(tmp_path)
+
+    # ACT
+    tables = read_parquet_tables(tmp_path, {"annotations": ["category_id", "bbox"]})
+
+    # ASSERT
+    assert tables["annotations"].column_names == ["category_id", "bbox"]
+    assert tables["images"].num_rows == len(coco_split_random_input["images"])
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_from_parquet_projection(coco_split_random_input, tmp_path, columnar):
+    # ARRANGE
+    coco_split_random_input["annotations"][0]["segmentation"] = [[1, 2, 3, 4, 5, 6]]
+    store = ColumnarCOCO.from_dict(coco_split_random_input)
+    store.to_parquet(tmp_path)
+    columns = {"annotations": ("id", "image_id", "category_id", "bbox", "area")}
+
+    # ACT
+    coco_cls = ColumnarCOCO if columnar else COCO
+    loaded = coco_cls.from_parquet(tmp_path, columns=columns)
+
+    # ASSERT
+    coco_dict, expected_dict = loaded.get_coco_dict(), store.get_coco_dict()
+    assert coco_dict["images"] == expected_dict["images"]
+    assert coco_dict["categories"] == expected_dict["categories"]
+    for ann, expected in zip(coco_dict["annotations"], expected_dict["annotations"]):
+        assert ann["bbox"] == expected["bbox"]
+        assert ann["category_id"] == expected["category_id"]
+        assert ann["segmentation"] == []
+        assert ann["score"] == 1.0
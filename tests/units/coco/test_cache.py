@@ -0,0 +1,113 @@
+import json
+import os
+
+import pytest
+from pydantic import ValidationError
+
+from cocomltools.cache import DatasetCache, load_store, save_store
+from cocomltools.coco_ops import CocoOps
+from cocomltools.models.columnar import ColumnarCOCO
+from cocomltools.models.records import AnnotationRecord
+
+
+def test_save_load_store_round_trip(coco_split_random_input, tmp_path):
+    # ARRANGE
+    coco_split_random_input["images"][0]["video_id"] = 3
+    coco_split_random_input["annotations"][0]["segmentation"] = [[1, 2, 3, 4, 5, 6]]
+    store = ColumnarCOCO.from_dict(coco_split_random_input)
+
+    # ACT
+    save_store(store, tmp_path / "store")
+    loaded = load_store(tmp_path / "store")
+
+    # ASSERT
+    assert loaded.get_coco_dict() == store.get_coco_dict()
+
+
+def test_cache_load_hits_after_first_parse(coco_split_random_input, tmp_path):
+    # ARRANGE
+    json_file = tmp_path / "coco.json"
+    json_file.write_text(json.dumps(coco_split_random_input))
+    cache = DatasetCache(tmp_path / "cache")
+    expected = ColumnarCOCO.from_dict(coco_split_random_input).get_coco_dict()
+
+    # ACT
+    first = cache.load(json_file)
+    os.utime(json_file, ns=(0, 0))  # stale key, entry found by content hash
+    second = cache.load(json_file)
+    coco_ops = CocoOps.from_json_file(str(json_file), cache=cache)
+
+    # ASSERT
+    assert first.get_coco_dict() == expected
+    assert second.get_coco_dict() == expected
+    assert coco_ops.coco.get_coco_dict() == expected
+    assert len(cache.entries()) == 1
+    assert len(list(cache.keys_dir.iterdir())) == 2
+
+
+def test_cache_evicts_least_recently_used(coco_split_random_input, tmp_path):
+    # ARRANGE
+    json_files = []
+    for index in range(3):
+        coco_split_random_input["images"][0]["file_name"] = f"image_{index}.jpg"
+        json_file = tmp_path / f"coco_{index}.json"
+        json_file.write_text(json.dumps(coco_split_random_input))
+        json_files.append(json_file)
+    cache = DatasetCache(tmp_path / "cache")
+    for json_file in json_files:
+        cache.load(json_file)
+
+    # ACT
+    for entry in cache.entries():
+        index = [str(path.resolve()) for path in json_files].index(entry["source"])
+        os.utime(entry["path"], (index + 1, index + 1))
+    cache.load(json_files[0])
+    cache.max_bytes = cache.total_bytes() - 1
+    evicted = cache.evict()
+
+    # ASSERT
+    assert len(evicted) == 1
+    assert {entry["source"] for entry in cache.entries()} == {
+        str(json_files[0].resolve()),
+        str(json_files[2].resolve()),
+    }
+    cache.clear()
+    assert cache.entries() == []
+
+
+def test_cache_load_validates_on_miss(coco_split_random_input, tmp_path):
+    # ARRANGE
+    json_file = tmp_path / "coco.json"
+    json_file.write_text(json.dumps(coco_split_random_input))
+    coco_split_random_input["images"][0]["width"] = "wide"
+    broken_file = tmp_path / "broken.json"
+    broken_file.write_text(json.dumps(coco_split_random_input))
+    cache = DatasetCache(tmp_path / "cache")
+
+    # ACT
+    cache.load(json_file, validate="none")
+    trusted_entries = cache.entries()
+    cache.load(json_file)
+
+    # ASSERT
+    assert [entry["validate"] for entry in trusted_entries] == ["none"]
+    assert [entry["validate"] for entry in cache.entries()] == ["full"]
+    with pytest.raises(ValidationError):
+        cache.load(broken_file)
+    with pytest.raises(ValidationError):
+        CocoOps.from_json_file(str(broken_file), cache=cache, validate="sample")
+    assert len(cache.entries()) == 1
+
+
+def test_cache_load_keeps_slots(coco_split_random_input, tmp_path):
+    # ARRANGE
+    json_file = tmp_path / "coco.json"
+    json_file.write_text(json.dumps(coco_split_random_input))
+    cache = DatasetCache(tmp_path / "cache")
+
+    # ACT
+    coco_ops = CocoOps.from_json_file(str(json_file), cache=cache, slots=True)
+
+    # ASSERT
+    assert isinstance(coco_ops.coco.annotations[0], AnnotationRecord)
+    assert [entry["validate"] for entry in cache.entries()] == ["full"]
@@ -0,0 +1,38 @@
+import gzip
+import json
+import sys
+
+from cocomltools.main_cli import main
+from cocomltools.models.coco import COCO
+
+
+def run_cli(monkeypatch, *args):
+    monkeypatch.setattr(sys, "argv", ["cocomltools-cli", *map(str, args)])
+    main()
+
+
+def test_cli_round_trip_gzip(tmp_path, monkeypatch, coco_split_random_input):
+    # ARRANGE
+    coco_file = tmp_path / "coco.json.gz"
+    with gzip.open(coco_file, "wt") as f:
+        json.dump(coco_split_random_input, f)
+    split_files = [tmp_path / "coco_train.json.gz", tmp_path / "coco_test.json.gz"]
+
+    # ACT
+    run_cli(
+        monkeypatch,
+        *["split", "--coco-path", coco_file, "--output-dir", tmp_path],
+        *["--compression", "gzip"],
+    )
+    run_cli(
+        monkeypatch,
+        *["merge", "--coco-paths", ",".join(map(str, split_files))],
+        *["--output-dir", tmp_path, "--compression", "gzip"],
+    )
+
+    # ASSERT
+    coco = COCO.from_dict(coco_split_random_input)
+    coco_merged = COCO.from_json_file(tmp_path / "coco_merged.json.gz")
+    assert sorted(coco_merged.image_names_to_ids) == sorted(coco.image_names_to_ids)
+    assert len(coco_merged.annotations) == len(coco.annotations)
+    assert coco_merged.cat_names_to_ids.keys() == coco.cat_names_to_ids.keys()
@@ -0,0 +1,123 @@
+import numpy as np
+from cocomltools.models.coco import COCO
+from cocomltools.models.columnar import ColumnarCOCO, RaggedSegmentation
+from cocomltools.coco_ops import CocoOps
+
+
+def test_columnar_round_trip(coco_split_random_input):
+    # ARRANGE
+    coco = COCO.from_dict(coco_split_random_input)
+
+    # ACT
+    columnar = ColumnarCOCO.from_dict(coco_split_random_input)
+
+    # ASSERT
+    assert columnar.get_coco_dict() == coco.get_coco_dict()
+    assert columnar.max_ann_id == coco.max_ann_id
+    image_id = coco.images[0].id
+    assert [ann.id for ann in columnar.get_annotation_by_image_id(image_id)] == [
+        ann.id for ann in coco.get_annotation_by_image_id(image_id)
+    ]
+
+
+def test_ragged_segmentation_take():
+    # ARRANGE
+    segmentations = [[1.0, 2.0, 3.0], [], [[4.0, 5.0], [6.0]], [[7.0]]]
+    ragged = RaggedSegmentation.from_lists(segmentations)
+
+    # ACT
+    taken = ragged.take([3, 2, 0])
+    merged = RaggedSegmentation.concat([ragged, taken])
+
+    # ASSERT
+    assert [ragged[i] for i in range(len(ragged))] == segmentations
+    assert [taken[i] for i in range(len(taken))] == [
+        [[7.0]],
+        [[4.0, 5.0], [6.0]],
+        [1.0, 2.0, 3.0],
+    ]
+    assert [merged[i] for i in range(len(merged))] == segmentations + [
+        taken[i] for i in range(len(taken))
+    ]
+
+
+def test_columnar_filter_matches_coco(coco_delete_input):
+    # ARRANGE
+    coco_ops = CocoOps.from_dict(coco_delete_input)
+    columnar_ops = CocoOps.from_dict(coco_delete_input, columnar=True)
+    images_to_remove = ["image1.jpg", "image5.jpg", "image10.jpg"]
+
+    # ACT
+    coco_ops.filter(image_names=images_to_remove)
+    coco_ops.filter(category_names=["category6"])
+    columnar_ops.filter(image_names=images_to_remove)
+    columnar_ops.filter(category_names=["category6"])
+
+    # ASSERT
+    assert columnar_ops.coco.num_annotations == 14
+    assert columnar_ops.coco.get_coco_dict() == coco_ops.coco.get_coco_dict()
+
+
+def test_columnar_split_and_stats(coco_split_random_input):
+    # ARRANGE
+    coco_ops = CocoOps.from_dict(coco_split_random_input)
+    columnar_ops = CocoOps.from_dict(coco_split_random_input, columnar=True)
+
+    # ACT
+    coco_1, coco_2 = columnar_ops.split(ratio=0.2, mode="random")
+    stats = columnar_ops.calculate_coco_stats()
+    expected_stats = coco_ops.calculate_coco_stats()
+
+    # ASSERT
+    assert coco_1.num_images + coco_2.num_images == columnar_ops.coco.num_images
+    assert (
+        coco_1.num_annotations + coco_2.num_annotations
+        == columnar_ops.coco.num_annotations
+    )
+    assert set(coco_1.ann_image_ids) <= set(coco_1.image_ids)
+    assert set(coco_2.ann_image_ids) <= set(coco_2.image_ids)
+    for key in ["avg_obj_per_image", "min_obj_per_image", "max_obj_per_image"]:
+        assert stats[key] == expected_stats[key]
+    assert stats["count_objs_per_categ"] == dict(expected_stats["count_objs_per_categ"])
+    assert sorted(stats["ann_width_heights"]) == sorted(
+        expected_stats["ann_width_heights"]
+    )
+
+
+def test_columnar_keeps_extra_image_fields(coco_split_random_input):
+    # ARRANGE
+    coco_split_random_input["images"][0]["video_id"] = 7
+    expected_images = COCO.from_dict(coco_split_random_input).get_coco_dict()["images"]
+
+    # ACT
+    store = ColumnarCOCO.from_dict(coco_split_random_input)
+    selected = store.select_images(np.array([0]))
+
+    # ASSERT
+    assert store.get_coco_dict()["images"] == expected_images
+    assert selected.images[0].video_id == 7
+
+
+def test_load_modes_keep_the_same_extra_fields(coco_split_random_input):
+    # ARRANGE
+    coco_split_random_input["annotations"][0]["attributes"] = {"occluded": True}
+    coco_split_random_input["categories"][0]["supercategory"] = "animal"
+
+    # ACT
+    coco_dicts = [
+        COCO.from_dict(coco_split_random_input, validate=validate, slots=slots)
+        for validate in ["full", "sample", "none"]
+        for slots in [False, True]
+    ]
+    coco_dicts = [coco.get_coco_dict() for coco in coco_dicts]
+    store = ColumnarCOCO.from_dict(coco_split_random_input)
+    merged = ColumnarCOCO.concat([store, store.select_images(np.array([1]))])
+
+    # ASSERT
+    for coco_dict in coco_dicts:
+        assert coco_dict["annotations"][0]["attributes"] == {"occluded": True}
+        assert coco_dict["categories"] == coco_split_random_input["categories"]
+        assert coco_dict == coco_dicts[0]
+    assert store.get_coco_dict() == coco_dicts[0]
+    assert merged.annotations[0].attributes == {"occluded": True}
+    assert merged.categories[0].supercategory == "animal"
@@ -26,3 +26,29 @@ def test_filter_cmd(coco_delete_input):
     assert "image11.jpg" not in set(
         image.file_name for image in coco_ops.coco.images
     ), "removing category6 should remove image11.jpg"
+
+
+def test_filter_predicates_single_pass(coco_delete_input):
+    # ARRANGE
+    coco_ops = CocoOps.from_dict(coco_delete_input)
+    columnar_ops = CocoOps.from_dict(coco_delete_input, columnar=True)
+    filters = dict(
+        category_names=["category6", "category2"],
+        image_names=["image1.jpg"],
+        area_range=(0, 30000),
+    )
+
+    # ACT
+    coco_output = coco_ops.filter(**filters)
+    columnar_output = columnar_ops.filter(**filters)
+
+    # ASSERT
+    assert all(ann.area <= 30000 for ann in coco_output.annotations)
+    assert "category2" not in coco_output.cat_names_to_ids
+    assert "image1.jpg" not in coco_output.image_names_to_ids
+    assert columnar_output.get_coco_dict() == coco_output.get_coco_dict()
+    image_ids = {image.id for image in coco_output.images}
+    assert set(coco_ops.coco.image_ids_to_names) == image_ids
+    assert all(ann.image_id in image_ids for ann in coco_output.annotations)
+    for image_id, anns in coco_ops.coco.image_ids_to_anns.items():
+        assert all(ann.category_id != 2 for ann in anns)
@@ -0,0 +1,78 @@
+from cocomltools.models.coco import COCO
+from cocomltools.models.base import Image, Annotation, Category
+
+
+def test_index_updated_in_place(coco_delete_input):
+    # ARRANGE
+    coco = COCO.from_dict(coco_delete_input)
+    max_image_id = coco.max_image_id
+    max_ann_id = coco.max_ann_id
+
+    # ACT
+    image_id = coco.add_image_to_coco(
+        Image(file_name="new_image.jpg", width=10, height=10)
+    )
+    cat_id = coco.add_cat_to_coco(Category(name="new_category"))
+    ann_id = coco.add_ann_to_coco(
+        Annotation(image_id=0, category_id=0, bbox=[0, 0, 1, 1], area=1),
+        image_id,
+        cat_id,
+    )
+
+    # ASSERT
+    assert image_id == max_image_id + 1
+    assert ann_id == max_ann_id + 1
+    assert coco.image_names_to_ids["new_image.jpg"] == image_id
+    assert coco.image_ids_to_names[image_id] == "new_image.jpg"
+    assert coco.cat_ids_to_names[cat_id] == "new_category"
+    assert [ann.id for ann in coco.get_annotation_by_image_id(image_id)] == [ann_id]
+    assert coco.image_ids_to_ann_count[image_id] == 1
+
+
+def test_index_consistent_after_removal(coco_delete_input):
+    # ARRANGE
+    coco = COCO.from_dict(coco_delete_input)
+
+    # ACT
+    coco.remove_image_from_coco("image1.jpg")
+    coco.remove_category_from_coco("category6")
+
+    # ASSERT
+    image_names = {elem.file_name for elem in coco.images}
+    assert set(coco.image_names_to_ids) == image_names
+    assert set(coco.image_ids_to_names.values()) == image_names
+    assert "category6" not in coco.cat_names_to_ids
+    for image in coco.images:
+        anns = [ann for ann in coco.annotations if ann.image_id == image.id]
+        assert coco.get_annotation_by_image_id(image.id) == anns
+        assert coco.image_ids_to_ann_count.get(image.id, 0) == len(anns)
+
+
+def test_single_removals_match_rebuilt_index(coco_delete_input):
+    # ARRANGE
+    coco = COCO.from_dict(coco_delete_input)
+    coco_bulk = COCO.from_dict(coco_delete_input)
+    version = coco.index.version
+
+    # ACT
+    coco.remove_image_from_coco("image1.jpg")
+    coco.remove_category_from_coco("category6")
+    coco_bulk.remove(image_names=["image1.jpg"])
+    coco_bulk.remove(category_names=["category6"])
+
+    # ASSERT
+    assert coco.get_coco_dict() == coco_bulk.get_coco_dict()
+    assert coco.index.version > version
+    for attr in [
+        "image_names_to_ids",
+        "image_ids_to_names",
+        "cat_names_to_ids",
+        "cat_ids_to_names",
+        "max_image_id",
+        "max_ann_id",
+        "max_cat_id",
+    ]:
+        assert getattr(coco.index, attr) == getattr(coco_bulk.index, attr), attr
+    assert {k: v for k, v in coco.image_ids_to_anns.items() if v} == dict(
+        coco_bulk.image_ids_to_anns
+    )
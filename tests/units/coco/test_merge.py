@@ -1,4 +1,10 @@
+import copy
+import json
+
+import pytest
+
 from cocomltools.models.coco import COCO
+from cocomltools.models.columnar import ColumnarCOCO
 from cocomltools.coco_ops import CocoOps
 
 
@@ -71,3 +77,74 @@ def test_merge_with_duplicates(
     assert (
         coco_1.cat_ids_to_names[coco_1.annotations[2].category_id] == "bicycle"
     ), "Verify that the category ID of the 3rd annotation corresponds to 'bicycle'"
+
+
+def test_merge_engine_matches_extend(
+    coco_merge_input_1, coco_merge_input_2, coco_merge_input_3
+):
+    # ARRANGE
+    input_files = [
+        "tests/mock/coco_merge_input_1.json",
+        "tests/mock/coco_merge_input_2.json",
+        "tests/mock/coco_merge_input_3.json",
+    ]
+    coco_expected = COCO.from_dict(coco_merge_input_1)
+    coco_expected.extend(COCO.from_dict(coco_merge_input_2))
+    coco_expected.extend(COCO.from_dict(coco_merge_input_3))
+
+    # ACT
+    coco_merged = CocoOps.merge(input_files, max_workers=2, columnar=False)
+    columnar_merged = CocoOps.merge(input_files)
+
+    # ASSERT
+    assert isinstance(coco_merged, COCO)
+    assert isinstance(columnar_merged, ColumnarCOCO)
+    assert coco_merged.get_coco_dict() == coco_expected.get_coco_dict()
+    assert columnar_merged.get_coco_dict() == coco_expected.get_coco_dict()
+    assert coco_merged.cat_names_to_ids == coco_expected.cat_names_to_ids
+
+
+@pytest.mark.parametrize("validate", ["full", "sample", "none"])
+def test_merge_validates_inputs(tmp_path, coco_merge_input_1, validate):
+    # ARRANGE
+    shard = copy.deepcopy(coco_merge_input_1)
+    shard["images"][0]["width"] = float(shard["images"][0]["width"])
+    broken = copy.deepcopy(coco_merge_input_1)
+    del broken["annotations"][0]["bbox"]
+    for name, data in [("shard", shard), ("broken", broken)]:
+        (tmp_path / f"{name}.json").write_text(json.dumps(data))
+    shard_file, broken_file = str(tmp_path / "shard.json"), str(
+        tmp_path / "broken.json"
+    )
+
+    # ACT
+    coco_merged = CocoOps.merge([shard_file], validate=validate)
+
+    # ASSERT
+    assert coco_merged.get_coco_dict() == COCO.from_dict(shard).get_coco_dict()
+    assert type(coco_merged.images[0].width) is int
+    with pytest.raises(ValueError):
+        CocoOps.merge([shard_file, broken_file], validate=validate)
+
+
+def test_streaming_merge_matches_extend(
+    tmp_path, coco_merge_input_1, coco_merge_input_2, coco_merge_input_3
+):
+    # ARRANGE
+    input_files = [
+        "tests/mock/coco_merge_input_1.json",
+        "tests/mock/coco_merge_input_2.json",
+        "tests/mock/coco_merge_input_3.json",
+    ]
+    coco_expected = COCO.from_dict(coco_merge_input_1)
+    coco_expected.extend(COCO.from_dict(coco_merge_input_2))
+    coco_expected.extend(COCO.from_dict(coco_merge_input_3))
+    output_file = tmp_path / "coco_merged.json"
+
+    # ACT
+    merger = CocoOps.merge_streaming(input_files, output_file, compact=True)
+
+    # ASSERT
+    coco_merged = COCO.from_json_file(output_file)
+    assert coco_merged.get_coco_dict() == coco_expected.get_coco_dict()
+    assert merger.num_annotations == len(coco_expected.annotations)
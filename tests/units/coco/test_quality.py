@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+from cocomltools.coco_ops import CocoOps
+from cocomltools.quality import (
+    candidate_pairs,
+    iou_matrix,
+    overlap_pairs,
+    quality_stats,
+)
+
+
+@pytest.fixture
+def coco_quality_input():
+    boxes = [
+        (1, 1, [10, 10, 20, 20]),
+        (1, 1, [10, 10, 20, 20]),  # exact duplicate of 1
+        (1, 1, [10.2, 10, 20, 20]),  # near duplicate of 1 and 2
+        (1, 2, [10, 10, 20, 20]),  # other category, not an overlap
+        (1, 1, [90, 90, 20, 20]),  # out of bounds
+        (2, 2, [0, 0, 0, 5]),  # degenerate
+        (2, 2, [0, 0, 10, 10]),
+        (2, 2, [0, 5, 10, 10]),  # IoU 1/3 with 7
+    ]
+    return {
+        "images": [
+            {"id": 1, "file_name": "image1.jpg", "width": 100, "height": 100},
+            {"id": 2, "file_name": "image2.jpg", "width": 100, "height": 100},
+        ],
+        "annotations": [
+            {
+                "id": ann_id,
+                "image_id": image_id,
+                "category_id": category_id,
+                "bbox": bbox,
+                "area": bbox[2] * bbox[3],
+            }
+            for ann_id, (image_id, category_id, bbox) in enumerate(boxes, start=1)
+        ],
+        "categories": [{"id": 1, "name": "cat"}, {"id": 2, "name": "dog"}],
+    }
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_quality_stats(coco_quality_input, columnar):
+    # ARRANGE
+    coco_ops = CocoOps.from_dict(coco_quality_input, columnar=columnar)
+
+    # ACT
+    quality = coco_ops.calculate_quality_stats(iou_threshold=0.3)
+
+    # ASSERT
+    assert quality["table"] == [
+        {
+            "category": "cat",
+            "num_annotations": 4,
+            "degenerate": 0,
+            "out_of_bounds": 1,
+            "exact_duplicates": 1,
+            "near_duplicates": 3,
+            "overlaps": 3,
+        },
+        {
+            "category": "dog",
+            "num_annotations": 4,
+            "degenerate": 1,
+            "out_of_bounds": 0,
+            "exact_duplicates": 0,
+            "near_duplicates": 0,
+            "overlaps": 1,
+        },
+    ]
+    assert quality["total"]["overlaps"] == 4
+    assert sorted(map(sorted, quality["duplicate_pairs"])) == [[1, 2], [1, 3], [2, 3]]
+
+
+def test_quality_stats_parallel_matches_serial(coco_quality_input):
+    # ARRANGE
+    coco_ops = CocoOps.from_dict(coco_quality_input, columnar=True)
+    columns = coco_ops._stats_columns()
+    del columns["scores"]
+
+    # ACT
+    quality = quality_stats(
+        **columns,
+        cat_ids_to_names=coco_ops.coco.cat_ids_to_names,
+        max_workers=2,
+        chunk_size=1,
+    )
+
+    # ASSERT
+    expected = coco_ops.calculate_coco_stats(quality=True)["quality"]
+    assert quality["table"] == expected["table"]
+    assert sorted(map(sorted, quality["duplicate_pairs"])) == sorted(
+        map(sorted, expected["duplicate_pairs"])
+    )
+
+
+def test_sweep_matches_dense_iou():
+    # ARRANGE
+    rng = np.random.default_rng(0)
+    boxes = np.column_stack(
+        [rng.uniform(0, 500, (600, 2)), rng.uniform(1, 60, (600, 2))]
+    )
+    ious = iou_matrix(boxes, boxes)
+    first, second = np.triu_indices(len(boxes), k=1)
+    keep = ious[first, second] >= 0.2
+
+    # ACT
+    sweep_first, sweep_second, sweep_ious = overlap_pairs(boxes, 0.2)
+
+    # ASSERT
+    pairs = set(zip(first[keep].tolist(), second[keep].tolist()))
+    sweep_pairs = {
+        (min(a, b), max(a, b))
+        for a, b in zip(sweep_first.tolist(), sweep_second.tolist())
+    }
+    assert sweep_pairs == pairs
+    assert np.allclose(sweep_ious, ious[sweep_first, sweep_second])
+    assert len(candidate_pairs(boxes)[0]) < len(first)
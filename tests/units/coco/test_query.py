@@ -0,0 +1,97 @@
+import pytest
+from cocomltools.models.coco import COCO
+from cocomltools.models.base import Annotation
+from cocomltools.coco_ops import CocoOps
+from cocomltools.query import parse_query_expression
+
+
+def test_query_matches_python_loop(coco_delete_input):
+    # ARRANGE
+    coco = COCO.from_dict(coco_delete_input)
+    columnar_ops = CocoOps.from_dict(coco_delete_input, columnar=True)
+
+    # ACT
+    result = coco.query(category=["category1", "category2"], area_between=(0, 25000))
+    columnar_result = columnar_ops.query(
+        category=["category1", "category2"], area_between=(0, 25000)
+    )
+
+    # ASSERT
+    expected = [
+        ann
+        for ann in coco.annotations
+        if ann.category_id in (1, 2) and 0 <= ann.area <= 25000
+    ]
+    assert result == expected
+    assert [ann.id for ann in columnar_result] == [ann.id for ann in expected]
+
+
+def test_query_index_invalidated_on_mutation(coco_delete_input):
+    # ARRANGE
+    coco = COCO.from_dict(coco_delete_input)
+    count = len(coco.query(area_gt=0))
+
+    # ACT
+    coco.add_ann_to_coco(
+        Annotation(image_id=0, category_id=0, bbox=[0, 0, 1, 1], area=1),
+        coco.images[0].id,
+        coco.categories[0].id,
+    )
+
+    # ASSERT
+    assert len(coco.query(area_gt=0)) == count + 1
+    assert len(coco.query(area_lt=1)) == 0
+    assert len(coco.query(area_le=1)) == 1
+
+
+def test_query_images_by_ann_count(coco_delete_input):
+    # ARRANGE
+    coco_ops = CocoOps.from_dict(coco_delete_input)
+    counts = {image.id: 0 for image in coco_ops.coco.images}
+    for ann in coco_ops.coco.annotations:
+        counts[ann.image_id] += 1
+
+    # ACT
+    images = coco_ops.query_images(anns_gt=1)
+
+    # ASSERT
+    assert [image.id for image in images] == [
+        image.id for image in coco_ops.coco.images if counts[image.id] > 1
+    ]
+
+
+def test_parse_query_expression():
+    # ACT
+    query = parse_query_expression("category=traffic light, score<0.3,area>=1024")
+
+    # ASSERT
+    assert query == {"category": ["traffic light"], "score_lt": 0.3, "area_ge": 1024}
+    with pytest.raises(ValueError):
+        parse_query_expression("width>3")
+
+
+def test_filter_where(coco_delete_input):
+    # ARRANGE
+    coco_ops = CocoOps.from_dict(coco_delete_input)
+
+    # ACT
+    coco_output = coco_ops.filter(where=parse_query_expression("area>25000"))
+
+    # ASSERT
+    assert coco_output.annotations
+    assert all(ann.area <= 25000 for ann in coco_output.annotations)
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_query_warns_on_unknown_category(coco_delete_input, caplog, columnar):
+    # ARRANGE
+    coco_ops = CocoOps.from_dict(coco_delete_input, columnar=columnar)
+
+    # ACT
+    result = coco_ops.query(category=["category1", "categroy2"])
+
+    # ASSERT
+    assert [ann.id for ann in result] == [
+        ann["id"] for ann in coco_delete_input["annotations"] if ann["category_id"] == 1
+    ]
+    assert "No category found with categroy2" in caplog.text
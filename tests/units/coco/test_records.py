@@ -0,0 +1,104 @@
+import pickle
+
+import pytest
+
+from cocomltools.coco_ops import CocoOps
+from cocomltools.models.base import Annotation, Image
+from cocomltools.models.coco import COCO
+from cocomltools.models.records import (
+    AnnotationRecord,
+    ImageRecord,
+    to_models,
+    to_records,
+)
+
+
+@pytest.mark.parametrize(
+    "segmentation",
+    [[], [1.0, 2.0, 3.0], [[1.0, 2.0, 3.0]], [[1.0, 2.0], [3.0, 4.0, 5.0]]],
+)
+def test_annotation_record_round_trip(segmentation):
+    # ARRANGE
+    ann = Annotation(
+        id=4,
+        image_id=2,
+        category_id=3,
+        score=0.5,
+        bbox=[1, 2, 3, 4],
+        segmentation=segmentation,
+        area=12,
+        iscrowd=1,
+    )
+
+    # ACT
+    record = to_records([ann])[0]
+    record_copy = pickle.loads(pickle.dumps(record))
+    model = to_models([record])[0]
+
+    # ASSERT
+    assert isinstance(record, AnnotationRecord)
+    assert record.model_dump() == ann.model_dump()
+    assert record_copy == ann
+    assert isinstance(model, Annotation)
+    assert model.model_dump() == ann.model_dump()
+
+
+def test_records_attributes_are_writable():
+    # ARRANGE
+    record = AnnotationRecord(image_id=1, category_id=1, bbox=[0, 0, 1, 1], area=1)
+    image = ImageRecord(id=1, file_name="a.jpg", width=2, height=2, video_id=5)
+
+    # ACT
+    record.id = 7
+    record.image_id = 3
+    record.bbox = [1, 1, 2, 2]
+    image.id = 9
+
+    # ASSERT
+    assert (record.id, record.image_id, record.bbox) == (7, 3, [1.0, 1.0, 2.0, 2.0])
+    assert record.score == 1.0 and record.segmentation == []
+    assert image.video_id == 5
+    assert image == Image(id=9, file_name="a.jpg", width=2, height=2, video_id=5)
+    with pytest.raises(AttributeError):
+        image.unknown_field
+
+
+@pytest.mark.parametrize("validate", ["full", "sample", "none"])
+def test_coco_accepts_slots_records(coco_split_random_input, validate):
+    # ARRANGE
+    expected = COCO.from_dict(coco_split_random_input)
+
+    # ACT
+    coco_ops = CocoOps.from_dict(coco_split_random_input, validate=validate, slots=True)
+    expected_1, expected_2 = CocoOps(expected).split(ratio=0.3, seed=3)
+    coco_1, coco_2 = coco_ops.split(ratio=0.3, seed=3)
+
+    # ASSERT
+    assert isinstance(coco_ops.coco.annotations[0], AnnotationRecord)
+    assert coco_ops.coco.get_coco_dict() == expected.get_coco_dict()
+    assert coco_1.get_coco_dict() == expected_1.get_coco_dict()
+    assert coco_2.get_coco_dict() == expected_2.get_coco_dict()
+    assert (
+        coco_ops.calculate_coco_stats()["count_objs_per_categ"]
+        == CocoOps(expected).calculate_coco_stats()["count_objs_per_categ"]
+    )
+
+
+def test_records_keep_extra_fields(coco_split_random_input):
+    # ARRANGE
+    coco_split_random_input["annotations"][0]["attributes"] = {"occluded": True}
+    coco_split_random_input["categories"][0]["supercategory"] = "animal"
+
+    # ACT
+    coco = COCO.from_dict(coco_split_random_input, validate="none", slots=True)
+    ann, cat = coco.annotations[0], coco.categories[0]
+    ann_copy, cat_copy = pickle.loads(pickle.dumps([ann, cat]))
+
+    # ASSERT
+    assert ann.attributes == {"occluded": True}
+    assert cat.supercategory == "animal"
+    assert coco.get_coco_dict()["annotations"][0]["attributes"] == {"occluded": True}
+    assert coco.get_coco_dict()["categories"] == coco_split_random_input["categories"]
+    assert ann_copy.model_dump() == ann.model_dump()
+    assert cat_copy.model_dump() == cat.model_dump()
+    assert coco.annotations[1].extra is None
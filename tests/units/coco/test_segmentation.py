@@ -0,0 +1,183 @@
+import numpy as np
+import pytest
+
+from cocomltools.cache import load_store, save_store
+from cocomltools.coco_ops import CocoOps
+from cocomltools.models.columnar import ColumnarCOCO
+from cocomltools.segmentation import (
+    MaskRuns,
+    decode_counts,
+    encode_counts,
+    mask_to_rle,
+    rle_to_mask,
+    segmentation_to_mask,
+)
+
+
+def reference_encode(counts):
+    """Scalar port of pycocotools' rleToString."""
+    chars = []
+    for index, value in enumerate(counts):
+        if index > 2:
+            value -= counts[index - 2]
+        more = True
+        while more:
+            chunk = value & 0x1F
+            value >>= 5
+            more = value != -1 if chunk & 0x10 else value != 0
+            chars.append(chr(chunk + (0x20 if more else 0) + 48))
+    return "".join(chars)
+
+
+@pytest.fixture
+def masks_coco_input():
+    return {
+        "images": [{"id": 1, "file_name": "a.jpg", "width": 10, "height": 8}],
+        "annotations": [
+            {
+                "id": 1,
+                "image_id": 1,
+                "category_id": 1,
+                "bbox": [0, 0, 4, 3],
+                "segmentation": [[0, 0, 4, 0, 4, 3, 0, 3]],
+                "area": 1,
+            },
+            {
+                "id": 2,
+                "image_id": 1,
+                "category_id": 1,
+                "bbox": [1, 1, 7, 7],
+                "segmentation": [1, 1, 5, 1, 5, 5, 1, 5],
+                "area": 1,
+            },
+            {
+                "id": 3,
+                "image_id": 1,
+                "category_id": 1,
+                "bbox": [0, 0, 1, 2],
+                "segmentation": {"size": [8, 10], "counts": [0, 2, 78]},
+                "area": 1,
+                "iscrowd": 1,
+            },
+            {"id": 4, "image_id": 1, "category_id": 1, "bbox": [2, 2, 2, 2], "area": 5},
+        ],
+        "categories": [{"id": 1, "name": "cat"}],
+    }
+
+
+def test_encode_counts_matches_pycocotools():
+    # ARRANGE
+    rng = np.random.default_rng(0)
+    samples = [rng.integers(0, 10**6, size).tolist() for size in range(12)]
+
+    # ACT
+    encoded = [encode_counts(counts) for counts in samples]
+    decoded = [decode_counts(string).tolist() for string in encoded]
+
+    # ASSERT
+    assert encoded == [reference_encode(counts) for counts in samples]
+    assert decoded == samples
+
+
+def test_mask_rle_round_trip():
+    # ARRANGE
+    mask = np.random.default_rng(0).random((13, 7)) > 0.5
+    mask[0, 0] = True
+
+    # ACT
+    rle = mask_to_rle(mask)
+
+    # ASSERT
+    assert rle["size"] == [13, 7]
+    assert isinstance(rle["counts"], str)
+    assert np.array_equal(rle_to_mask(rle), mask)
+
+
+def test_polygons_fill_pixel_centers():
+    # ARRANGE
+    square = [1, 1, 5, 1, 5, 5, 1, 5]
+    overlapping = [[1, 1, 5, 1, 5, 5, 1, 5], [3, 3, 8, 3, 8, 8, 3, 8]]
+
+    # ACT
+    runs = MaskRuns.from_segmentations([square, overlapping, []], [10] * 3, [10] * 3)
+    mask = segmentation_to_mask(square, 10, 10)
+
+    # ASSERT
+    assert runs.areas().tolist() == [16, 16 + 25 - 4, 0]
+    assert runs.bboxes().tolist() == [[1, 1, 4, 4], [1, 1, 7, 7], [0, 0, 0, 0]]
+    assert runs.has_mask.tolist() == [True, True, False]
+    assert mask[1:5, 1:5].all() and mask.sum() == 16
+
+
+def test_mask_runs_of_mixed_formats():
+    # ARRANGE
+    mask = np.random.default_rng(1).random((6, 5)) > 0.4
+    compressed = mask_to_rle(mask)
+    uncompressed = {"size": [6, 5], "counts": decode_counts(compressed["counts"])}
+    uncompressed["counts"] = uncompressed["counts"].tolist()
+
+    # ACT
+    runs = MaskRuns.from_segmentations(
+        [compressed, [0, 0, 5, 0, 5, 6], uncompressed], [6, 6, 6], [5, 5, 5]
+    )
+    rles = runs.to_rles()
+
+    # ASSERT
+    assert runs.areas().tolist() == [mask.sum(), 15, mask.sum()]
+    assert rles[0] == compressed and rles[2] == compressed
+    for row, rle in enumerate(rles):
+        assert np.array_equal(rle_to_mask(rle), runs.mask(row))
+
+
+@pytest.mark.parametrize(
+    "load",
+    [
+        lambda data: CocoOps.from_dict(data),
+        lambda data: CocoOps.from_dict(data, slots=True),
+        lambda data: CocoOps.from_dict(data, columnar=True),
+    ],
+)
+def test_encode_segmentations(masks_coco_input, load):
+    # ARRANGE
+    coco_ops = load(masks_coco_input)
+
+    # ACT
+    coco = coco_ops.encode_segmentations(recompute_bbox=True)
+
+    # ASSERT
+    anns = coco.get_coco_dict()["annotations"]
+    assert [ann["area"] for ann in anns] == [12, 16, 2, 5]
+    assert [ann["bbox"] for ann in anns] == [
+        [0, 0, 4, 3],
+        [1, 1, 4, 4],
+        [0, 0, 1, 2],
+        [2, 2, 2, 2],
+    ]
+    assert all(isinstance(ann["segmentation"]["counts"], str) for ann in anns[:3])
+    assert anns[3]["segmentation"] == []
+    assert [ann.id for ann in coco_ops.query(area_lt=10)] == [3, 4]
+    reloaded = ColumnarCOCO.from_dict(coco.get_coco_dict())
+    assert np.array_equal(
+        rle_to_mask(reloaded.segmentations[0]),
+        segmentation_to_mask(masks_coco_input["annotations"][0]["segmentation"], 8, 10),
+    )
+
+
+def test_columnar_keeps_rle_segmentations(tmp_path, masks_coco_input):
+    # ARRANGE
+    store = ColumnarCOCO.from_dict(masks_coco_input)
+    rle = masks_coco_input["annotations"][2]["segmentation"]
+
+    # ACT
+    selected = store.select(np.arange(1), np.array([2, 0]))
+    merged = ColumnarCOCO.concat([selected, ColumnarCOCO.from_dict({})])
+    save_store(merged, tmp_path / "store")
+    loaded = load_store(tmp_path / "store")
+
+    # ASSERT
+    assert store.segmentations[2] == rle
+    assert [loaded.segmentations[row] for row in range(2)] == [
+        rle,
+        [[0, 0, 4, 0, 4, 3, 0, 3]],
+    ]
+    assert loaded.get_coco_dict() == merged.get_coco_dict()
@@ -1,5 +1,8 @@
+import numpy as np
+import pytest
 from cocomltools.models.coco import COCO
 from cocomltools.coco_ops import CocoOps
+from cocomltools.stratify import iterative_stratification, label_matrix
 
 
 def test_split_random(coco_split_random_input):
@@ -50,6 +53,204 @@ def test_split_random(coco_split_random_input):
     ), "Ensure Category names are the same in both splits"
 
 
-def test_split_strat():
-    # TO BE IMPLEMENTED
-    pass
+@pytest.mark.parametrize("columnar", [False, True])
+def test_split_strat(coco_split_random_input, columnar):
+    # ARRANGE
+    coco_ops = CocoOps.from_dict(coco_split_random_input, columnar=columnar)
+
+    # ACT
+    coco_1, coco_2 = coco_ops.split(ratio=0.2, mode="strat", seed=0)
+    coco_1_again, _ = coco_ops.split(ratio=0.2, mode="strat", seed=0)
+
+    # ASSERT
+    dict_1, dict_2 = coco_1.get_coco_dict(), coco_2.get_coco_dict()
+    image_ids_1 = {image["id"] for image in dict_1["images"]}
+    image_ids_2 = {image["id"] for image in dict_2["images"]}
+    assert not image_ids_1 & image_ids_2
+    assert len(image_ids_1) + len(image_ids_2) == len(coco_split_random_input["images"])
+    assert all(ann["image_id"] in image_ids_1 for ann in dict_1["annotations"])
+    assert all(ann["image_id"] in image_ids_2 for ann in dict_2["annotations"])
+    assert len(dict_1["annotations"]) + len(dict_2["annotations"]) == len(
+        coco_split_random_input["annotations"]
+    )
+    assert coco_1_again.get_coco_dict() == dict_1
+
+
+def test_iterative_stratification_balances_labels():
+    # ARRANGE
+    rng = np.random.default_rng(0)
+    num_samples = 2000
+    sample_rows = np.repeat(np.arange(num_samples), 3)
+    labels = rng.integers(0, 20, len(sample_rows))
+    indptr, indices, _ = label_matrix(sample_rows, labels, num_samples)
+
+    # ACT
+    folds = iterative_stratification(indptr, indices, [0.8, 0.2], seed=0)
+
+    # ASSERT
+    assert abs((folds == 1).sum() - 0.2 * num_samples) <= 0.05 * num_samples
+    for label in range(20):
+        samples = np.unique(sample_rows[labels == label])
+        expected = 0.2 * len(samples)
+        assert abs((folds[samples] == 1).sum() - expected) <= 0.15 * expected
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_split_random_seeded_and_non_mutating(coco_split_random_input, columnar):
+    # ARRANGE
+    coco_ops = CocoOps.from_dict(coco_split_random_input, columnar=columnar)
+    coco_dict = coco_ops.coco.get_coco_dict()
+
+    # ACT
+    coco_1, coco_2 = coco_ops.split(ratio=0.3, mode="random", seed=7)
+    coco_1_again, coco_2_again = coco_ops.split(ratio=0.3, mode="random", seed=7)
+
+    # ASSERT
+    assert coco_ops.coco.get_coco_dict() == coco_dict
+    assert coco_1.get_coco_dict() == coco_1_again.get_coco_dict()
+    assert coco_2.get_coco_dict() == coco_2_again.get_coco_dict()
+    dict_2 = coco_2.get_coco_dict()
+    assert len(dict_2["images"]) == int(0.3 * len(coco_dict["images"]))
+    image_ids_2 = {image["id"] for image in dict_2["images"]}
+    assert [ann["id"] for ann in dict_2["annotations"]] == [
+        ann["id"] for ann in coco_dict["annotations"] if ann["image_id"] in image_ids_2
+    ]
+
+
+def test_hash_split_stable_when_adding_images(coco_split_random_input):
+    # ARRANGE
+    coco_ops = CocoOps.from_dict(coco_split_random_input)
+    _, coco_2 = coco_ops.split(ratio=0.5, mode="hash")
+    for index in range(20):
+        coco_split_random_input["images"].append(
+            {
+                "id": 1000 + index,
+                "file_name": f"new_{index}.jpg",
+                "width": 1,
+                "height": 1,
+            }
+        )
+
+    # ACT
+    _, coco_2_grown = CocoOps.from_dict(coco_split_random_input).split(
+        ratio=0.5, mode="hash"
+    )
+
+    # ASSERT
+    names_2 = {image.file_name for image in coco_2.images}
+    names_2_grown = {image.file_name for image in coco_2_grown.images}
+    assert names_2_grown & set(coco_ops.coco.image_names_to_ids) == names_2
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+@pytest.mark.parametrize("mode", ["random", "hash", "strat"])
+def test_split_many_partitions_images(coco_split_random_input, columnar, mode):
+    # ARRANGE
+    coco_ops = CocoOps.from_dict(coco_split_random_input, columnar=columnar)
+    coco_dict = coco_ops.coco.get_coco_dict()
+
+    # ACT
+    splits = coco_ops.split_many([0.6, 0.2, 0.2], mode=mode, seed=0)
+
+    # ASSERT
+    assert len(splits) == 3
+    image_ids = [{image["id"] for image in s.get_coco_dict()["images"]} for s in splits]
+    ann_ids = [{ann["id"] for ann in s.get_coco_dict()["annotations"]} for s in splits]
+    assert sum(len(ids) for ids in image_ids) == len(coco_dict["images"])
+    assert set.union(*image_ids) == {image["id"] for image in coco_dict["images"]}
+    assert sum(len(ids) for ids in ann_ids) == len(coco_dict["annotations"])
+    assert set.union(*ann_ids) == {ann["id"] for ann in coco_dict["annotations"]}
+
+
+def test_kfold_val_folds_partition_images(coco_split_random_input):
+    # ARRANGE
+    coco_ops = CocoOps.from_dict(coco_split_random_input)
+    all_image_ids = {image.id for image in coco_ops.coco.images}
+
+    # ACT
+    folds = coco_ops.kfold(4, mode="random", seed=0)
+
+    # ASSERT
+    assert len(folds) == 4
+    val_image_ids = []
+    for coco_train, coco_val in folds:
+        train_ids = {image.id for image in coco_train.images}
+        val_ids = {image.id for image in coco_val.images}
+        assert not train_ids & val_ids
+        assert train_ids | val_ids == all_image_ids
+        val_image_ids.append(val_ids)
+    assert sum(len(ids) for ids in val_image_ids) == len(all_image_ids)
+    assert set.union(*val_image_ids) == all_image_ids
+
+
+def test_split_many_rejects_bad_ratios(coco_split_random_input):
+    # ARRANGE
+    coco_ops = CocoOps.from_dict(coco_split_random_input)
+
+    # ACT / ASSERT
+    with pytest.raises(ValueError):
+        coco_ops.split_many([0.5, 0.6])
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+@pytest.mark.parametrize("mode", ["random", "hash", "strat"])
+@pytest.mark.parametrize(
+    "groups", [{"group_regex": r"^(seq\d+)/"}, {"group_field": "video_id"}]
+)
+def test_split_many_keeps_groups_together(
+    coco_split_random_input, columnar, mode, groups
+):
+    # ARRANGE
+    for index, image in enumerate(coco_split_random_input["images"]):
+        image["file_name"] = f"seq{index % 4}/{image['file_name']}"
+        image["video_id"] = index % 4
+    coco_ops = CocoOps.from_dict(coco_split_random_input, columnar=columnar)
+
+    # ACT
+    splits = coco_ops.split_many([0.5, 0.25, 0.25], mode=mode, seed=0, **groups)
+
+    # ASSERT
+    split_groups = [
+        {image["video_id"] for image in coco.get_coco_dict()["images"]}
+        for coco in splits
+    ]
+    assert sum(len(groups) for groups in split_groups) == 4
+    assert set.union(*split_groups) == {0, 1, 2, 3}
+    assert sum(len(coco.get_coco_dict()["images"]) for coco in splits) == 10
+
+
+def test_grouped_split_images_without_key_are_own_group(coco_split_random_input):
+    # ARRANGE
+    for image in coco_split_random_input["images"][:6]:
+        image["video_id"] = 1
+    coco_ops = CocoOps.from_dict(coco_split_random_input)
+
+    # ACT
+    folds = coco_ops._image_folds([0.5, 0.5], "random", 0, group_field="video_id")
+
+    # ASSERT
+    assert len(set(folds[:6].tolist())) == 1
+    assert len(folds) == 10
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+@pytest.mark.parametrize("mode", ["random", "strat", "hash"])
+def test_split_drops_orphan_annotations(coco_split_random_input, mode, columnar):
+    # ARRANGE
+    orphan = dict(coco_split_random_input["annotations"][0])
+    for ann_id, image_id in [(10**6, 10**6), (10**6 + 1, -5)]:
+        coco_split_random_input["annotations"].append(
+            {**orphan, "id": ann_id, "image_id": image_id}
+        )
+    coco_ops = CocoOps.from_dict(coco_split_random_input, columnar=columnar)
+
+    # ACT
+    splits = coco_ops.split(ratio=0.3, mode=mode, seed=1)
+
+    # ASSERT
+    ann_ids = [
+        ann["id"] for split in splits for ann in split.get_coco_dict()["annotations"]
+    ]
+    assert sorted(ann_ids) == sorted(
+        ann["id"] for ann in coco_split_random_input["annotations"][:-2]
+    )
@@ -0,0 +1,150 @@
+import json
+
+import pytest
+
+from cocomltools.coco_ops import CocoOps
+from cocomltools.stats import StatsAccumulator
+
+
+def test_stats_histograms(coco_split_random_input):
+    # ARRANGE
+    coco_ops = CocoOps.from_dict(coco_split_random_input)
+    columnar_ops = CocoOps.from_dict(coco_split_random_input, columnar=True)
+
+    # ACT
+    stats = coco_ops.calculate_coco_stats(histogram_bins=10)
+    columnar_stats = columnar_ops.calculate_coco_stats(histogram_bins=10)
+
+    # ASSERT
+    assert stats == columnar_stats
+    assert "ann_width_heights" not in stats
+    for key in ["ann_width_hist", "ann_height_hist"]:
+        assert len(stats[key]["counts"]) == 10
+        assert stats[key]["edges"][0] == 0.0 and stats[key]["edges"][-1] == 1.0
+        assert sum(stats[key]["counts"]) == stats["num_annotations"]
+    assert sum(stats["img_width_hist"]["counts"]) == stats["num_images"]
+
+
+def test_stats_skip_orphan_annotations(coco_split_random_input):
+    # ARRANGE
+    expected_ops = CocoOps.from_dict(coco_split_random_input)
+    orphan = coco_split_random_input["annotations"][0]
+    for ann_id, image_id in [(10**6, 10**6), (10**6 + 1, -5)]:
+        coco_split_random_input["annotations"].append(
+            {**orphan, "id": ann_id, "image_id": image_id}
+        )
+    coco_ops = CocoOps.from_dict(coco_split_random_input)
+
+    # ACT
+    stats = coco_ops.calculate_coco_stats(histogram_bins=10, quality=True)
+    expected = expected_ops.calculate_coco_stats(histogram_bins=10, quality=True)
+
+    # ASSERT
+    for key in ["avg_obj_per_image", "min_obj_per_image", "max_obj_per_image"]:
+        assert stats[key] == expected[key]
+    assert stats["ann_width_hist"] == expected["ann_width_hist"]
+    assert stats["quality"] == expected["quality"]
+    assert stats["num_annotations"] == expected["num_annotations"] + 2
+
+
+def test_stats_class_scores(coco_delete_input):
+    # ARRANGE
+    coco_ops = CocoOps.from_dict(coco_delete_input)
+    scores = {}
+    for ann in coco_ops.coco.annotations:
+        scores.setdefault(ann.category_id, []).append(ann.score)
+
+    # ACT
+    stats = coco_ops.calculate_coco_stats()
+
+    # ASSERT
+    assert stats["count_objs_per_categ"] == {
+        cat_id: len(values) for cat_id, values in scores.items()
+    }
+    for cat_id, values in scores.items():
+        assert abs(stats["class_scores"][cat_id] - sum(values) / len(values)) < 1e-9
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_stream_stats_matches_in_memory(tmp_path, coco_split_random_input, max_workers):
+    # ARRANGE
+    coco_ops = CocoOps.from_dict(coco_split_random_input)
+    images = coco_split_random_input["images"]
+    shards = [images[: len(images) // 2], images[len(images) // 2 :]]
+    for index, shard_images in enumerate(shards):
+        image_ids = {image["id"] for image in shard_images}
+        shard = {
+            "images": shard_images,
+            "annotations": [
+                ann
+                for ann in coco_split_random_input["annotations"]
+                if ann["image_id"] in image_ids
+            ],
+            "categories": coco_split_random_input["categories"],
+        }
+        (tmp_path / f"shard_{index}.json").write_text(json.dumps(shard))
+
+    # ACT
+    stats = CocoOps.stream_stats(tmp_path, histogram_bins=10, max_workers=max_workers)
+
+    # ASSERT
+    expected = coco_ops.calculate_coco_stats(histogram_bins=10)
+    for key in [
+        "num_images",
+        "num_annotations",
+        "num_categories",
+        "avg_obj_per_image",
+        "min_obj_per_image",
+        "max_obj_per_image",
+        "count_objs_per_categ",
+        "categories",
+        "ann_width_hist",
+        "ann_height_hist",
+    ]:
+        assert stats[key] == expected[key]
+    for cat_id, score in expected["class_scores"].items():
+        assert abs(stats["class_scores"][cat_id] - score) < 1e-9
+    assert sum(stats["img_width_hist"]["counts"]) == stats["num_images"]
+
+
+def test_stats_accumulator_resolves_late_images(tmp_path):
+    # ARRANGE
+    coco_file = tmp_path / "coco.json"
+    coco_file.write_text(
+        json.dumps(
+            {
+                "annotations": [
+                    {"id": 1, "image_id": 1, "category_id": 1, "bbox": [0, 0, 5, 5]}
+                ],
+                "images": [{"id": 1, "file_name": "a.jpg", "width": 10, "height": 10}],
+                "categories": [{"id": 1, "name": "cat"}],
+            }
+        )
+    )
+
+    # ACT
+    stats = StatsAccumulator(histogram_bins=2).add_file(coco_file).to_dict()
+
+    # ASSERT
+    assert stats["num_images"] == 1
+    assert stats["ann_width_hist"]["counts"] == [0, 1]
+    assert stats["categories"] == ["cat"]
+
+
+def test_stats_accumulator_rejects_unknown_images(tmp_path):
+    # ARRANGE
+    coco_file = tmp_path / "coco.json"
+    coco_file.write_text(
+        json.dumps(
+            {
+                "images": [{"id": 1, "file_name": "a.jpg", "width": 10, "height": 10}],
+                "annotations": [
+                    {"id": 1, "image_id": 2, "category_id": 1, "bbox": [0, 0, 5, 5]}
+                ],
+            }
+        )
+    )
+
+    # ACT / ASSERT
+    with pytest.raises(ValueError, match="unknown image 2"):
+        StatsAccumulator().add_file(coco_file)
@@ -0,0 +1,67 @@
+import json
+import io
+
+import pytest
+
+from cocomltools.json_io import JsonRecordStream, iter_coco_records
+from cocomltools.models.coco import COCO
+from cocomltools.models.columnar import ColumnarCOCO
+
+COCO_FILE = "tests/mock/coco_split_random.json"
+
+
+def test_stream_records_small_chunks(coco_split_random_input):
+    # ACT - tiny chunks force records and numbers to straddle buffer boundaries
+    records = {"images": [], "annotations": [], "categories": []}
+    for section, elem in iter_coco_records(COCO_FILE, chunk_size=7):
+        records[section].append(elem)
+
+    # ASSERT
+    for section, elems in records.items():
+        assert elems == coco_split_random_input[section]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 1 << 20])
+def test_stream_skips_unwanted_sections(chunk_size):
+    # ARRANGE - strings with brackets, quotes and escapes in skipped values
+    document = {
+        "info": {"description": 'a "[quoted]" {value}\\', "year": 2024},
+        "images": [{"file_name": 'x]}\\"[.jpg', "tags": [[1], {"a": "]"}]}] * 3,
+        "licenses": "}",
+        "categories": [{"id": 1, "name": "cat"}, {"id": 2, "name": 'd\\"og'}],
+        "annotations": [],
+    }
+    text = json.dumps(document, indent=1)
+
+    # ACT
+    stream = JsonRecordStream(io.StringIO(text), chunk_size, sections=["categories"])
+    items = list(stream.iter_items())
+
+    # ASSERT
+    assert items == [("categories", elem) for elem in document["categories"]]
+
+
+def test_stream_compact_json(tmp_path, coco_delete_input):
+    # ARRANGE
+    coco_file = tmp_path / "coco.json"
+    coco_file.write_text(json.dumps(coco_delete_input, separators=(",", ":")))
+
+    # ACT
+    annotations = list(COCO.iter_annotations(coco_file))
+
+    # ASSERT
+    assert [ann.id for ann in annotations] == [
+        elem["id"] for elem in coco_delete_input["annotations"]
+    ]
+
+
+def test_from_json_file_streaming():
+    # ACT
+    coco = COCO.from_json_file(COCO_FILE)
+    coco_streamed = COCO.from_json_file(COCO_FILE, streaming=True)
+    columnar_streamed = ColumnarCOCO.from_json_file(COCO_FILE, streaming=True)
+
+    # ASSERT
+    assert coco_streamed.get_coco_dict() == coco.get_coco_dict()
+    assert columnar_streamed.get_coco_dict() == coco.get_coco_dict()
+    assert coco_streamed.image_names_to_ids == coco.image_names_to_ids
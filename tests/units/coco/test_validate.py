@@ -0,0 +1,82 @@
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from cocomltools.models.coco import COCO
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+@pytest.mark.parametrize("validate", ["full", "sample", "none"])
+def test_validate_modes_load_same_coco(
+    coco_split_random_input, tmp_path, streaming, validate
+):
+    # ARRANGE
+    json_file = tmp_path / "coco.json"
+    json_file.write_text(json.dumps(coco_split_random_input))
+    expected = COCO.from_dict(coco_split_random_input).get_coco_dict()
+
+    # ACT
+    coco = COCO.from_json_file(str(json_file), streaming=streaming, validate=validate)
+
+    # ASSERT
+    assert coco.get_coco_dict() == expected
+    assert len(coco.get_annotation_by_image_id(1)) == len(
+        [ann for ann in coco_split_random_input["annotations"] if ann["image_id"] == 1]
+    )
+
+
+def test_validate_modes_on_invalid_record(coco_split_random_input):
+    # ARRANGE
+    coco_split_random_input["annotations"][0]["bbox"] = "not a bbox"
+
+    # ACT / ASSERT
+    for validate in ["full", "sample"]:
+        with pytest.raises(ValidationError):
+            COCO.from_dict(coco_split_random_input, validate=validate)
+    coco = COCO.from_dict(coco_split_random_input, validate="none")
+    assert len(coco.annotations) == len(coco_split_random_input["annotations"])
+    with pytest.raises(ValueError):
+        COCO.from_dict(coco_split_random_input, validate="partial")
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+@pytest.mark.parametrize("bad_index, rejected", [(1001, False), (1002, True)])
+def test_sample_mode_checks_same_records_when_streaming(
+    coco_split_random_input, tmp_path, streaming, bad_index, rejected
+):
+    # ARRANGE
+    ann = coco_split_random_input["annotations"][0]
+    annotations = [{**ann, "id": index + 1} for index in range(1500)]
+    annotations[bad_index]["bbox"] = "not a bbox"
+    coco_split_random_input["annotations"] = annotations
+    json_file = tmp_path / "coco.json"
+    json_file.write_text(json.dumps(coco_split_random_input))
+
+    # ACT / ASSERT
+    if rejected:
+        with pytest.raises(ValidationError):
+            COCO.from_json_file(str(json_file), streaming=streaming, validate="sample")
+    else:
+        coco = COCO.from_json_file(
+            str(json_file), streaming=streaming, validate="sample"
+        )
+        assert len(coco.annotations) == len(annotations)
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+@pytest.mark.parametrize("slots", [False, True])
+@pytest.mark.parametrize("validate", ["sample", "none"])
+def test_trusted_modes_require_fields(
+    coco_split_random_input, tmp_path, streaming, slots, validate
+):
+    # ARRANGE
+    del coco_split_random_input["annotations"][-1]["area"]
+    json_file = tmp_path / "coco.json"
+    json_file.write_text(json.dumps(coco_split_random_input))
+
+    # ACT / ASSERT
+    with pytest.raises(ValueError, match="area"):
+        COCO.from_json_file(
+            str(json_file), streaming=streaming, validate=validate, slots=slots
+        )
@@ -0,0 +1,49 @@
+import gzip
+import json
+from cocomltools.models.coco import COCO
+from cocomltools.models.columnar import ColumnarCOCO
+
+
+def test_save_coco_dict_layouts(tmp_path, coco_split_random_input):
+    # ARRANGE
+    coco = COCO.from_dict(coco_split_random_input)
+    expected = coco.get_coco_dict()
+
+    # ACT
+    coco.save_coco_dict(tmp_path / "coco.json")
+    coco.save_coco_dict(tmp_path / "coco_compact.json", compact=True)
+    coco.save_coco_dict(tmp_path / "coco.json.gz", compact=True)
+
+    # ASSERT
+    assert json.loads((tmp_path / "coco.json").read_text()) == expected
+    compact_text = (tmp_path / "coco_compact.json").read_text()
+    assert json.loads(compact_text) == expected
+    assert "\n" not in compact_text
+    with gzip.open(tmp_path / "coco.json.gz", "rt") as f:
+        assert json.load(f) == expected
+    assert COCO.from_json_file(tmp_path / "coco.json.gz").get_coco_dict() == expected
+
+
+def test_columnar_to_json_bytes(coco_delete_input):
+    # ARRANGE
+    coco = COCO.from_dict(coco_delete_input)
+    columnar = ColumnarCOCO.from_dict(coco_delete_input)
+
+    # ACT
+    data = columnar.to_json_bytes()
+
+    # ASSERT
+    assert json.loads(data) == json.loads(coco.to_json_bytes())
+    assert json.loads(data) == coco.get_coco_dict()
+
+
+def test_save_empty_coco(tmp_path):
+    # ACT
+    COCO().save_coco_dict(tmp_path / "empty.json")
+
+    # ASSERT
+    assert json.loads((tmp_path / "empty.json").read_text()) == {
+        "images": [],
+        "annotations": [],
+        "categories": [],
+    }
@@ -0,0 +1,46 @@
+import pytest
+from PIL import Image
+
+
+@pytest.fixture
+def crop_coco_input():
+    return {
+        "images": [
+            {"id": 1, "file_name": "image1.jpg", "width": 64, "height": 48},
+            {"id": 2, "file_name": "image2.png", "width": 32, "height": 32},
+            {"id": 3, "file_name": "image3.jpg", "width": 16, "height": 16},
+        ],
+        "annotations": [
+            {
+                "id": 1,
+                "image_id": 1,
+                "category_id": 1,
+                "bbox": [0, 0, 10, 20],
+                "area": 200,
+            },
+            {
+                "id": 2,
+                "image_id": 1,
+                "category_id": 2,
+                "bbox": [30, 10, 20, 20],
+                "area": 400,
+            },
+            {
+                "id": 3,
+                "image_id": 2,
+                "category_id": 1,
+                "bbox": [4, 4, 8, 8],
+                "area": 64,
+            },
+        ],
+        "categories": [{"id": 1, "name": "cat"}, {"id": 2, "name": "dog"}],
+    }
+
+
+@pytest.fixture
+def images_dir(tmp_path):
+    images_dir = tmp_path / "images"
+    images_dir.mkdir()
+    Image.new("RGB", (64, 48), color=(255, 0, 0)).save(images_dir / "image1.jpg")
+    Image.new("RGBA", (32, 32), color=(0, 255, 0, 255)).save(images_dir / "image2.png")
+    return images_dir
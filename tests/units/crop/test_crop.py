@@ -0,0 +1,297 @@
+import io
+import json
+import tarfile
+
+import numpy as np
+import pytest
+from PIL import Image
+from cocomltools.coco_ops import CocoOps
+from cocomltools.crop import (
+    MANIFEST_FILE,
+    CropManifest,
+    CropOptions,
+    _crop_box,
+    _open_for_crop,
+)
+from cocomltools.segmentation import mask_to_rle
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_crop_backends(tmp_path, crop_coco_input, images_dir, backend):
+    # ARRANGE
+    coco_ops = CocoOps.from_dict(crop_coco_input)
+    output_dir = tmp_path / "cropped"
+
+    # ACT
+    engine = coco_ops.crop(images_dir, output_dir, max_workers=2, backend=backend)
+
+    # ASSERT
+    assert engine.num_crops == 3
+    assert engine.errors == []
+    with Image.open(output_dir / "dog" / "2.jpg") as crop:
+        assert crop.size == (20, 20)
+    assert sorted(path.name for path in (output_dir / "cat").iterdir()) == [
+        "1.jpg",
+        "3.jpg",
+    ]
+
+
+def test_crop_backend_overrides_options(tmp_path, crop_coco_input, images_dir):
+    # ARRANGE
+    coco_ops = CocoOps.from_dict(crop_coco_input)
+    options = CropOptions(quality=80)
+
+    # ACT
+    engine = coco_ops.crop(
+        images_dir, tmp_path / "cropped", backend="process", options=options
+    )
+
+    # ASSERT
+    assert engine.options.backend == "process"
+    assert engine.options.quality == 80
+    assert options.backend == "thread"
+    assert engine.num_crops == 3
+
+
+def test_crop_reports_missing_images(tmp_path, crop_coco_input, images_dir):
+    # ARRANGE
+    crop_coco_input["annotations"].append(
+        {"id": 4, "image_id": 3, "category_id": 1, "bbox": [0, 0, 4, 4], "area": 16}
+    )
+    coco_ops = CocoOps.from_dict(crop_coco_input, columnar=True)
+
+    # ACT
+    engine = coco_ops.crop(images_dir, tmp_path / "cropped")
+
+    # ASSERT
+    assert engine.num_crops == 3
+    assert [result.image_id for result in engine.errors] == [3]
+
+
+def test_crop_draft_and_output_format(tmp_path, crop_coco_input):
+    # ARRANGE
+    images_dir = tmp_path / "images"
+    images_dir.mkdir()
+    Image.new("RGB", (800, 600), color=(0, 0, 255)).save(images_dir / "large.jpg")
+    crop_coco_input["images"] = [
+        {"id": 1, "file_name": "large.jpg", "width": 800, "height": 600}
+    ]
+    crop_coco_input["annotations"] = [
+        {
+            "id": 1,
+            "image_id": 1,
+            "category_id": 1,
+            "bbox": [100, 100, 400, 300],
+            "area": 1,
+        },
+        {"id": 2, "image_id": 1, "category_id": 2, "bbox": [0, 0, 160, 160], "area": 1},
+    ]
+    coco_ops = CocoOps.from_dict(crop_coco_input)
+    output_dir = tmp_path / "cropped"
+
+    # ACT
+    engine = coco_ops.crop(
+        images_dir,
+        output_dir,
+        options=CropOptions(max_side=40, output_format="webp", quality=80),
+    )
+
+    # ASSERT
+    assert engine.errors == []
+    with Image.open(output_dir / "cat" / "1.webp") as crop:
+        assert crop.size == (40, 30)
+    with Image.open(output_dir / "dog" / "2.webp") as crop:
+        assert crop.size == (40, 40)
+
+
+def test_open_for_crop_uses_draft(tmp_path):
+    # ARRANGE
+    Image.new("RGB", (800, 600)).save(tmp_path / "large.jpg")
+    anns = [(1, 1, "cat", (0, 0, 400, 400))]
+
+    # ACT
+    image, boxes, scale = _open_for_crop(
+        tmp_path / "large.jpg", anns, CropOptions(output_size=(100, 100))
+    )
+
+    # ASSERT
+    assert boxes == [(0, 0, 400, 400)]
+    assert scale == 0.25
+    assert image.size == (200, 150)
+
+
+def test_crop_tar_shards(tmp_path, crop_coco_input, images_dir):
+    # ARRANGE
+    coco_ops = CocoOps.from_dict(crop_coco_input)
+    output_dir = tmp_path / "cropped"
+
+    # ACT
+    engine = coco_ops.crop(
+        images_dir,
+        output_dir,
+        max_workers=2,
+        options=CropOptions(backend="process", output_mode="tar", shard_size=2),
+    )
+
+    # ASSERT
+    assert engine.num_crops == 3
+    shards = sorted(output_dir.glob("crops-*.tar"))
+    assert [shard.name for shard in shards] == ["crops-000000.tar", "crops-000001.tar"]
+    members = {}
+    for shard in shards:
+        with tarfile.open(shard) as tar:
+            for member in tar.getmembers():
+                members[member.name] = tar.extractfile(member).read()
+    assert sorted(members) == [
+        f"{ann_id}.{ext}" for ann_id in (1, 2, 3) for ext in ("cls", "jpg", "json")
+    ]
+    assert json.loads(members["2.json"]) == {
+        "ann_id": 2,
+        "image_id": 1,
+        "category_id": 2,
+        "category": "dog",
+    }
+    assert members["2.cls"] == b"2"
+    assert json.loads((output_dir / "categories.json").read_text()) == {
+        "1": "cat",
+        "2": "dog",
+    }
+    with Image.open(io.BytesIO(members["2.jpg"])) as crop:
+        assert crop.size == (20, 20)
+
+
+@pytest.mark.parametrize("output_mode", ["files", "tar"])
+def test_crop_resume_from_manifest(tmp_path, crop_coco_input, images_dir, output_mode):
+    # ARRANGE
+    crop_coco_input["annotations"].append(
+        {"id": 4, "image_id": 3, "category_id": 1, "bbox": [0, 0, 4, 4], "area": 16}
+    )
+    coco_ops = CocoOps.from_dict(crop_coco_input)
+    output_dir = tmp_path / "cropped"
+    options = CropOptions(output_mode=output_mode)
+    coco_ops.crop(images_dir, output_dir, options=options)
+    Image.new("RGB", (16, 16)).save(images_dir / "image3.jpg")
+
+    # ACT
+    engine = coco_ops.crop(images_dir, output_dir, options=options)
+
+    # ASSERT
+    assert engine.num_skipped == 2
+    assert engine.num_images == 1
+    assert engine.num_crops == 1
+    manifest = CropManifest(output_dir / MANIFEST_FILE)
+    assert manifest.done_image_ids == {1, 2, 3}
+    assert manifest.errors == []
+    entries = [
+        json.loads(line)
+        for line in (output_dir / MANIFEST_FILE).read_text().splitlines()
+    ]
+    image3_entries = [entry for entry in entries if entry["image_id"] == 3]
+    assert [entry["status"] for entry in image3_entries] == ["failed", "done"]
+    assert image3_entries[0]["error_type"] == "FileNotFoundError"
+    if output_mode == "tar":
+        assert sorted(path.name for path in output_dir.glob("crops-*")) == [
+            "crops-000000.tar",
+            "crops-000001.tar",
+        ]
+
+
+@pytest.mark.parametrize("output_mode", ["files", "tar"])
+def test_crop_resume_rejects_another_dataset(
+    tmp_path, crop_coco_input, images_dir, output_mode
+):
+    # ARRANGE
+    output_dir = tmp_path / "cropped"
+    options = CropOptions(output_mode=output_mode)
+    CocoOps.from_dict(crop_coco_input).crop(images_dir, output_dir, options=options)
+    other_input = {
+        "images": [{"id": 1, "file_name": "image2.png", "width": 32, "height": 32}],
+        "annotations": [
+            {"id": 1, "image_id": 1, "category_id": 1, "bbox": [0, 0, 8, 8], "area": 64}
+        ],
+        "categories": [{"id": 1, "name": "dog"}],
+    }
+
+    # ACT / ASSERT
+    with pytest.raises(ValueError, match="another dataset|do not match"):
+        CocoOps.from_dict(other_input).crop(images_dir, output_dir, options=options)
+
+
+def test_crop_box_padding_square_clamp():
+    # ARRANGE
+    options = CropOptions(padding_pct=50, square=True, clamp=True)
+
+    # ACT
+    box = _crop_box((10, 20, 20, 10), (100, 40), options)
+
+    # ASSERT
+    # padded to (0, 15, 40, 35), squared to (0, 5, 40, 45), clamped to the image
+    assert box == (0, 5, 40, 40)
+
+
+def test_crop_array_output(tmp_path, crop_coco_input, images_dir):
+    # ARRANGE
+    coco_ops = CocoOps.from_dict(crop_coco_input)
+    output_dir = tmp_path / "cropped"
+
+    # ACT
+    engine = coco_ops.crop(
+        images_dir,
+        output_dir,
+        options=CropOptions(
+            output_mode="array", output_size=(8, 6), padding_pct=10, shard_size=1
+        ),
+    )
+
+    # ASSERT
+    assert engine.num_crops == 3
+    crops = np.load(output_dir / "crops.npy", mmap_mode="r")
+    assert crops.shape == (3, 6, 8, 3)
+    assert crops.dtype == np.uint8
+    assert np.load(output_dir / "ann_ids.npy").tolist() == [1, 2, 3]
+    assert np.load(output_dir / "labels.npy").tolist() == [1, 2, 1]
+    assert (crops[2] == (0, 255, 0)).all()
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_crop_masks(tmp_path, crop_coco_input, images_dir, columnar):
+    # ARRANGE
+    top_half = np.zeros((32, 32), dtype=np.uint8)
+    top_half[4:8, 4:12] = 1
+    anns = crop_coco_input["annotations"]
+    anns[1]["segmentation"] = [[30, 10, 40, 10, 40, 30, 30, 30]]
+    anns[2]["segmentation"] = mask_to_rle(top_half)
+    coco_ops = CocoOps.from_dict(crop_coco_input, columnar=columnar)
+
+    # ACT
+    engine = coco_ops.crop(
+        images_dir,
+        tmp_path / "zero",
+        options=CropOptions(mask="zero", output_format="png"),
+    )
+    coco_ops.crop(
+        images_dir,
+        tmp_path / "alpha",
+        options=CropOptions(mask="alpha", output_format="png"),
+    )
+
+    # ASSERT
+    assert engine.errors == []
+    with Image.open(tmp_path / "zero" / "dog" / "2.png") as crop:
+        pixels = np.asarray(crop)
+    assert (pixels[:, :10, 0] > 200).all() and (pixels[:, 10:] == 0).all()
+    with Image.open(tmp_path / "zero" / "cat" / "1.png") as crop:
+        assert (np.asarray(crop)[..., 0] > 200).all()
+    with Image.open(tmp_path / "alpha" / "cat" / "3.png") as crop:
+        assert crop.mode == "RGBA"
+        alpha = np.asarray(crop)[..., 3]
+    assert (alpha[:4] == 255).all() and (alpha[4:] == 0).all()
+
+
+def test_crop_alpha_mask_needs_transparency(tmp_path, crop_coco_input, images_dir):
+    # ARRANGE
+    coco_ops = CocoOps.from_dict(crop_coco_input)
+
+    # ACT / ASSERT
+    with pytest.raises(ValueError, match="Alpha masks"):
+        coco_ops.crop(images_dir, tmp_path / "out", options=CropOptions(mask="alpha"))